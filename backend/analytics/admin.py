@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import DailyRollup
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'metric', 'key', 'count', 'total')
+    list_filter = ('metric',)
+    date_hierarchy = 'day'
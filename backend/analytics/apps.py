@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'analytics'
+
+    def ready(self):
+        # Keep the rollup table in step with scan, review and consultation writes
+        from . import signals  # noqa: F401
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('metric', models.CharField(choices=[('scans', 'Scans uploaded'), ('reviews', 'Scans reviewed'), ('consultations', 'Consultations requested'), ('consultations_completed', 'Consultations completed')], max_length=30)),
+                ('key', models.CharField(blank=True, default='', max_length=100)),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'metric', 'key'],
+                'indexes': [models.Index(fields=['metric', 'day'], name='rollup_metric_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'metric', 'key'), name='unique_daily_rollup')],
+            },
+        ),
+    ]
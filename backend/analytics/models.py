@@ -0,0 +1,34 @@
+from django.db import models
+
+class DailyRollup(models.Model):
+    """
+    Pre-aggregated counters per day, metric and key.
+
+    The key is the detected condition for scans and the specialist id for
+    reviews and consultations. `total` carries a summed quantity (turnaround
+    seconds) so averages can be derived without touching the source tables.
+    """
+    METRIC_CHOICES = (
+        ('scans', 'Scans uploaded'),
+        ('reviews', 'Scans reviewed'),
+        ('consultations', 'Consultations requested'),
+        ('consultations_completed', 'Consultations completed'),
+    )
+
+    day = models.DateField()
+    metric = models.CharField(max_length=30, choices=METRIC_CHOICES)
+    key = models.CharField(max_length=100, blank=True, default='')
+    count = models.IntegerField(default=0)
+    total = models.FloatField(default=0)
+
+    class Meta:
+        ordering = ['day', 'metric', 'key']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'metric', 'key'], name='unique_daily_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['metric', 'day'], name='rollup_metric_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.metric}[{self.key}] = {self.count}"
@@ -0,0 +1,8 @@
+from rest_framework import permissions
+
+class IsAdminUserType(permissions.BasePermission):
+    """Allows access only to admin users"""
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.user_type == 'admin' or request.user.is_staff
+        )
@@ -0,0 +1,103 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DurationField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyRollup
+
+
+def local_day(value=None):
+    """Calendar day (in the project time zone) a timestamp is counted under."""
+    return timezone.localdate(value or timezone.now())
+
+
+def bump(day, metric, key='', count=1, total=0.0):
+    """
+    Atomically add to a rollup counter, creating the row on first use.
+
+    Uses an UPDATE ... SET count = count + n so concurrent writers never lose
+    increments; the INSERT only happens once per (day, metric, key).
+    """
+    key = str(key) if key is not None else ''
+    lookup = {'day': day, 'metric': metric, 'key': key}
+    updated = DailyRollup.objects.filter(**lookup).update(
+        count=F('count') + count, total=F('total') + total
+    )
+    if updated:
+        return
+    try:
+        with transaction.atomic():
+            DailyRollup.objects.create(count=count, total=total, **lookup)
+    except IntegrityError:
+        # Another worker created the row between our UPDATE and INSERT
+        DailyRollup.objects.filter(**lookup).update(
+            count=F('count') + count, total=F('total') + total
+        )
+
+
+def _seconds(duration):
+    return duration.total_seconds() if duration is not None else 0.0
+
+
+@transaction.atomic
+def rebuild():
+    """
+    Recompute every rollup row from the source tables.
+
+    Only needed after bulk imports that bypass model signals, or to seed the
+    table on an existing database; day-to-day the signals keep it current.
+    """
+    from scans.models import EyeScan, ScanReview
+    from consultations.models import Consultation
+
+    DailyRollup.objects.all().delete()
+    rows = []
+
+    scans = (
+        EyeScan.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'condition_detected')
+        .annotate(count=Count('id'))
+    )
+    for row in scans:
+        rows.append(DailyRollup(day=row['day'], metric='scans',
+                                key=row['condition_detected'], count=row['count']))
+
+    reviews = (
+        ScanReview.objects.annotate(
+            day=TruncDate('created_at'),
+            turnaround=ExpressionWrapper(F('created_at') - F('scan__created_at'),
+                                         output_field=DurationField()),
+        )
+        .values('day', 'specialist_id')
+        .annotate(count=Count('id'), total=Sum('turnaround'))
+    )
+    for row in reviews:
+        rows.append(DailyRollup(day=row['day'], metric='reviews', key=str(row['specialist_id']),
+                                count=row['count'], total=_seconds(row['total'])))
+
+    consultations = (
+        Consultation.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'specialist_id')
+        .annotate(count=Count('id'))
+    )
+    for row in consultations:
+        rows.append(DailyRollup(day=row['day'], metric='consultations',
+                                key=str(row['specialist_id']), count=row['count']))
+
+    completed = (
+        Consultation.objects.filter(status='completed', completed_at__isnull=False)
+        .annotate(
+            day=TruncDate('completed_at'),
+            turnaround=ExpressionWrapper(F('completed_at') - F('created_at'),
+                                         output_field=DurationField()),
+        )
+        .values('day', 'specialist_id')
+        .annotate(count=Count('id'), total=Sum('turnaround'))
+    )
+    for row in completed:
+        rows.append(DailyRollup(day=row['day'], metric='consultations_completed',
+                                key=str(row['specialist_id']), count=row['count'],
+                                total=_seconds(row['total'])))
+
+    DailyRollup.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
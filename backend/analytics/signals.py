@@ -0,0 +1,104 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from scans.models import EyeScan, ScanReview
+from consultations.models import Consultation
+from .rollups import bump, local_day
+
+
+@receiver(pre_save, sender=EyeScan)
+def remember_scan_condition(sender, instance, update_fields=None, **kwargs):
+    instance._rollup_old_condition = None
+    if instance.pk is None or kwargs.get('raw'):
+        return
+    if update_fields is not None and 'condition_detected' not in update_fields:
+        return
+    instance._rollup_old_condition = (
+        EyeScan.objects.filter(pk=instance.pk).values_list('condition_detected', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=EyeScan)
+def count_scan(sender, instance, created, **kwargs):
+    if kwargs.get('raw'):
+        return
+    day = local_day(instance.created_at)
+    if created:
+        bump(day, 'scans', instance.condition_detected)
+        return
+    old = getattr(instance, '_rollup_old_condition', None)
+    if old and old != instance.condition_detected:
+        bump(day, 'scans', old, count=-1)
+        bump(day, 'scans', instance.condition_detected)
+
+
+@receiver(post_delete, sender=EyeScan)
+def uncount_scan(sender, instance, **kwargs):
+    bump(local_day(instance.created_at), 'scans', instance.condition_detected, count=-1)
+
+
+def _review_turnaround(review):
+    try:
+        return (review.created_at - review.scan.created_at).total_seconds()
+    except EyeScan.DoesNotExist:
+        return 0.0
+
+
+@receiver(post_save, sender=ScanReview)
+def count_review(sender, instance, created, **kwargs):
+    if not created or kwargs.get('raw'):
+        return
+    bump(local_day(instance.created_at), 'reviews', instance.specialist_id, total=_review_turnaround(instance))
+
+
+@receiver(post_delete, sender=ScanReview)
+def uncount_review(sender, instance, **kwargs):
+    bump(local_day(instance.created_at), 'reviews', instance.specialist_id, count=-1,
+         total=-_review_turnaround(instance))
+
+
+def consultation_rows(status, specialist_id, created_at, completed_at):
+    """[(day, metric, key, total)] one consultation adds to the rollups; the same rule as rebuild()"""
+    rows = [(local_day(created_at), 'consultations', specialist_id, 0.0)]
+    if status == 'completed' and completed_at is not None:
+        rows.append((local_day(completed_at), 'consultations_completed', specialist_id,
+                     (completed_at - created_at).total_seconds()))
+    return rows
+
+
+def _consultation_state(consultation):
+    return (consultation.status, consultation.specialist_id, consultation.created_at, consultation.completed_at)
+
+
+@receiver(pre_save, sender=Consultation)
+def remember_consultation_state(sender, instance, **kwargs):
+    instance._rollup_old_state = None
+    if instance.pk is None or kwargs.get('raw'):
+        return
+    instance._rollup_old_state = (
+        Consultation.objects.filter(pk=instance.pk)
+        .values_list('status', 'specialist_id', 'created_at', 'completed_at').first()
+    )
+
+
+@receiver(post_save, sender=Consultation)
+def count_consultation(sender, instance, created, **kwargs):
+    if kwargs.get('raw'):
+        return
+    old = None if created else getattr(instance, '_rollup_old_state', None)
+    new = _consultation_state(instance)
+    if old == new:
+        return
+    # Take back what the previous state counted and add the new state, so
+    # completing, reopening or reassigning moves the counts both ways
+    if old is not None:
+        for day, metric, key, total in consultation_rows(*old):
+            bump(day, metric, key, count=-1, total=-total)
+    for day, metric, key, total in consultation_rows(*new):
+        bump(day, metric, key, total=total)
+
+
+@receiver(post_delete, sender=Consultation)
+def uncount_consultation(sender, instance, **kwargs):
+    for day, metric, key, total in consultation_rows(*_consultation_state(instance)):
+        bump(day, metric, key, count=-1, total=-total)
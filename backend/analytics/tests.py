@@ -0,0 +1,159 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from consultations.models import Consultation
+from scans.models import EyeScan, ScanReview
+from users.models import CustomUser
+from .models import DailyRollup
+from .rollups import local_day, rebuild
+
+
+def snapshot():
+    return {
+        (row.day, row.metric, row.key): (row.count, round(row.total, 3))
+        for row in DailyRollup.objects.exclude(count=0)
+    }
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user')
+        self.doctor = CustomUser.objects.create_user('doctor', 'd@example.com', 'pw', user_type='specialist')
+        self.other = CustomUser.objects.create_user('other', 'o@example.com', 'pw', user_type='specialist')
+        self.scans = [
+            EyeScan.objects.create(user=self.patient, image=f'eye_scans/{i}.jpg', condition_detected=condition,
+                                   confidence_score=0.8, recommendations='-')
+            for i, condition in enumerate(['cataract', 'redness', 'cataract'])
+        ]
+
+    def assertMatchesRebuild(self):
+        incremental = snapshot()
+        rebuild()
+        self.assertEqual(incremental, snapshot())
+
+    def consultation(self, **kwargs):
+        return Consultation.objects.create(user=self.patient, specialist=self.doctor, description='-', **kwargs)
+
+    def test_reviews_and_deletes(self):
+        reviews = [ScanReview.objects.create(scan=scan, specialist=self.doctor, diagnosis='-', recommendations='-')
+                   for scan in self.scans]
+        reviews[0].delete()
+        self.scans[1].delete()
+        self.assertMatchesRebuild()
+
+    def test_completed_moves_both_ways(self):
+        consultation = self.consultation()
+        for status in ('completed', 'approved', 'completed', 'cancelled', 'completed'):
+            consultation.status = status
+            consultation.save()
+        self.assertEqual(
+            DailyRollup.objects.get(metric='consultations_completed', key=str(self.doctor.pk)).count, 1)
+        self.assertMatchesRebuild()
+
+    def test_status_completed_without_timestamp(self):
+        consultation = self.consultation()
+        consultation.status = 'completed'
+        consultation.save(update_fields=['status'])
+        consultation.refresh_from_db()
+        self.assertIsNotNone(consultation.completed_at)
+        self.assertMatchesRebuild()
+
+    def test_reassign_and_delete(self):
+        consultation = self.consultation(status='completed',
+                                         completed_at=timezone.now() + timedelta(days=2))
+        consultation.specialist = self.other
+        consultation.save()
+        self.consultation().delete()
+        self.assertMatchesRebuild()
+        consultation.delete()
+        rebuild()
+        self.assertFalse(DailyRollup.objects.filter(metric__startswith='consultations').exists())
+
+
+class RuntimeStatsTests(TestCase):
+    def test_admin_only(self):
+        client = APIClient()
+        self.assertEqual(client.get('/api/analytics/runtime/', secure=True).status_code, 401)
+        client.force_authenticate(CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user'))
+        self.assertEqual(client.get('/api/analytics/runtime/', secure=True).status_code, 403)
+        client.force_authenticate(CustomUser.objects.create_user('admin', 'a@example.com', 'pw', user_type='admin'))
+        response = client.get('/api/analytics/runtime/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('pid', response.data['models'])
+
+    def test_readiness_probe_only_checks_the_database(self):
+        response = self.client.get('/health/ready/', secure=True)
+        self.assertEqual(response.json(), {'status': 'healthy', 'database': 'working'})
+
+
+class SummaryTests(TestCase):
+    def setUp(self):
+        self.patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user')
+        self.doctor = CustomUser.objects.create_user('doctor', 'd@example.com', 'pw', user_type='specialist',
+                                                     first_name='Ama', last_name='Owusu')
+        self.admin = CustomUser.objects.create_user('admin', 'a@example.com', 'pw', user_type='admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def get(self, **params):
+        return self.client.get('/api/analytics/summary/', params, secure=True)
+
+    def scan(self, condition='cataract', days_ago=0):
+        scan = EyeScan.objects.create(user=self.patient, image='eye_scans/x.jpg', condition_detected=condition,
+                                      confidence_score=0.8, recommendations='-')
+        if days_ago:
+            EyeScan.objects.filter(pk=scan.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+        return scan
+
+    def test_admin_only(self):
+        self.assertEqual(APIClient().get('/api/analytics/summary/', secure=True).status_code, 401)
+        for user in (self.patient, self.doctor):
+            client = APIClient()
+            client.force_authenticate(user)
+            self.assertEqual(client.get('/api/analytics/summary/', secure=True).status_code, 403)
+        self.assertEqual(self.get().status_code, 200)
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.get(days='many').status_code, 400)
+        self.assertEqual(self.get(granularity='year').status_code, 400)
+
+    def test_granularity(self):
+        for days_ago in (0, 1, 1, 8, 40, 75):
+            self.scan(days_ago=days_ago)
+        rebuild()
+        days = [local_day(created_at) for created_at in EyeScan.objects.values_list('created_at', flat=True)]
+        periods = {
+            'day': lambda day: day,
+            'week': lambda day: day - timedelta(days=day.weekday()),
+            'month': lambda day: day.replace(day=1),
+        }
+        for granularity, period in periods.items():
+            expected = sorted(Counter(period(day).isoformat() for day in days).items())
+            series = self.get(days=120, granularity=granularity).json()['scans']['series']
+            self.assertEqual([(row['period'], row['count']) for row in series], expected, granularity)
+        self.assertEqual(self.get(days=2).json()['scans']['total'], 3)
+
+    def test_matches_rebuild(self):
+        scans = [self.scan(condition) for condition in ('cataract', 'redness', 'cataract', 'normal')]
+        reviews = [ScanReview.objects.create(scan=scan, specialist=self.doctor, diagnosis='-', recommendations='-')
+                   for scan in scans[:3]]
+        consultations = [Consultation.objects.create(user=self.patient, specialist=self.doctor, description='-')
+                         for _ in range(3)]
+        for consultation in consultations[:2]:
+            consultation.status = 'completed'
+            consultation.save()
+        reviews[0].delete()
+        scans[1].delete()
+        consultations[0].delete()
+
+        incremental = self.get().json()
+        rebuild()
+        self.assertEqual(incremental, self.get().json())
+        self.assertEqual(incremental['scans']['by_condition'], {'cataract': 2, 'normal': 1})
+        self.assertEqual(incremental['reviews']['total'], 1)
+        self.assertEqual(incremental['reviews']['by_specialist'][0]['specialist_name'], 'Ama Owusu')
+        self.assertEqual((incremental['consultations']['requested'], incremental['consultations']['completed']), (2, 1))
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('summary/', views.summary, name='analytics-summary'),
+    path('runtime/', views.runtime, name='analytics-runtime'),
+]
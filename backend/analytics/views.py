@@ -0,0 +1,121 @@
+from datetime import timedelta
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from users.models import CustomUser
+from .models import DailyRollup
+from .permissions import IsAdminUserType
+from .rollups import local_day
+
+MAX_DAYS = 366
+GRANULARITIES = {
+    'day': None,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def _average(total, count):
+    return round(total / count, 2) if count else None
+
+
+def _per_specialist(rows, names, turnaround=True):
+    result = []
+    for row in rows:
+        entry = {
+            'specialist': int(row['key']),
+            'specialist_name': names.get(int(row['key']), ''),
+            'count': row['count'],
+        }
+        if turnaround:
+            entry['avg_turnaround_hours'] = _average(row['total'] / 3600, row['count'])
+        result.append(entry)
+    return result
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUserType])
+def summary(request):
+    """
+    Dashboard statistics read from the pre-aggregated rollup table.
+
+    Cost depends on the requested window and number of distinct keys, never on
+    how many scans or consultations exist.
+    """
+    try:
+        days = int(request.query_params.get('days', 30))
+    except ValueError:
+        return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    days = max(1, min(days, MAX_DAYS))
+
+    granularity = request.query_params.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return Response(
+            {'error': f"granularity must be one of {', '.join(GRANULARITIES)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    end = local_day()
+    start = end - timedelta(days=days - 1)
+    # Deletes can leave rows counted back down to zero; rebuild() never writes those
+    rollups = DailyRollup.objects.filter(day__gte=start, day__lte=end).exclude(count=0)
+
+    def totals(metric):
+        return list(
+            rollups.filter(metric=metric).values('key')
+            .annotate(count=Sum('count'), total=Sum('total')).order_by('key')
+        )
+
+    scans = totals('scans')
+    reviews = totals('reviews')
+    requested = totals('consultations')
+    completed = totals('consultations_completed')
+
+    trunc = GRANULARITIES[granularity]
+    period = trunc('day') if trunc else F('day')
+    scan_series = (
+        rollups.filter(metric='scans').values(period=period)
+        .annotate(count=Sum('count')).order_by('period')
+    )
+
+    specialist_ids = {int(row['key']) for row in reviews + requested + completed if row['key']}
+    names = {
+        user.id: user.get_full_name() or user.username
+        for user in CustomUser.objects.filter(id__in=specialist_ids).only('id', 'first_name', 'last_name', 'username')
+    }
+
+    review_count = sum(row['count'] for row in reviews)
+    review_seconds = sum(row['total'] for row in reviews)
+
+    return Response({
+        'range': {'start': start, 'end': end, 'granularity': granularity},
+        'scans': {
+            'total': sum(row['count'] for row in scans),
+            'by_condition': {row['key']: row['count'] for row in scans},
+            'series': [{'period': row['period'], 'count': row['count']} for row in scan_series],
+        },
+        'reviews': {
+            'total': review_count,
+            'avg_turnaround_hours': _average(review_seconds / 3600, review_count),
+            'by_specialist': _per_specialist(reviews, names),
+        },
+        'consultations': {
+            'requested': sum(row['count'] for row in requested),
+            'completed': sum(row['count'] for row in completed),
+            'requested_by_specialist': _per_specialist(requested, names, turnaround=False),
+            'completed_by_specialist': _per_specialist(completed, names),
+        },
+    })
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUserType])
+def runtime(request):
+    """Password-hashing pool and mapped-model stats of the worker that served this request"""
+    from scans.ml.registry import stats as model_stats
+    from users.hashing import stats as auth_hashing_stats
+    return Response({'auth_hashing': auth_hashing_stats(), 'models': model_stats()})
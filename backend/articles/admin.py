@@ -1,4 +1,12 @@
 from django.contrib import admin
+from eyecare.admin import PerformanceAdminMixin
 from .models import Article
 
-admin.site.register(Article)
+@admin.register(Article)
+class ArticleAdmin(PerformanceAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'category', 'author', 'is_published', 'created_at')
+    list_filter = ('category', 'is_published')
+    list_select_related = ('author',)
+    search_fields = ('title',)
+    autocomplete_fields = ('author',)
+    readonly_fields = ('created_at', 'updated_at')
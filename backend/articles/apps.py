@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class ArticlesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'articles'
+
+    def ready(self):
+        # Remove article images along with their articles
+        from . import signals  # noqa: F401
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:47
+
+import eyecare.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_trigram_search'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='article',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to=eyecare.uploads.ShardedUploadTo('articles/')),
+        ),
+    ]
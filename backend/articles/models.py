@@ -1,4 +1,5 @@
 from django.db import models
+from eyecare.uploads import ShardedUploadTo
 from users.models import CustomUser
 
 class Article(models.Model):
@@ -13,7 +14,7 @@ class Article(models.Model):
     content = models.TextField()
     author = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     category = models.CharField(max_length=20, choices=CATEGORY_CHOICES)
-    image = models.ImageField(upload_to='articles/', blank=True, null=True)
+    image = models.ImageField(upload_to=ShardedUploadTo('articles/'), blank=True, null=True)
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
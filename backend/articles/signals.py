@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from eyecare.uploads import delete_file_on_commit
+from .models import Article
+
+
+@receiver(post_delete, sender=Article)
+def delete_article_image(sender, instance, **kwargs):
+    delete_file_on_commit(instance, 'image')
@@ -1,8 +1,10 @@
 from rest_framework import viewsets, permissions
+from eyecare.db_router import ReplicaReadMixin
+from eyecare.fastlist import FastListMixin
 from .models import Article
 from .serializers import ArticleSerializer
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(FastListMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = ArticleSerializer
     permission_classes = [permissions.AllowAny]
     
@@ -0,0 +1,76 @@
+"""
+Admin changelist cost on a large table: the stock ModelAdmin against
+ConsultationAdmin with eyecare.admin.PerformanceAdminMixin, for the first
+page, a deep page reached by ?p= and the same depth reached by ?cursor=.
+
+    python benchmarks/admin_bench.py [--rows 200000] [--repeat 5]
+
+Seeds the same throwaway database as render_bench.py and renders each page
+through the admin site, templates included, as a superuser.
+"""
+import argparse
+import base64
+import json
+import time
+
+from render_bench import setup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    setup(args.rows)
+    print(f"Seeded {args.rows} consultations in {time.perf_counter() - started:.1f}s")
+
+    from django.contrib import admin
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+    from consultations.admin import ConsultationAdmin
+    from consultations.models import Consultation
+    from users.models import CustomUser
+
+    class StockAdmin(admin.ModelAdmin):
+        list_display = ConsultationAdmin.list_display
+        list_filter = ('status', 'scheduled_date', 'specialist')
+        search_fields = ConsultationAdmin.search_fields
+
+    superuser = CustomUser.objects.create_superuser('root', 'root@example.com', None, user_type='admin')
+    factory = RequestFactory()
+    per_page = ConsultationAdmin.list_per_page
+    depth = args.rows // 2
+    deep_page = depth // per_page + 1
+    boundary = Consultation.objects.order_by('-pk').values_list('pk', flat=True)[(deep_page - 1) * per_page - 1]
+    cursor = base64.urlsafe_b64encode(json.dumps([str(boundary)]).encode()).decode().rstrip('=')
+
+    def render(model_admin, query):
+        request = factory.get('/admin/consultations/consultation/' + query)
+        request.user = superuser
+        request.session = {}
+        request._messages = []
+        response = model_admin.changelist_view(request)
+        response.render()
+        return response
+
+    pages = [('first page', ''), (f'?p={deep_page}', f'?p={deep_page}'), ('same depth, ?cursor=', f'?cursor={cursor}')]
+    for label, model_admin in (('stock ModelAdmin', StockAdmin(Consultation, admin.site)),
+                               ('ConsultationAdmin', ConsultationAdmin(Consultation, admin.site))):
+        print(label)
+        for name, query in pages:
+            if query.startswith('?cursor') and label == 'stock ModelAdmin':
+                continue
+            render(model_admin, query)
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                for _ in range(args.repeat):
+                    render(model_admin, query)
+                elapsed = (time.perf_counter() - start) / args.repeat * 1000
+            print(f"  {name:>22}: {elapsed:8.1f} ms  {len(queries) // args.repeat:3d} queries")
+
+
+if __name__ == '__main__':
+    main()
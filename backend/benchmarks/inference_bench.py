@@ -0,0 +1,141 @@
+"""
+Throughput and accuracy of the NumPy scan classifier runtime, float32 versus
+int8-quantized weights.
+
+    python benchmarks/inference_bench.py [--size 96] [--per-class 60] [--seconds 3]
+
+There is no labelled scan dataset in the repo, so the benchmark makes one:
+the sample photos in media/eye_scans are colour-cast, cropped, flipped and
+brightness-jittered into one class per condition. A fixed random conv
+stack provides features and the final dense layer is fitted by ridge
+regression, which gives a classifier with real (if easy) accuracy to compare
+before and after quantization. Both versions go through the model registry
+in a throwaway ML_MODEL_DIR.
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LABELS = ['cataract', 'redness', 'dryness', 'glaucoma', 'conjunctivitis', 'normal']
+TINTS = [(1.15, 1.15, 1.2), (1.35, 0.85, 0.85), (1.0, 1.0, 0.8), (0.8, 0.95, 1.2), (1.25, 0.8, 1.05), (1.0, 1.0, 1.0)]
+
+
+def django_setup():
+    os.environ['ML_MODEL_DIR'] = tempfile.mkdtemp(prefix='eyecare-models-')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eyecare.settings')
+    sys.path.insert(0, BACKEND)
+    import django
+    django.setup()
+
+
+def make_dataset(size, per_class, rng):
+    import numpy as np
+    from PIL import Image
+
+    photos = [np.asarray(Image.open(path).convert('RGB'), dtype=np.float32) / 255
+              for path in sorted(glob.glob(os.path.join(BACKEND, 'media', 'eye_scans', '*.jpg')))]
+    images, labels = [], []
+    for label, tint in enumerate(TINTS):
+        for _ in range(per_class):
+            photo = photos[rng.integers(len(photos))]
+            h, w, _ = photo.shape
+            crop = int(min(h, w) * rng.uniform(0.6, 1.0))
+            y, x = rng.integers(0, h - crop + 1), rng.integers(0, w - crop + 1)
+            patch = Image.fromarray((photo[y:y + crop, x:x + crop] * 255).astype(np.uint8)).resize((size, size))
+            pixels = np.asarray(patch, dtype=np.float32) / 255
+            if rng.random() < 0.5:
+                pixels = pixels[:, ::-1]
+            pixels = np.clip(pixels * np.array(tint, np.float32) * rng.uniform(0.8, 1.2), 0, 1)
+            images.append(pixels)
+            labels.append(label)
+    order = rng.permutation(len(images))
+    return np.stack(images)[order], np.array(labels)[order]
+
+
+def build(size, train_x, train_y, rng):
+    """Random conv features + a ridge-regression dense layer, as registry tensors + meta"""
+    import numpy as np
+    from scans.ml import runtime
+
+    meta = {
+        'input_size': size, 'labels': LABELS, 'mean': [0.5, 0.5, 0.5], 'std': [0.25, 0.25, 0.25],
+        'layers': [
+            {'op': 'conv', 'name': 'conv1', 'stride': 1, 'pad': 1}, {'op': 'relu'}, {'op': 'maxpool', 'size': 2},
+            {'op': 'conv', 'name': 'conv2', 'stride': 1, 'pad': 1}, {'op': 'relu'}, {'op': 'maxpool', 'size': 2},
+            {'op': 'conv', 'name': 'conv3', 'stride': 1, 'pad': 1}, {'op': 'relu'}, {'op': 'maxpool', 'size': 2},
+            {'op': 'gap'},
+            {'op': 'dense', 'name': 'fc'},
+        ],
+    }
+    tensors = {}
+    for name, cin, cout in (('conv1', 3, 16), ('conv2', 16, 32), ('conv3', 32, 64)):
+        tensors[f'{name}.weight'] = (rng.standard_normal((3, 3, cin, cout)) * np.sqrt(2 / (9 * cin))).astype(np.float32)
+        tensors[f'{name}.bias'] = np.zeros(cout, np.float32)
+
+    x = (train_x - 0.5) / 0.25
+    for name in ('conv1', 'conv2', 'conv3'):
+        x = runtime.maxpool2d(np.maximum(runtime.conv2d(x, tensors[f'{name}.weight'], tensors[f'{name}.bias'], 1, 1), 0))
+    features = x.mean(axis=(1, 2))
+    mean, std = features.mean(axis=0), features.std(axis=0) + 1e-6
+    z = np.hstack([(features - mean) / std, np.ones((len(features), 1), np.float32)])
+    targets = np.eye(len(LABELS), dtype=np.float32)[train_y] * 8 - 4
+    solution = np.linalg.solve(z.T @ z + 1.0 * np.eye(z.shape[1]), z.T @ targets)
+    # Fold the feature standardisation into the dense layer
+    weight = solution[:-1] / std[:, None]
+    tensors['fc.weight'] = weight.astype(np.float32)
+    tensors['fc.bias'] = (solution[-1] - mean @ weight).astype(np.float32)
+    return tensors, meta
+
+
+def throughput(network, batch, seconds):
+    done, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        network.forward(batch.copy())
+        done += len(batch)
+    return done / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=96)
+    parser.add_argument('--per-class', type=int, default=60)
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+
+    django_setup()
+    import numpy as np
+    from scans.ml import registry, runtime
+
+    rng = np.random.default_rng(0)
+    images, labels = make_dataset(args.size, args.per_class, rng)
+    split = len(images) * 2 // 3
+    tensors, meta = build(args.size, images[:split], labels[:split], rng)
+    registry.save_model('bench', 'float32', tensors, meta=meta, activate_now=False)
+    registry.save_model('bench', 'int8', runtime.quantize(tensors, meta), meta=meta, activate_now=False)
+
+    test_x = (images[split:] - 0.5) / 0.25
+    test_y = labels[split:]
+    predictions = {}
+    print(f'{args.size}x{args.size} input, {len(test_y)} held-out images')
+    for version in ('float32', 'int8'):
+        model = registry.LoadedModel('bench', version)
+        network = runtime.Network(model)
+        probs = network.forward(test_x.copy())
+        predictions[version] = probs
+        accuracy = (probs.argmax(axis=1) == test_y).mean()
+        single = throughput(network, test_x[:1], args.seconds)
+        batched = throughput(network, test_x[:32], args.seconds)
+        print(f'  {version:<8} {model.nbytes / 1024:7.1f} KB  accuracy {accuracy:6.1%}  '
+              f'{single:7.1f} img/s (batch 1)  {batched:7.1f} img/s (batch 32)')
+
+    agree = (predictions['float32'].argmax(axis=1) == predictions['int8'].argmax(axis=1)).mean()
+    drift = np.abs(predictions['float32'] - predictions['int8']).max()
+    print(f'  int8 vs float32: top-1 agreement {agree:.1%}, max probability difference {drift:.4f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Time list serialization through the ModelSerializers (as the views query,
+and with the joins a hand-tuned queryset would add) versus the
+eyecare.fastlist path, per row and including the queries.
+
+    python benchmarks/list_bench.py [--rows 500] [--repeat 10]
+
+Seeds the same throwaway database as render_bench.py. Each pass starts from
+the view's queryset, as the list endpoints do, and the two outputs are
+checked to render to identical JSON.
+"""
+import argparse
+import time
+
+from render_bench import setup
+
+
+def cases():
+    from articles.models import Article
+    from articles.serializers import ArticleSerializer
+    from consultations.models import Consultation
+    from consultations.serializers import ConsultationSerializer
+    from scans.models import EyeScan, ScanReview
+    from scans.serializers import EyeScanSerializer, ScanReviewSerializer
+
+    # (serializer, the view's queryset, relations a hand-tuned queryset would join)
+    return [
+        (EyeScanSerializer, lambda: EyeScan.objects.order_by('-created_at'), ('user', 'scanreview__specialist')),
+        (ScanReviewSerializer, lambda: ScanReview.objects.order_by('pk'), ('specialist',)),
+        (ConsultationSerializer, lambda: Consultation.objects.order_by('-created_at'), ('user', 'specialist')),
+        (ArticleSerializer, lambda: Article.objects.order_by('-created_at'), ('author',)),
+    ]
+
+
+def seed_articles(rows):
+    from articles.models import Article
+    from users.models import CustomUser
+    author = CustomUser.objects.get(username='doc')
+    Article.objects.bulk_create([
+        Article(title=f'Screen time and dry eyes {i}', content='Follow the 20-20-20 rule. ' * 40, author=author,
+                category='prevention', image=f'articles/cover_{i}.jpg', is_published=True)
+        for i in range(rows)
+    ])
+
+
+def timed(fn, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.process_time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    setup(args.rows)
+    seed_articles(args.rows)
+    from rest_framework.renderers import JSONRenderer
+    from eyecare.fastlist import compile_serializer
+
+    render = JSONRenderer().render
+    context = {'request': None}
+    print(f'{"us per row":<24} {"serializer":>10} {"+joins":>8} {"fast":>8}')
+    for serializer_class, queryset, related in cases():
+        rows = queryset().count()
+        slow, slow_s = timed(lambda: serializer_class(queryset(), many=True, context=context).data, args.repeat)
+        _, joined_s = timed(lambda: serializer_class(queryset().select_related(*related), many=True,
+                                                     context=context).data, args.repeat)
+        fast, fast_s = timed(lambda: compile_serializer(serializer_class(context=context))(queryset()), args.repeat)
+        assert render(slow) == render(fast), serializer_class.__name__
+        print(f'{serializer_class.__name__:<24} {slow_s / rows * 1e6:10.1f} {joined_s / rows * 1e6:8.1f} '
+              f'{fast_s / rows * 1e6:8.1f}  ({joined_s / fast_s:.1f}x vs +joins)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Upload housekeeping at scale: shard_media moving a flat eye_scans/
+directory into the sharded layout, then collect_orphan_media diffing the
+tree against the database, with its peak Python memory.
+
+    python benchmarks/media_gc_bench.py [--rows 20000] [--orphans 0.1]
+
+Seeds the same throwaway database as render_bench.py, writes a small file
+for every scan (plus a share of unreferenced ones) into a temporary
+MEDIA_ROOT, and reports a random stat() in each layout.
+"""
+import argparse
+import io
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from render_bench import setup
+
+
+def stat_time(paths, repeat=2000):
+    sample = random.Random(0).choices(paths, k=repeat)
+    started = time.perf_counter()
+    for path in sample:
+        os.stat(path)
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--orphans', type=float, default=0.1, help="Unreferenced files, as a share of rows")
+    args = parser.parse_args()
+
+    setup(args.rows)
+    from django.core.management import call_command
+    from django.test import override_settings
+    from scans.models import EyeScan
+
+    media = tempfile.mkdtemp(prefix='eyecare-media-')
+    os.makedirs(os.path.join(media, 'eye_scans'))
+    old = time.time() - 7 * 86400
+    names = list(EyeScan.objects.values_list('image', flat=True))
+    names += [f'eye_scans/orphan_{i}.jpg' for i in range(int(args.rows * args.orphans))]
+    for i, name in enumerate(names):
+        path = os.path.join(media, name)
+        with open(path, 'wb') as f:
+            f.write(i.to_bytes(8, 'little') * 64)
+        os.utime(path, (old, old))
+    print(f"Wrote {len(names)} files, {len(names) - args.rows} unreferenced")
+    print(f"  stat() in a flat directory: {stat_time([os.path.join(media, n) for n in names]):.1f} us")
+
+    with override_settings(MEDIA_ROOT=media):
+        started = time.perf_counter()
+        call_command('shard_media', stdout=io.StringIO())
+        print(f"shard_media: {time.perf_counter() - started:.1f}s")
+        sharded = [os.path.join(media, n) for n in EyeScan.objects.values_list('image', flat=True)]
+        print(f"  stat() in the sharded layout: {stat_time(sharded):.1f} us")
+
+        out = io.StringIO()
+        tracemalloc.start()
+        started = time.perf_counter()
+        call_command('collect_orphan_media', '--delete', stdout=out)
+        elapsed = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"collect_orphan_media: {elapsed:.1f}s, peak {peak / 2 ** 20:.1f} MB")
+        print('  ' + out.getvalue().strip().replace('\n', '\n  '))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Per-worker memory and load time for model weights: memory-mapped through
+scans.ml.registry versus each worker reading its own copy.
+
+    python benchmarks/model_memory.py [--workers 4] [--mb 128]
+
+A synthetic model of --mb megabytes is written to a throwaway ML_MODEL_DIR.
+Each worker is a separate process that loads the model, touches every weight
+(as a forward pass would) and reports its RSS and PSS. PSS splits shared
+pages between the processes mapping them, so its sum is the real cost of the
+pool.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def django_setup(model_dir):
+    os.environ['ML_MODEL_DIR'] = model_dir
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eyecare.settings')
+    sys.path.insert(0, BACKEND)
+    import django
+    django.setup()
+
+
+def memory_kb():
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                values[parts[0][:-1].lower()] = int(parts[1])
+    return values
+
+
+def worker(model_dir, mode, start, results):
+    django_setup(model_dir)
+    import numpy as np
+    from scans.ml import registry
+
+    start.wait()
+    before = memory_kb()
+    started = time.perf_counter()
+    if mode == 'memmap':
+        tensors = registry.get_model('bench').tensors
+    else:
+        # What a per-worker np.load() of the same weights costs
+        path = os.path.join(registry.model_dir('bench'), registry.current_version('bench'))
+        with open(os.path.join(path, registry.MANIFEST)) as f:
+            manifest = json.load(f)
+        tensors = {key: np.fromfile(os.path.join(path, registry.WEIGHTS), dtype=entry['dtype'],
+                                    count=int(np.prod(entry['shape'])), offset=entry['offset'])
+                   for key, entry in manifest['tensors'].items()}
+    load_ms = (time.perf_counter() - started) * 1000
+    checksum = sum(float(array.sum(dtype=np.float64)) for array in tensors.values())
+    after = memory_kb()
+    # Wait for every worker to finish touching pages so PSS reflects the pool
+    start.wait()
+    results.put({'load_ms': load_ms, 'rss_mb': (after['rss'] - before['rss']) / 1024,
+                 'pss_mb': memory_kb()['pss'] / 1024, 'checksum': checksum})
+    start.wait()
+
+
+def run(model_dir, mode, workers):
+    start = multiprocessing.Barrier(workers + 1)
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=worker, args=(model_dir, mode, start, results)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    start.wait()
+    start.wait()
+    rows = [results.get() for _ in procs]
+    start.wait()
+    for proc in procs:
+        proc.join()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--mb', type=int, default=128)
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp(prefix='eyecare-models-')
+    django_setup(model_dir)
+    import numpy as np
+    from scans.ml import registry
+
+    rng = np.random.default_rng(0)
+    per_tensor = args.mb * 1024 * 1024 // 4 // 8
+    registry.save_model('bench', 'v1', {f'layer{i}': rng.standard_normal(per_tensor, dtype=np.float32)
+                                        for i in range(8)})
+    print(f'{args.mb} MB model, {args.workers} workers')
+    for mode in ('copy', 'memmap'):
+        rows = run(model_dir, mode, args.workers)
+        print(f'  {mode:<7} load {sum(r["load_ms"] for r in rows) / len(rows):8.1f} ms/worker  '
+              f'RSS +{sum(r["rss_mb"] for r in rows) / len(rows):6.1f} MB/worker  '
+              f'PSS total {sum(r["pss_mb"] for r in rows):7.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Render and compress scan and consultation list payloads: DRF's JSONRenderer
+versus eyecare.renderers.ORJSONRenderer, then gzip versus Brotli on the
+result, as eyecare.compression would send it.
+
+    python benchmarks/render_bench.py [--rows 500] [--repeat 20]
+
+A throwaway SQLite database is migrated and seeded for the run; the project
+database is never touched. Serializer output is built once per payload so
+only rendering and compression are timed.
+"""
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup(rows):
+    os.environ['SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='eyecare-render-'), 'bench.sqlite3')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eyecare.settings')
+    sys.path.insert(0, BACKEND)
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.utils import timezone
+    from consultations.models import Consultation
+    from scans.models import EyeScan, ScanReview
+    from users.models import CustomUser
+
+    call_command('migrate', verbosity=0)
+    patient = CustomUser.objects.create_user('bench', 'bench@example.com', None, user_type='user',
+                                             first_name='Bench', last_name='Patient', phone_number='+254700000000')
+    doctor = CustomUser.objects.create_user('doc', 'doc@example.com', None, user_type='specialist',
+                                            first_name='Amina', last_name='Odhiambo',
+                                            specialization='Retina')
+    scans = EyeScan.objects.bulk_create([
+        EyeScan(user=patient, image=f'eye_scans/bench_{i}.jpg', condition_detected='cataract',
+                confidence_score=0.87, is_reviewed=i % 2 == 0,
+                recommendations='Consult an ophthalmologist. Consider cataract surgery evaluation.')
+        for i in range(rows)
+    ])
+    ScanReview.objects.bulk_create([
+        ScanReview(scan=scan, specialist=doctor, diagnosis='Early nuclear cataract, right eye.',
+                   recommendations='Review in six months; UV protection outdoors.')
+        for scan in scans if scan.is_reviewed
+    ])
+    Consultation.objects.bulk_create([
+        Consultation(user=patient, specialist=doctor, scan=scans[i], scheduled_date=timezone.now(),
+                     description='Blurred vision in the evenings, worse when driving.', status='scheduled')
+        for i in range(rows)
+    ])
+
+
+def payloads():
+    from consultations.models import Consultation
+    from consultations.serializers import ConsultationSerializer
+    from scans.models import EyeScan
+    from scans.serializers import EyeScanSerializer
+
+    scans = EyeScan.objects.select_related('user', 'scanreview__specialist')
+    consultations = Consultation.objects.select_related('user', 'specialist')
+    return {
+        'EyeScanSerializer': EyeScanSerializer(scans, many=True, context={'request': None}).data,
+        'ConsultationSerializer': ConsultationSerializer(consultations, many=True).data,
+    }
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup(args.rows)
+    import brotli
+    from django.conf import settings
+    from rest_framework.renderers import JSONRenderer
+    from eyecare.renderers import ORJSONRenderer
+
+    for name, data in payloads().items():
+        print(f'{name} x {args.rows}')
+        body = None
+        for renderer in (JSONRenderer(), ORJSONRenderer()):
+            body, ms = timed(lambda: renderer.render(data), args.repeat)
+            print(f'  {type(renderer).__name__:<16} {ms:8.2f} ms  {len(body):>9} bytes')
+        gz, ms = timed(lambda: gzip.compress(body, compresslevel=6), args.repeat)
+        print(f'  {"gzip -6":<16} {ms:8.2f} ms  {len(gz):>9} bytes')
+        quality = settings.COMPRESSION_BROTLI_QUALITY
+        br, ms = timed(lambda: brotli.compress(body, quality=quality), args.repeat)
+        print(f'  {f"brotli q{quality}":<16} {ms:8.2f} ms  {len(br):>9} bytes')
+
+
+if __name__ == '__main__':
+    main()
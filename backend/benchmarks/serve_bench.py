@@ -0,0 +1,136 @@
+"""
+Compare `manage.py runserver` with the gunicorn profile on the scan list and
+login endpoints.
+
+    python benchmarks/serve_bench.py [--requests 400] [--concurrency 16] [--scans 200]
+
+A throwaway SQLite database is created and seeded for the run; the project
+database is never touched. Each server is started in turn on a free port,
+warmed up, then hit by a thread pool of clients. Reports throughput and
+p50/p99 latency per endpoint.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'bench-Password-1'
+
+SEED = """
+from scans.models import EyeScan
+from users.models import CustomUser
+user = CustomUser.objects.create_user('bench', 'bench@example.com', {password!r}, user_type='user',
+                                      first_name='Bench', last_name='Patient')
+EyeScan.objects.bulk_create([
+    EyeScan(user=user, image=f'eye_scans/bench_{{i}}.jpg', condition_detected='normal',
+            confidence_score=0.9, recommendations='Maintain regular eye checkups.')
+    for i in range({scans})
+])
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(port, path, data=None, token=None):
+    headers = {'X-Forwarded-Proto': 'https', 'Content-Type': 'application/json'}
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(f'http://127.0.0.1:{port}{path}', data=body, headers=headers)
+    started = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=60) as response:
+        payload = response.read()
+    return time.perf_counter() - started, payload
+
+
+def wait_until_up(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            request(port, '/health/')
+            return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def run_load(port, path, count, concurrency, data=None, token=None):
+    def one(_):
+        return request(port, path, data, token)[0]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = sorted(pool.map(one, range(count)))
+    elapsed = time.perf_counter() - started
+    return {
+        'rps': count / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def bench_server(name, command, env, args):
+    port = free_port()
+    command = [part.replace('{port}', str(port)) for part in command]
+    env = dict(env, PORT=str(port))
+    process = subprocess.Popen(command, cwd=BACKEND, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(port)
+        _, payload = request(port, '/api/auth/login/', {'username': 'bench', 'password': PASSWORD})
+        token = json.loads(payload)['access']
+        run_load(port, '/api/scans/scans/', 20, 4, token=token)  # warm-up
+        results = {
+            'scan list': run_load(port, '/api/scans/scans/', args.requests, args.concurrency, token=token),
+            'login': run_load(port, '/api/auth/login/', max(args.requests // 8, 10), args.concurrency,
+                              data={'username': 'bench', 'password': PASSWORD}),
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+    for endpoint, stats in results.items():
+        print(f"{name:<12} {endpoint:<10} {stats['rps']:8.1f} req/s  "
+              f"p50 {stats['p50_ms']:7.1f} ms  p99 {stats['p99_ms']:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--scans', type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='eyecare-bench-')
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE='eyecare.settings',
+        SQLITE_PATH=os.path.join(workdir, 'bench.sqlite3'),
+        DEBUG='False',
+        THROTTLE_LOGIN_IP='100000/min',
+        THROTTLE_LOGIN_USERNAME='100000/min',
+    )
+    manage = [sys.executable, 'manage.py']
+    subprocess.run(manage + ['migrate', '--noinput', '-v', '0'], cwd=BACKEND, env=env, check=True)
+    seed = SEED.format(password=PASSWORD, scans=args.scans)
+    subprocess.run(manage + ['shell', '-c', seed], cwd=BACKEND, env=env, check=True)
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.scans} scans, {os.cpu_count()} CPUs")
+    bench_server('runserver', manage + ['runserver', '--noreload', '127.0.0.1:{port}'], env, args)
+    bench_server('gunicorn', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'eyecare.wsgi'],
+                 env, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Similar-case index: build time, query latency and recall at scale.
+
+    python benchmarks/similarity_bench.py [--rows 1000000] [--dim 64] [--queries 200] [--k 10]
+
+Writes --rows synthetic unit vectors (clustered, like real embeddings) into a
+throwaway SIMILARITY_INDEX_DIR with scans.similarity.write_build, then times
+searches through the IVF index at a few nprobe values against an exact
+blocked brute-force scan of the same float16 rows. Recall@k is the share of
+the exact top k the IVF search also returns.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def django_setup(index_dir):
+    os.environ['SIMILARITY_INDEX_DIR'] = index_dir
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eyecare.settings')
+    sys.path.insert(0, BACKEND)
+    import django
+    django.setup()
+
+
+def synthetic(rows, dim, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(max(rows // 500, 1), dim)).astype(np.float32)
+    vectors = np.empty((rows, dim), np.float32)
+    for start in range(0, rows, 100000):
+        stop = min(start + 100000, rows)
+        vectors[start:stop] = centres[rng.integers(len(centres), size=stop - start)]
+        vectors[start:stop] += rng.normal(scale=0.6, size=(stop - start, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def timed(fn, queries):
+    times, results = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(fn(query))
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    return results, statistics.median(times), times[int(len(times) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--dim', type=int, default=64)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        django_setup(index_dir)
+        import numpy as np
+        from scans import similarity
+
+        vectors = synthetic(args.rows, args.dim)
+        ids = np.arange(1, args.rows + 1)
+        started = time.perf_counter()
+        build = similarity.write_build(index_dir, 'bench', vectors, ids)
+        build_s = time.perf_counter() - started
+        index = similarity.get_index()
+        size_mb = sum(os.path.getsize(os.path.join(build, f)) for f in os.listdir(build)) / 2 ** 20
+        print(f"{args.rows} x {args.dim} rows: built in {build_s:.1f}s, {index.lists} lists, {size_mb:.1f} MB on disk")
+
+        rng = np.random.default_rng(1)
+        queries = vectors[rng.integers(args.rows, size=args.queries)] + rng.normal(scale=0.05, size=(args.queries, args.dim))
+        queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+        def exact(query):
+            scores = np.empty(len(index.vectors), np.float32)
+            for start in range(0, len(scores), similarity.BLOCK_ROWS):
+                scores[start:start + similarity.BLOCK_ROWS] = \
+                    np.asarray(index.vectors[start:start + similarity.BLOCK_ROWS], np.float32) @ query
+            top = np.argpartition(-scores, args.k)[:args.k]
+            return set(index.ids[top].tolist())
+
+        len(index)
+        truth, p50, p95 = timed(exact, queries)
+        print(f"{'brute force':>14}: p50 {p50:8.2f} ms   p95 {p95:8.2f} ms   recall@{args.k} 1.000")
+        for nprobe in (4, 8, 16, 32):
+            found, p50, p95 = timed(lambda q: {i for i, _ in index.search(q, args.k, nprobe=nprobe)}, queries)
+            recall = np.mean([len(f & t) / args.k for f, t in zip(found, truth)])
+            print(f"{'nprobe ' + str(nprobe):>14}: p50 {p50:8.2f} ms   p95 {p95:8.2f} ms   recall@{args.k} {recall:.3f}")
+
+
+if __name__ == '__main__':
+    main()
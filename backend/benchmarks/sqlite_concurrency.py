@@ -0,0 +1,115 @@
+"""
+Concurrent read/write throughput of SQLite with default settings versus the
+tuning profile in eyecare/sqlite.py (SQLITE_TUNING=true).
+
+    python benchmarks/sqlite_concurrency.py [--writers 4] [--readers 4] [--seconds 5]
+
+Writers each insert a scan row and bump a rollup counter in one transaction,
+the same shape as a scan upload. Readers page through the newest 50 scans,
+like the scan list. Every process runs as its own OS process, the way gunicorn
+workers do. Locked-database errors are counted rather than retried.
+"""
+import argparse
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from eyecare.sqlite import TUNING_PRAGMAS  # noqa: E402
+
+SCHEMA = """
+CREATE TABLE scan (id INTEGER PRIMARY KEY, user_id INTEGER, condition TEXT, confidence REAL,
+                   recommendations TEXT, created_at REAL);
+CREATE INDEX scan_user ON scan (user_id, created_at);
+CREATE TABLE rollup (key TEXT PRIMARY KEY, count INTEGER);
+"""
+
+
+def connect(path, tuned):
+    if tuned:
+        conn = sqlite3.connect(path, timeout=20, isolation_level=None)
+        for pragma in TUNING_PRAGMAS:
+            conn.execute(pragma)
+    else:
+        # Django's defaults: 5 s busy timeout, deferred transactions
+        conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    return conn
+
+
+def writer(path, tuned, deadline, results):
+    conn = connect(path, tuned)
+    begin = 'BEGIN IMMEDIATE' if tuned else 'BEGIN'
+    done = errors = 0
+    while time.time() < deadline:
+        try:
+            conn.execute(begin)
+            conn.execute('SELECT count FROM rollup WHERE key = ?', ('normal',)).fetchone()
+            conn.execute('INSERT INTO scan (user_id, condition, confidence, recommendations, created_at) '
+                         'VALUES (?, ?, ?, ?, ?)', (done % 50, 'normal', 0.9, 'x' * 200, time.time()))
+            conn.execute('INSERT INTO rollup (key, count) VALUES (?, 1) '
+                         'ON CONFLICT(key) DO UPDATE SET count = count + 1', ('normal',))
+            conn.execute('COMMIT')
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+    results.put(('write', done, errors))
+
+
+def reader(path, tuned, deadline, results):
+    conn = connect(path, tuned)
+    done = errors = 0
+    while time.time() < deadline:
+        try:
+            conn.execute('SELECT * FROM scan WHERE user_id = ? ORDER BY created_at DESC LIMIT 50',
+                         (done % 50,)).fetchall()
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    results.put(('read', done, errors))
+
+
+def run(tuned, args):
+    path = os.path.join(tempfile.mkdtemp(prefix='eyecare-sqlite-'), 'bench.sqlite3')
+    setup = connect(path, tuned)
+    setup.executescript(SCHEMA)
+    setup.close()
+
+    results = multiprocessing.Queue()
+    deadline = time.time() + args.seconds
+    processes = (
+        [multiprocessing.Process(target=writer, args=(path, tuned, deadline, results)) for _ in range(args.writers)]
+        + [multiprocessing.Process(target=reader, args=(path, tuned, deadline, results)) for _ in range(args.readers)]
+    )
+    for process in processes:
+        process.start()
+    totals = {'write': [0, 0], 'read': [0, 0]}
+    for _ in processes:
+        kind, done, errors = results.get()
+        totals[kind][0] += done
+        totals[kind][1] += errors
+    for process in processes:
+        process.join()
+
+    label = 'tuned' if tuned else 'default'
+    for kind, (done, errors) in totals.items():
+        print(f"{label:<8} {kind:<6} {done / args.seconds:10.1f} ops/s   {errors:6d} locked errors")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds}s, {os.cpu_count()} CPUs")
+    run(False, args)
+    run(True, args)
+
+
+if __name__ == '__main__':
+    main()
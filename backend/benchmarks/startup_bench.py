@@ -0,0 +1,57 @@
+"""
+Cold start: wall time from a fresh interpreter to the first response,
+the way a new gunicorn worker (or a woken free-tier instance) pays it,
+with and without API_ONLY.
+
+    python benchmarks/startup_bench.py [--runs 7] [--path /health/ready/ ...]
+
+Each run is a new process; the median is reported. For where the time
+goes, see `manage.py profile_imports`.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODE = """
+import io, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+ready = time.perf_counter()
+status = []
+application({'REQUEST_METHOD': 'GET', 'PATH_INFO': sys.argv[1], 'QUERY_STRING': '', 'SERVER_NAME': 'localhost',
+             'SERVER_PORT': '443', 'HTTP_HOST': 'localhost', 'wsgi.url_scheme': 'https', 'wsgi.input': io.BytesIO()},
+            lambda s, h, *a: status.append(s))
+done = time.perf_counter()
+print(ready - started, done - started, len(sys.modules), status[0].split()[0])
+"""
+
+
+def run(path, env):
+    out = subprocess.run([sys.executable, '-c', CODE, path], cwd=BACKEND, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()
+    return float(out[0]), float(out[1]), int(out[2]), out[3]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--path', action='append', help="Paths to request (default /health/live/ and /health/ready/)")
+    args = parser.parse_args()
+
+    base = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'eyecare.settings'}
+    for label, extra in (('default', {'API_ONLY': 'false'}), ('API_ONLY=true', {'API_ONLY': 'true'})):
+        for path in args.path or ['/health/live/', '/health/ready/']:
+            results = [run(path, {**base, **extra}) for _ in range(args.runs)]
+            setup = statistics.median(r[0] for r in results) * 1000
+            first = statistics.median(r[1] for r in results) * 1000
+            print(f"{label:14} {path:16} setup {setup:6.0f} ms   first response {first:6.0f} ms   "
+                  f"{results[-1][2]} modules   {results[-1][3]}")
+
+
+if __name__ == '__main__':
+    main()
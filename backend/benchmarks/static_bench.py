@@ -0,0 +1,98 @@
+"""
+Measure the static pipeline: collectstatic cost (cold vs. incremental re-run)
+and bytes on the wire for the admin login page assets per Accept-Encoding.
+
+    python benchmarks/static_bench.py [--storage eyecare.storage.StaticStorage]
+
+Each storage backend is collected into a throwaway STATIC_ROOT in its own
+process, so the project's staticfiles/ is never touched. Pass --storage more
+than once to compare, e.g. against
+django.contrib.staticfiles.storage.StaticFilesStorage.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STORAGES = [
+    'django.contrib.staticfiles.storage.StaticFilesStorage',
+    'eyecare.storage.StaticStorage',
+]
+ENCODINGS = ['identity', 'gzip', 'br']
+
+
+def measure(storage):
+    """Runs inside the child process, after STATIC_ROOT is set."""
+    sys.path.insert(0, BACKEND)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eyecare.settings')
+    import django
+    from django.conf import settings
+    django.setup()
+    settings.STORAGES = {**settings.STORAGES, 'staticfiles': {'BACKEND': storage}}
+    settings.DEBUG = False
+
+    from django.core.management import call_command
+    from django.test import Client
+
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        timings.append(time.perf_counter() - start)
+
+    client = Client(SERVER_NAME='localhost', HTTP_X_FORWARDED_PROTO='https')
+    page = client.get('/admin/login/')
+    assets = sorted(set(re.findall(r'(?:href|src)="(%s[^"]+)"' % re.escape(settings.STATIC_URL),
+                                   page.content.decode())))
+    transfer = {}
+    cache_control = None
+    for encoding in ENCODINGS:
+        total, start = 0, time.perf_counter()
+        for url in assets:
+            response = client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+            total += len(b''.join(response.streaming_content) if response.streaming else response.content)
+            cache_control = response.get('Cache-Control')
+        transfer[encoding] = {'bytes': total, 'ms': round((time.perf_counter() - start) * 1000, 1)}
+    return {
+        'collect_first_s': round(timings[0], 2),
+        'collect_second_s': round(timings[1], 2),
+        'assets': len(assets),
+        'transfer': transfer,
+        'cache_control': cache_control,
+    }
+
+
+def run(storage):
+    with tempfile.TemporaryDirectory() as root:
+        env = {**os.environ, 'STATIC_ROOT': root, 'DEBUG': 'False', 'SQLITE_PATH': os.path.join(root, 'db.sqlite3')}
+        out = subprocess.run([sys.executable, __file__, '--child', storage], env=env, cwd=BACKEND,
+                             check=True, capture_output=True, text=True)
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--storage', action='append')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    for storage in args.storage or DEFAULT_STORAGES:
+        result = run(storage)
+        print(storage)
+        print(f"  collectstatic  first {result['collect_first_s']}s  re-run {result['collect_second_s']}s")
+        print(f"  admin login    {result['assets']} assets, Cache-Control: {result['cache_control']}")
+        for encoding, stats in result['transfer'].items():
+            print(f"    {encoding:<9} {stats['bytes']:>9} bytes  {stats['ms']:>7} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,9 +4,6 @@ set -o errexit
 echo "=== Installing Python dependencies ==="
 pip install -r requirements.txt
 
-echo "=== Making database migrations ==="
-python manage.py makemigrations --noinput
-
 echo "=== Applying database migrations ==="
 python manage.py migrate --noinput
 
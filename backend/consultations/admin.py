@@ -1,12 +1,16 @@
 from django.contrib import admin
+from eyecare.admin import PerformanceAdminMixin, StaffRelatedFieldListFilter
 from .models import Consultation
 
 @admin.register(Consultation)
-class ConsultationAdmin(admin.ModelAdmin):
+class ConsultationAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'user', 'specialist', 'status', 'scheduled_date', 'created_at')
-    list_filter = ('status', 'scheduled_date')
+    list_filter = ('status', 'scheduled_date', ('specialist', StaffRelatedFieldListFilter))
+    list_select_related = ('user', 'specialist')
     search_fields = ('user__username', 'specialist__username', 'description')
-    readonly_fields = ('created_at',)
+    readonly_fields = ('created_at', 'completed_at')
+    autocomplete_fields = ('user', 'specialist')
+    raw_id_fields = ('scan',)
     
     fieldsets = (
         ('Consultation Information', {
@@ -16,7 +20,7 @@ class ConsultationAdmin(admin.ModelAdmin):
             'fields': ('scheduled_date',)
         }),
         ('Timestamps', {
-            'fields': ('created_at',),
+            'fields': ('created_at', 'completed_at'),
             'classes': ('collapse',)
         }),
     )
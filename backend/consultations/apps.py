@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class ConsultationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'consultations'
+
+    def ready(self):
+        # Keep specialist workload counters in step with consultation changes
+        from . import signals  # noqa: F401
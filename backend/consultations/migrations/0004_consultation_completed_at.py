@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultations', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultation',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
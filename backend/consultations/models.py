@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from users.models import CustomUser
 
 class Consultation(models.Model):
@@ -16,6 +17,15 @@ class Consultation(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     scheduled_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
     
+    def save(self, *args, **kwargs):
+        # Completed consultations always carry the time they were completed
+        if self.status == 'completed' and self.completed_at is None:
+            self.completed_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'completed_at'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"Consultation {self.id} - {self.user.username} with {self.specialist.username}"
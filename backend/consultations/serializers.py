@@ -17,6 +17,8 @@ class ConsultationCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Consultation
         fields = ('specialist', 'scan', 'description', 'scheduled_date')
+        # Left out, the least-loaded specialist is assigned (users/workload.py)
+        extra_kwargs = {'specialist': {'required': False}}
     
     def validate_specialist(self, value):
         # Ensure the selected user is actually a specialist
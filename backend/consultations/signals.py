@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.workload import OPEN_CONSULTATION_STATUSES, move
+from .models import Consultation
+
+
+def _owner(specialist_id, status):
+    """The specialist an open consultation counts against, or None once it is closed"""
+    return specialist_id if status in OPEN_CONSULTATION_STATUSES else None
+
+
+@receiver(pre_save, sender=Consultation)
+def remember_workload_owner(sender, instance, **kwargs):
+    instance._workload_old_owner = None
+    if instance.pk is None or kwargs.get('raw'):
+        return
+    old = Consultation.objects.filter(pk=instance.pk).values_list('specialist_id', 'status').first()
+    if old:
+        instance._workload_old_owner = _owner(*old)
+
+
+@receiver(post_save, sender=Consultation)
+def update_workload(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    move('consultations', getattr(instance, '_workload_old_owner', None),
+         _owner(instance.specialist_id, instance.status))
+
+
+@receiver(post_delete, sender=Consultation)
+def release_workload(sender, instance, **kwargs):
+    move('consultations', _owner(instance.specialist_id, instance.status), None)
@@ -1,13 +1,19 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from django.core.mail import send_mail
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from eyecare.db_router import ReplicaReadMixin
+from eyecare.fastlist import FastListMixin
 from .models import Consultation
 from .serializers import ConsultationSerializer, ConsultationCreateSerializer
 from users.models import CustomUser  # Import your user model
+from users import workload
 
-class ConsultationViewSet(viewsets.ModelViewSet):
+class ConsultationViewSet(FastListMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'create':
             return ConsultationCreateSerializer
@@ -29,7 +35,15 @@ class ConsultationViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         # Automatically set the user to the current patient
-        consultation = serializer.save(user=self.request.user)
+        with transaction.atomic():
+            if 'specialist' in serializer.validated_data:
+                consultation = serializer.save(user=self.request.user)
+            else:
+                # No specialist chosen: route to the least-loaded one
+                specialist_id = workload.pick()
+                if specialist_id is None:
+                    raise ValidationError({'specialist': 'No specialist is available right now.'})
+                consultation = serializer.save(user=self.request.user, specialist_id=specialist_id)
         
         # Send notification email to specialist
         self.send_consultation_notification(consultation)
@@ -99,6 +113,7 @@ EyeCare Vision AI Team
             )
         
         consultation.status = 'completed'
+        consultation.completed_at = timezone.now()
         consultation.save()
         return Response(ConsultationSerializer(consultation).data)
     
@@ -1,10 +1,13 @@
 from django.contrib import admin
+from eyecare.admin import PerformanceAdminMixin, StaffRelatedFieldListFilter
 from .models import ContactMessage
 
 @admin.register(ContactMessage)
-class ContactMessageAdmin(admin.ModelAdmin):
+class ContactMessageAdmin(PerformanceAdminMixin, admin.ModelAdmin):
     list_display = ('subject', 'name', 'email', 'status', 'assigned_to', 'created_at')
-    list_filter = ('status', 'created_at', 'assigned_to')
+    list_filter = ('status', 'created_at', ('assigned_to', StaffRelatedFieldListFilter))
+    list_select_related = ('assigned_to',)
+    autocomplete_fields = ('assigned_to',)
     search_fields = ('name', 'email', 'subject', 'message')
     readonly_fields = ('created_at', 'updated_at')
     
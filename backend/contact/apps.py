@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ContactConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'contact'
+
+    def ready(self):
+        # Keep specialist workload counters in step with message assignment
+        from . import signals  # noqa: F401
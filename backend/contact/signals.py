@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from users.workload import OPEN_MESSAGE_STATUSES, move
+from .models import ContactMessage
+
+
+def _owner(assigned_to_id, status):
+    """The user an unresolved message counts against, if it is assigned"""
+    return assigned_to_id if status in OPEN_MESSAGE_STATUSES else None
+
+
+@receiver(pre_save, sender=ContactMessage)
+def remember_workload_owner(sender, instance, **kwargs):
+    instance._workload_old_owner = None
+    if instance.pk is None or kwargs.get('raw'):
+        return
+    old = ContactMessage.objects.filter(pk=instance.pk).values_list('assigned_to_id', 'status').first()
+    if old:
+        instance._workload_old_owner = _owner(*old)
+
+
+@receiver(post_save, sender=ContactMessage)
+def update_workload(sender, instance, **kwargs):
+    if kwargs.get('raw'):
+        return
+    move('messages', getattr(instance, '_workload_old_owner', None),
+         _owner(instance.assigned_to_id, instance.status))
+
+
+@receiver(post_delete, sender=ContactMessage)
+def release_workload(sender, instance, **kwargs):
+    move('messages', _owner(instance.assigned_to_id, instance.status), None)
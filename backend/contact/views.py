@@ -1,3 +1,4 @@
+import functools
 import logging
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view
@@ -5,6 +6,9 @@ from rest_framework.response import Response
 from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from users import workload
+from users.throttling import ContactIPThrottle
 from .models import ContactMessage
 from .serializers import ContactMessageSerializer, ContactMessageCreateSerializer
 
@@ -13,6 +17,15 @@ logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+
+@functools.cache
+def resend_client():
+    """The resend module with its API key set; imported on the first email, not at startup"""
+    import resend
+    resend.api_key = settings.RESEND_API_KEY
+    return resend
+
+
 class IsAdminOrSpecialist(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and (
@@ -29,6 +42,11 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         else:
             return [permissions.IsAuthenticated()]
     
+    def get_throttles(self):
+        if self.action == 'create':
+            return [ContactIPThrottle()]
+        return super().get_throttles()
+
     def get_serializer_class(self):
         logger.info(f"📄 get_serializer_class called for action: {self.action}")
         if self.action == 'create':
@@ -56,8 +74,12 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
             serializer.is_valid(raise_exception=True)
             logger.info("✅ Serializer validation passed")
             
-            # Step 3: Save to database
-            contact_message = serializer.save()
+            # Step 3: Save to database, routed to the least-loaded specialist
+            with transaction.atomic():
+                if settings.CONTACT_AUTO_ASSIGN:
+                    contact_message = serializer.save(assigned_to_id=workload.pick())
+                else:
+                    contact_message = serializer.save()
             logger.info(f"✅ Contact message saved to database - ID: {contact_message.id}")
             logger.info(f"📝 Message details - From: {contact_message.name}, Email: {contact_message.email}, Subject: {contact_message.subject}")
             
@@ -97,9 +119,7 @@ class ContactMessageViewSet(viewsets.ModelViewSet):
         
         try:
             logger.info("=== 📧 EMAIL SENDING PROCESS STARTED ===")
-            import resend
-            # Set API key
-            resend.api_key = settings.RESEND_API_KEY
+            resend = resend_client()
             logger.info("✅ Resend API key configured")
 
             
@@ -204,9 +224,7 @@ def test_email_directly(request):
     logger.info("🧪🧪🧪 TEST EMAIL ENDPOINT CALLED 🧪🧪🧪")
     
     try:
-        import resend
-        # Set API key
-        resend.api_key = settings.RESEND_API_KEY
+        resend = resend_client()
         logger.info("✅ Resend API key configured")
 
         subject = 'TEST: Direct Email from EyeCare Vision AI'
@@ -0,0 +1,162 @@
+"""
+Admin changelists that stay fast on tables with millions of rows.
+
+PerformanceAdminMixin swaps in:
+
+* EstimatedCountPaginator - counts at most ADMIN_EXACT_COUNT_LIMIT rows;
+  past that, PostgreSQL's planner estimate is shown instead of a full
+  COUNT(*) (other databases show the limit as a lower bound). Deep pages
+  select just the primary keys at the offset and then load those rows,
+  so the OFFSET walks an index instead of joined rows.
+* KeysetChangeList - a "Next" link carrying a ?cursor= with the sort key
+  of the last row shown, so paging onwards is an index seek at any depth.
+  Used whenever the ordering is plain model columns ending in the primary
+  key, which is the admin default.
+* show_full_result_count = False, dropping the second unfiltered count.
+
+StaffRelatedFieldListFilter limits user filters to specialists and admins
+instead of listing every account. The trigram_search migrations add the
+pg_trgm indexes that let the admin's icontains searches use an index on
+PostgreSQL.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+CURSOR_VAR = 'cursor'
+
+
+def estimate_count(queryset):
+    """The planner's row estimate for `queryset` on PostgreSQL, otherwise None"""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    estimated = False
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        exact = self.object_list[:limit + 1].count()
+        if exact <= limit:
+            return exact
+        self.estimated = True
+        return max(estimate_count(self.object_list) or 0, exact)
+
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # The count may be an underestimate, so later pages can still have rows
+            if self.count and self.estimated:
+                return int(number)
+            raise
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        if bottom < settings.ADMIN_DEFERRED_JOIN_OFFSET:
+            return super().page(number)
+        ids = list(self.object_list.values_list('pk', flat=True)[bottom:bottom + self.per_page])
+        rows = self.object_list.order_by().in_bulk(ids)
+        return self._get_page([rows[pk] for pk in ids if pk in rows], number, self)
+
+
+class KeysetChangeList(ChangeList):
+    """ChangeList that can continue after a ?cursor= instead of a page offset"""
+
+    def __init__(self, request, *args, **kwargs):
+        # Keep the cursor out of the filters and out of every link built from the params
+        params = request.GET.copy()
+        self.cursor = params.pop(CURSOR_VAR, [None])[-1]
+        request.GET = params
+        self.next_url = None
+        super().__init__(request, *args, **kwargs)
+
+    def keyset_fields(self):
+        """[(field, descending)] for an ordering of local columns ending in the pk, else None"""
+        keys = []
+        for item in self.queryset.query.order_by:
+            if not isinstance(item, str) or '__' in item or '?' in item:
+                return None
+            name = item.lstrip('-')
+            try:
+                field = self.lookup_opts.pk if name == 'pk' else self.lookup_opts.get_field(name)
+            except FieldDoesNotExist:
+                return None
+            if not field.concrete or field.null:
+                return None
+            keys.append((field, item.startswith('-')))
+            if field.primary_key:
+                return keys
+        return None
+
+    def encode_cursor(self, obj, keys):
+        values = [field.value_to_string(obj) for field, _ in keys]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, keys):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+            if len(values) != len(keys):
+                raise ValueError
+            return [field.to_python(value) for (field, _), value in zip(keys, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise IncorrectLookupParameters("Invalid cursor")
+
+    def get_results(self, request):
+        super().get_results(request)
+        keys = self.keyset_fields()
+        if keys is None or (self.show_all and self.can_show_all):
+            if self.cursor:
+                raise IncorrectLookupParameters("Cursor paging needs the default ordering")
+            return
+
+        if self.cursor:
+            # Rows strictly after the cursor in the list's own ordering
+            values = self.decode_cursor(self.cursor, keys)
+            after = Q()
+            for i, (field, descending) in enumerate(keys):
+                step = Q(**{f"{field.attname}__{'lt' if descending else 'gt'}": values[i]})
+                for (earlier, _), value in zip(keys[:i], values[:i]):
+                    step &= Q(**{earlier.attname: value})
+                after |= step
+            rows = list(self.queryset.filter(after)[:self.list_per_page + 1])
+            more = len(rows) > self.list_per_page
+            self.result_list = rows[:self.list_per_page]
+            self.multi_page = True
+        else:
+            self.result_list = list(self.result_list)
+            more = self.multi_page and len(self.result_list) == self.list_per_page
+        if more and self.result_list:
+            cursor = self.encode_cursor(self.result_list[-1], keys)
+            self.next_url = self.get_query_string({CURSOR_VAR: cursor}, [PAGE_VAR])
+
+
+class PerformanceAdminMixin:
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class StaffRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """User filter listing only specialists and admins, not every patient"""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        return field.get_choices(include_blank=False, ordering=ordering,
+                                 limit_choices_to={'user_type__in': ('specialist', 'admin')})
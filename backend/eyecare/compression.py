@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+    'text/',
+)
+
+
+def accepted_encodings(header):
+    """Codings listed in an Accept-Encoding header, minus those with q=0."""
+    codings = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            codings.add(coding.strip().lower())
+    return codings
+
+
+def _brotli_sequence(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Brotli or gzip compression for API and page responses.
+
+    Only text-like content types over COMPRESSION_MIN_SIZE bytes are
+    compressed; images and media are left alone, and WhiteNoise serves its
+    own precompressed static files before this runs. Paths under
+    COMPRESSION_EXCLUDE_PATHS (the endpoints that return tokens) are never
+    compressed, to keep them out of reach of BREACH-style attacks.
+
+    gzip output carries GZipMiddleware's random-length padding. Brotli has
+    no equivalent, so it is only used for requests that carry no
+    credentials, whose responses hold no per-user secrets (signed media
+    URLs, CSRF tokens); everything else gets padded gzip.
+    """
+
+    def process_response(self, request, response):
+        if not self.should_compress(request, response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if (brotli is not None and 'br' in codings and not getattr(response, 'is_async', False)
+                and not self.has_credentials(request)):
+            return self.compress_brotli(response)
+        if 'gzip' in codings:
+            return super().process_response(request, response)
+        return response
+
+    def has_credentials(self, request):
+        return ('HTTP_AUTHORIZATION' in request.META or settings.SESSION_COOKIE_NAME in request.COOKIES
+                or settings.CSRF_COOKIE_NAME in request.COOKIES)
+
+    def should_compress(self, request, response):
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return False
+        if not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        if request.path.startswith(tuple(settings.COMPRESSION_EXCLUDE_PATHS)):
+            return False
+        return response.streaming or len(response.content) >= settings.COMPRESSION_MIN_SIZE
+
+    def compress_brotli(self, response):
+        quality = settings.COMPRESSION_BROTLI_QUALITY
+        if response.streaming:
+            response.streaming_content = _brotli_sequence(response.streaming_content, quality)
+            del response.headers['Content-Length']
+        else:
+            compressed = brotli.compress(response.content, quality=quality)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
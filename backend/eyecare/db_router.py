@@ -0,0 +1,107 @@
+"""
+Read-replica routing for read-heavy list endpoints.
+
+Replicas are any DATABASES aliases named ``replica_*`` (see settings). Reads
+only go to a replica while a view has opted in: viewsets through
+ReplicaReadMixin, function views through ``replica_reads(request)``.
+Everything else, and every write, stays on ``default``.
+
+After a user's successful write, that user is pinned to the primary for
+REPLICA_STICKY_SECONDS, so they read their own writes despite replication
+lag. The pin lives in the default cache, which must be shared (Redis) for
+the pin to hold across workers.
+
+To try it locally with SQLite:
+
+    cp db.sqlite3 replica.sqlite3
+    SQLITE_REPLICA_PATHS=replica.sqlite3 python manage.py runserver
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica_')]
+
+
+def _pin_key(user):
+    return f'db-primary:{user.pk}'
+
+
+def pin_to_primary(user):
+    if user.is_authenticated:
+        cache.set(_pin_key(user), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user):
+    return user.is_authenticated and cache.get(_pin_key(user)) is not None
+
+
+def choose_read_alias(request):
+    """Replica to read from for this request, or None to use the primary"""
+    if request.method not in SAFE_METHODS:
+        return None
+    replicas = replica_aliases()
+    if not replicas or is_pinned(request.user):
+        return None
+    return random.choice(replicas)
+
+
+@contextmanager
+def replica_reads(request):
+    """Route ORM reads inside the block to a replica when the request allows it"""
+    alias = choose_read_alias(request)
+    token = _read_alias.set(alias) if alias else None
+    try:
+        yield alias
+    finally:
+        if token is not None:
+            _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    DRF view mixin: safe requests read from a replica, and successful writes
+    pin the user to the primary.
+
+    The alias is chosen after authentication, so the user lookup itself
+    always hits the primary.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self._replica_token = None
+        super().initial(request, *args, **kwargs)
+        alias = choose_read_alias(request)
+        if alias:
+            self._replica_token = _read_alias.set(alias)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_alias.reset(token)
+            self._replica_token = None
+        elif request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,235 @@
+"""
+Read-only fast path for list endpoints.
+
+A ModelSerializer spends most of a large list building model instances and
+walking each field's get_attribute/to_representation. For serializers made
+of plain model fields, `compile_serializer` turns the field list into
+`values_list()` lookups plus one converter per field, once per request, and
+builds each row's dict straight from the tuple. Nested serializers become
+joins, so lists that used to issue a query per row issue one.
+
+The output is the same as `serializer.data`: same keys in the same order,
+values passed through the same DRF field representation. Anything that
+can't be reproduced that way (method fields, `source='*'`, nullable
+relations in a dotted source, overridden to_representation, many=True
+nesting) makes the compiler return None and the view uses the serializer.
+"""
+from operator import itemgetter
+
+from django.contrib.auth.models import AbstractUser
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.db.models.query import ModelIterable
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+# DRF fields whose to_representation is a plain type conversion
+CONVERTERS = {
+    serializers.CharField: str,
+    serializers.EmailField: str,
+    serializers.SlugField: str,
+    serializers.URLField: str,
+    serializers.IntegerField: int,
+    serializers.FloatField: float,
+    serializers.BooleanField: bool,
+}
+
+# DRF fields whose own to_representation is used as-is on the column value
+BOUND = (
+    serializers.ChoiceField,
+    serializers.DateField,
+    serializers.TimeField,
+    serializers.DecimalField,
+    serializers.UUIDField,
+    serializers.JSONField,
+)
+
+# Model methods used as serializer sources, rebuilt from their columns
+METHODS = {
+    AbstractUser.get_full_name: (('first_name', 'last_name'), lambda first, last: ('%s %s' % (first, last)).strip()),
+}
+
+
+class Unsupported(Exception):
+    pass
+
+
+class _Plan:
+    def __init__(self):
+        self.lookups = []
+        self._index = {}
+
+    def column(self, lookup):
+        if lookup not in self._index:
+            self._index[lookup] = len(self.lookups)
+            self.lookups.append(lookup)
+        return self._index[lookup]
+
+
+def _follow(model, attrs, prefix):
+    """Walk the relations of a dotted source, returning (model, prefix)."""
+    for attr in attrs:
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise Unsupported(attr)
+        # A null relation makes DRF skip the key entirely; not worth mirroring
+        if not (field.many_to_one or field.one_to_one) or not field.concrete or field.null:
+            raise Unsupported(attr)
+        model, prefix = field.related_model, f'{prefix}{attr}__'
+    return model, prefix
+
+
+def _getter(index, convert):
+    if convert is None:
+        return itemgetter(index)
+
+    def get(row):
+        value = row[index]
+        return None if value is None else convert(value)
+    return get
+
+
+def _datetime_converter(field):
+    """DateTimeField.to_representation with the format and timezone looked up once"""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        try:
+            if value.utcoffset() is None:
+                return field.to_representation(value)
+            text = value.astimezone(field_timezone).isoformat()
+        except (AttributeError, OverflowError):
+            return field.to_representation(value)
+        return text[:-6] + 'Z' if text.endswith('+00:00') else text
+    return convert
+
+
+def _converter(field, model_field):
+    kind = type(field)
+    if kind in CONVERTERS:
+        return CONVERTERS[kind]
+    if kind is serializers.DateTimeField:
+        return _datetime_converter(field)
+    if kind is serializers.PrimaryKeyRelatedField:
+        return field.pk_field.to_representation if field.pk_field is not None else None
+    if kind in BOUND:
+        return field.to_representation
+    if isinstance(field, serializers.FileField) and isinstance(model_field, models.FileField):
+        # FileField subclasses get the same FieldFile they would see, minus .instance
+        attr_class = model_field.attr_class
+
+        def convert(name):
+            return field.to_representation(attr_class(None, model_field, name))
+        return convert
+    raise Unsupported(field.field_name)
+
+
+def _compile_field(field, model, prefix, plan):
+    if field.source == '*' or isinstance(field, (serializers.SerializerMethodField, serializers.ListSerializer)):
+        raise Unsupported(field.field_name)
+
+    *path, name = field.source_attrs
+    if isinstance(field, serializers.ModelSerializer):
+        return _compile_nested(field, model, prefix, path, name, plan)
+
+    model, prefix = _follow(model, path, prefix)
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        method = getattr(model, name, None)
+        if method not in METHODS or type(field) not in CONVERTERS:
+            raise Unsupported(field.field_name)
+        columns, compute = METHODS[method]
+        indexes = [plan.column(prefix + column) for column in columns]
+        convert = CONVERTERS[type(field)]
+        return lambda row: convert(compute(*[row[i] for i in indexes]))
+
+    if model_field.is_relation:
+        remote = model_field.remote_field
+        if not (model_field.many_to_one or model_field.one_to_one) or not model_field.concrete \
+                or remote.field_name != model_field.related_model._meta.pk.name:
+            raise Unsupported(field.field_name)
+    return _getter(plan.column(prefix + name), _converter(field, model_field))
+
+
+def _compile_nested(serializer, model, prefix, path, name, plan):
+    model, prefix = _follow(model, path, prefix)
+    try:
+        relation = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise Unsupported(name)
+    if not (relation.many_to_one or relation.one_to_one):
+        raise Unsupported(name)
+    related = relation.related_model
+    if serializer.Meta.model is not related:
+        raise Unsupported(name)
+
+    prefix = f'{prefix}{name}__'
+    # Missing reverse one-to-one rows and null FKs both serialize as None
+    pk_index = plan.column(prefix + related._meta.pk.name)
+    build = _compile_serializer(serializer, related, prefix, plan)
+
+    def nested(row):
+        return None if row[pk_index] is None else build(row)
+    return nested
+
+
+def _compile_serializer(serializer, model, prefix, plan):
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        raise Unsupported(type(serializer).__name__)
+    getters = [(field.field_name, _compile_field(field, model, prefix, plan))
+               for field in serializer._readable_fields]
+
+    def build(row):
+        return {key: get(row) for key, get in getters}
+    return build
+
+
+def compile_serializer(serializer):
+    """
+    Return a callable mapping a queryset to serialized dicts, or None when the
+    serializer can't be reproduced from `values_list()` rows.
+    """
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None:
+        return None
+    plan = _Plan()
+    try:
+        build = _compile_serializer(serializer, model, '', plan)
+    except Unsupported:
+        return None
+
+    def serialize(queryset):
+        if queryset._iterable_class is not ModelIterable:
+            raise Unsupported('values queryset')
+        return [build(row) for row in queryset.values_list(*plan.lookups)]
+    return serialize
+
+
+class FastListMixin:
+    """
+    Serves unpaginated list actions through `compile_serializer` when the
+    view's serializer allows it, and through the serializer otherwise.
+    """
+
+    def fast_list_data(self, queryset):
+        if self.paginator is not None:
+            return None
+        serialize = compile_serializer(self.get_serializer_class()(context=self.get_serializer_context()))
+        if serialize is None:
+            return None
+        try:
+            return serialize(queryset)
+        except Unsupported:
+            return None
+
+    def list(self, request, *args, **kwargs):
+        data = self.fast_list_data(self.filter_queryset(self.get_queryset()))
+        if data is None:
+            return super().list(request, *args, **kwargs)
+        return Response(data)
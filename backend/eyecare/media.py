@@ -0,0 +1,209 @@
+"""
+Production serving of uploaded media (scan images, article images).
+
+- Authorization: names under a prefix listed in PROTECTED_MEDIA are only
+  served to users the configured check allows; everything else is public.
+- Local files are sent with FileResponse (wsgi.file_wrapper / sendfile), or
+  handed to the front proxy with X-Accel-Redirect when
+  MEDIA_ACCEL_REDIRECT_PREFIX is set.
+- Single byte ranges are honoured (206 / 416), and ETag / Last-Modified
+  allow conditional GETs.
+- Content-hashed names are cached as immutable, other names for
+  MEDIA_CACHE_SECONDS.
+- Storages without local paths (S3-compatible) are redirected to the
+  storage's own, usually pre-signed, URL once authorization passed.
+- A valid signed URL (eyecare.signing) skips authentication and the
+  database entirely.
+"""
+import mimetypes
+import posixpath
+import re
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import (FileResponse, Http404, HttpResponse, HttpResponseNotModified,
+                         HttpResponseRedirect, StreamingHttpResponse)
+from django.utils.http import http_date
+from django.utils.module_loading import import_string
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from . import signing
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+CHUNK_SIZE = 64 * 1024
+HASHED_NAME = re.compile(r'(^|[._-])[0-9a-f]{16,}$')
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def is_content_hashed(name):
+    """True when the file name embeds a content hash, so it never changes"""
+    stem = posixpath.splitext(posixpath.basename(name))[0]
+    return bool(HASHED_NAME.search(stem))
+
+
+def request_user(request):
+    """User from the session (admin) or a Bearer JWT, else None"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return result[0] if result else None
+
+
+def protected_check(name):
+    for prefix, check in settings.PROTECTED_MEDIA.items():
+        if name.startswith(prefix):
+            return import_string(check)
+    return None
+
+
+def cache_control(name, private, expires=None):
+    scope = 'private' if private else 'public'
+    if expires is not None:
+        # A signed URL must not outlive its signature in caches
+        return f'{scope}, max-age={max(int(expires - time.time()), 0)}'
+    if is_content_hashed(name):
+        return f'{scope}, max-age={IMMUTABLE_MAX_AGE}, immutable'
+    return f'{scope}, max-age={settings.MEDIA_CACHE_SECONDS}'
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single satisfiable range, None to send all, or False"""
+    match = RANGE_HEADER.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _iter_range(fh, start, length):
+    try:
+        fh.seek(start)
+        while length > 0:
+            data = fh.read(min(CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        fh.close()
+
+
+def file_response(request, name, private=False, expires=None, storage=default_storage):
+    """Serve a stored file with range, validator and cache headers, after authorization"""
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # Remote storage: let the object store serve it
+        return HttpResponseRedirect(storage.url(name))
+
+    try:
+        size = storage.size(name)
+        mtime = storage.get_modified_time(name).timestamp()
+    except (FileNotFoundError, OSError):
+        raise Http404("Media file not found")
+
+    etag = f'"{int(mtime):x}-{size:x}"'
+    headers = {
+        'Cache-Control': cache_control(name, private, expires),
+        'ETag': etag,
+        'Last-Modified': http_date(mtime),
+        'Accept-Ranges': 'bytes',
+    }
+    if private:
+        headers['Vary'] = 'Authorization, Cookie'
+
+    if request.headers.get('If-None-Match') == etag or (
+        'If-None-Match' not in request.headers
+        and not was_modified_since(request.headers.get('If-Modified-Since'), mtime)
+    ):
+        response = HttpResponseNotModified()
+        for key, value in headers.items():
+            response[key] = value
+        return response
+
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    accel_prefix = settings.MEDIA_ACCEL_REDIRECT_PREFIX
+    if accel_prefix:
+        # The proxy handles ranges itself
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + name
+    else:
+        byte_range = parse_range(request.headers.get('Range'), size)
+        if request.headers.get('If-Range') not in (None, etag):
+            byte_range = None
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if byte_range:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                _iter_range(open(path, 'rb'), start, end - start + 1),
+                status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+
+    for key, value in headers.items():
+        response[key] = value
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    name = posixpath.normpath(path).lstrip('/')
+    if name.startswith('..') or name in ('', '.'):
+        raise Http404("Media file not found")
+
+    check = protected_check(name)
+    if check is None:
+        return file_response(request, name)
+
+    expires = request.GET.get('exp')
+    if signing.verify(name, expires, request.GET.get('sig')):
+        return file_response(request, name, private=True, expires=int(expires))
+
+    user = request_user(request)
+    # 404 rather than 403 so file names can't be probed
+    if user is None or not check(user, name):
+        raise Http404("Media file not found")
+    return file_response(request, name, private=True)
+
+
+def verify_media_request(request):
+    """
+    Subrequest target for a front proxy (e.g. nginx auth_request): 204 when
+    the original URI carries a valid signature, 403 otherwise.
+    """
+    original = urlsplit(request.headers.get('X-Original-URI', ''))
+    prefix = settings.MEDIA_URL
+    if not original.path.startswith(prefix):
+        return HttpResponse(status=403)
+    name = unquote(original.path[len(prefix):])
+    params = parse_qs(original.query)
+    expires = params.get('exp', [None])[0]
+    signature = params.get('sig', [None])[0]
+    return HttpResponse(status=204 if signing.verify(name, expires, signature) else 403)
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'articles',
     'consultations',
     'contact',
+    'analytics',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -46,10 +47,19 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 ]
 
+# API-only workers (API_ONLY=true) drop the jazzmin theme, skip importing every
+# app's admin.py and don't mount /admin/; serve the admin from another service.
+# The admin app itself stays installed so its LogEntry rows still cascade.
+API_ONLY = os.environ.get('API_ONLY', 'False').lower() == 'true'
+if API_ONLY:
+    INSTALLED_APPS.remove('jazzmin')
+    INSTALLED_APPS[INSTALLED_APPS.index('django.contrib.admin')] = 'django.contrib.admin.apps.SimpleAdminConfig'
+
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Always include this
+    'eyecare.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,7 +73,8 @@ ROOT_URLCONF = 'eyecare.urls'
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
+        # Project-wide template overrides (admin pagination for eyecare.admin)
+        'DIRS': [os.path.join(BASE_DIR, 'eyecare', 'templates')],
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -79,16 +90,38 @@ WSGI_APPLICATION = 'eyecare.wsgi.application'
 
 # REST Framework configuration
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'eyecare.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    # Proxies in front of the app that append to X-Forwarded-For (Render's load
+    # balancer is one). Throttles key on the address the outermost of them saw,
+    # so a client can't pick its own bucket by sending a forged header. Set 0
+    # when clients connect directly.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', '1')),
+    # Token-bucket rates used by users.throttling (burst size / refill period)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.environ.get('THROTTLE_LOGIN_IP', '20/min'),
+        'login_username': os.environ.get('THROTTLE_LOGIN_USERNAME', '5/min'),
+        'contact': os.environ.get('THROTTLE_CONTACT', '5/hour'),
+    },
 }
-# Allow public access to articles API
-from rest_framework.permissions import AllowAny
-ARTICLE_PERMISSION_CLASSES = [AllowAny]
+# Response compression (eyecare.compression); Brotli quality 4 is close to
+# gzip speed at a noticeably better ratio
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+# Endpoints whose responses carry tokens
+COMPRESSION_EXCLUDE_PATHS = ['/api/auth/', '/api/token/']
+
+# Allow public access to articles API (a dotted path, so loading settings
+# doesn't import DRF before the apps)
+ARTICLE_PERMISSION_CLASSES = ['rest_framework.permissions.AllowAny']
 
 # Simple JWT Configuration
 SIMPLE_JWT = {
@@ -114,6 +147,90 @@ CORS_ALLOW_CREDENTIALS = True
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media serving (eyecare/media.py): per-prefix authorization checks and cache lifetime
+PROTECTED_MEDIA = {
+    'eye_scans/': 'scans.permissions.can_view_scan_image',
+}
+MEDIA_CACHE_SECONDS = int(os.environ.get('MEDIA_CACHE_SECONDS', '3600'))
+# e.g. '/protected-media/' to let nginx send files via X-Accel-Redirect
+MEDIA_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_ACCEL_REDIRECT_PREFIX', '')
+# Signed media URLs (eyecare/signing.py). Set a dedicated key to share with a
+# front proxy that verifies them; unset, one is derived from SECRET_KEY
+MEDIA_SIGNING_KEY = os.environ.get('MEDIA_SIGNING_KEY', '')
+MEDIA_URL_TTL = int(os.environ.get('MEDIA_URL_TTL', '3600'))
+MEDIA_URL_BUCKET_SECONDS = int(os.environ.get('MEDIA_URL_BUCKET_SECONDS', '900'))
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Hashed names served by WhiteNoise as immutable, precompressed with Brotli and gzip
+    'staticfiles': {
+        'BACKEND': 'eyecare.storage.StaticStorage',
+    },
+}
+# Any S3-compatible object store (AWS S3, or MinIO for local testing); needs django-storages[s3]
+if 'MEDIA_S3_BUCKET' in os.environ:
+    STORAGES['default'] = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': os.environ['MEDIA_S3_BUCKET'],
+            'endpoint_url': os.environ.get('MEDIA_S3_ENDPOINT_URL') or None,
+            'region_name': os.environ.get('MEDIA_S3_REGION') or None,
+            'access_key': os.environ.get('MEDIA_S3_ACCESS_KEY'),
+            'secret_key': os.environ.get('MEDIA_S3_SECRET_KEY'),
+            'default_acl': 'private',
+            'file_overwrite': False,
+            # The media view redirects here after authorization; keep the links short-lived
+            'querystring_auth': True,
+            'querystring_expire': 300,
+        },
+    }
+
+# Scan image-quality gate (scans/quality.py): 'reject' refuses poor photos with a
+# retake message, 'flag' stores them with their issues for specialists to filter, 'off' skips it.
+# Stays on 'flag' until the thresholds are calibrated against real patient photos
+QUALITY_GATE = os.environ.get('QUALITY_GATE', 'flag')
+QUALITY_WORK_SIZE = 256
+QUALITY_MIN_SIDE = int(os.environ.get('QUALITY_MIN_SIDE', '224'))
+QUALITY_MIN_SHARPNESS = float(os.environ.get('QUALITY_MIN_SHARPNESS', '30'))
+QUALITY_BRIGHTNESS_RANGE = (40, 225)
+QUALITY_MAX_CLIPPED = 0.25
+QUALITY_MIN_EYE_SCORE = float(os.environ.get('QUALITY_MIN_EYE_SCORE', '0.12'))
+
+# Model weights (scans/ml/registry.py), memory-mapped and shared by all workers;
+# the active version is re-checked at most this often
+ML_MODEL_DIR = os.environ.get('ML_MODEL_DIR', os.path.join(BASE_DIR, 'ml_models'))
+ML_MODEL_CHECK_SECONDS = float(os.environ.get('ML_MODEL_CHECK_SECONDS', '5'))
+# Registry name of the scan classifier (scans/analysis.py); the mock is used until it exists
+SCAN_MODEL_NAME = os.environ.get('SCAN_MODEL_NAME', 'eye-condition')
+
+# Similar-case index over reviewed scans (scans/similarity.py), rebuilt with
+# `manage.py rebuild_similarity_index`; past SIMILARITY_IVF_MIN scans it is split
+# into ~sqrt(N) clusters and a search scans the SIMILARITY_NPROBE closest ones
+SIMILARITY_INDEX_DIR = os.environ.get('SIMILARITY_INDEX_DIR', os.path.join(BASE_DIR, 'similarity'))
+SIMILARITY_IVF_MIN = int(os.environ.get('SIMILARITY_IVF_MIN', '20000'))
+SIMILARITY_NPROBE = int(os.environ.get('SIMILARITY_NPROBE', '16'))
+SIMILARITY_MAX_K = 50
+# Embed newly reviewed scans on a background thread instead of in the request
+SIMILARITY_INDEX_ASYNC = os.environ.get('SIMILARITY_INDEX_ASYNC', 'True').lower() == 'true'
+
+# Patient scan timelines (scans/timeline.py): how many recent scans and condition
+# changes each one keeps, and how many scans the confidence trend is fitted over
+TIMELINE_MAX_POINTS = int(os.environ.get('TIMELINE_MAX_POINTS', '200'))
+TIMELINE_TREND_SCANS = 10
+
+# Assign new contact messages to the least-loaded specialist (users/workload.py)
+# instead of leaving them in 'new' for someone to call assign_to_me. Off by
+# default: the form is anonymous, so each submission would lock and bump a
+# specialist's counters
+CONTACT_AUTO_ASSIGN = os.environ.get('CONTACT_AUTO_ASSIGN', 'False').lower() == 'true'
+
+# Admin changelists (eyecare/admin.py): exact counts stop here and give way to the
+# PostgreSQL planner estimate; pages past this offset look up primary keys first
+ADMIN_EXACT_COUNT_LIMIT = int(os.environ.get('ADMIN_EXACT_COUNT_LIMIT', '10000'))
+ADMIN_DEFERRED_JOIN_OFFSET = 1000
+
 # Email Configuration - Using Resend
 RESEND_API_KEY = os.environ.get('RESEND_API_KEY', '')
 DEFAULT_FROM_EMAIL = 'EyeCare Vision AI <onboarding@resend.dev>'
@@ -129,16 +246,24 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Fallback for
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# WAL, relaxed fsync, mmap and IMMEDIATE transactions for multi-worker SQLite deployments
+if os.environ.get('SQLITE_TUNING', 'false').lower() == 'true':
+    from eyecare.sqlite import tuning_options
+    DATABASES['default']['OPTIONS'] = tuning_options()
+
 # Use Neon PostgreSQL if DATABASE_URL exists
 if 'DATABASE_URL' in os.environ:
     import dj_database_url
+    # Pooling (psycopg 3 pool, one per worker process) keeps TLS handshakes out of request latency
+    DB_POOL = os.environ.get('DB_POOL', 'true').lower() == 'true'
     DATABASES['default'] = dj_database_url.config(
         default=os.environ.get('DATABASE_URL'),
-        conn_max_age=600,
+        conn_max_age=0 if DB_POOL else 600,
+        conn_health_checks=not DB_POOL,
         ssl_require=True
     )
     
@@ -146,6 +271,61 @@ if 'DATABASE_URL' in os.environ:
     DATABASES['default']['ENGINE'] = 'django.db.backends.postgresql'
     DATABASES['default']['OPTIONS'] = {'sslmode': 'require'}
 
+    if DB_POOL:
+        from psycopg_pool import ConnectionPool
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '1')),
+            # One connection per request thread in a gunicorn worker is enough
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE') or os.environ.get('GUNICORN_THREADS') or '4'),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', '10')),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', '300')),
+            # Verify connections on checkout so ones dropped by the server are replaced
+            'check': ConnectionPool.check_connection,
+        }
+
+
+# Caches - throttle buckets and cached listings should be shared by all workers, so use Redis when available
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'throttle': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'throttle',
+    },
+}
+if 'REDIS_URL' in os.environ:
+    for alias in CACHES:
+        CACHES[alias] = {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': alias,
+        }
+
+# Without a shared cache, other workers only see specialist changes after this TTL
+SPECIALISTS_CACHE_SECONDS = int(os.environ.get('SPECIALISTS_CACHE_SECONDS', '300'))
+
+# Read replicas - Postgres URLs in DATABASE_REPLICA_URLS, or SQLite files in
+# SQLITE_REPLICA_PATHS for local testing (both comma-separated)
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+_replica_urls = [url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url]
+_replica_paths = [path for path in os.environ.get('SQLITE_REPLICA_PATHS', '').split(',') if path]
+if _replica_urls:
+    import dj_database_url
+    for index, url in enumerate(_replica_urls):
+        replica = dj_database_url.parse(url, conn_max_age=DATABASES['default'].get('CONN_MAX_AGE', 0),
+                                        ssl_require=True)
+        replica['ENGINE'] = 'django.db.backends.postgresql'
+        replica['OPTIONS'] = dict(DATABASES['default'].get('OPTIONS', {}))
+        DATABASES[f'replica_{index}'] = replica
+for index, path in enumerate(_replica_paths, start=len(_replica_urls)):
+    DATABASES[f'replica_{index}'] = dict(DATABASES['default'], NAME=path)
+for alias in DATABASES:
+    if alias.startswith('replica_'):
+        DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+if len(DATABASES) > 1:
+    DATABASE_ROUTERS = ['eyecare.db_router.ReplicaRouter']
+
 
 # Custom User Model
 AUTH_USER_MODEL = 'users.CustomUser'
@@ -166,6 +346,22 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing - PBKDF2 cost is configurable; stored hashes are upgraded on next login
+PASSWORD_HASHERS = [
+    'users.hashers.ConfigurablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+PASSWORD_HASH_ITERATIONS = int(os.environ.get('PASSWORD_HASH_ITERATIONS', '0')) or None
+
+# 'inline' hashes on the request thread, 'pool' offloads to a bounded process pool
+AUTH_HASHING_MODE = os.environ.get('AUTH_HASHING_MODE', 'inline')
+AUTH_HASHING_WORKERS = int(os.environ.get('AUTH_HASHING_WORKERS', '2'))
+AUTH_HASHING_MAX_QUEUE = int(os.environ.get('AUTH_HASHING_MAX_QUEUE', '16'))
+AUTH_HASHING_TIMEOUT = float(os.environ.get('AUTH_HASHING_TIMEOUT', '10'))
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -174,8 +370,7 @@ USE_TZ = True
 
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = '/static/'
-STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STATIC_ROOT = os.environ.get('STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -0,0 +1,45 @@
+import os
+
+from whitenoise.compress import Compressor
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+
+class IncrementalCompressor(Compressor):
+    """
+    Skips files whose .br/.gz siblings are already current.
+
+    WhiteNoise stamps compressed files with the source file's mtime, so equal
+    mtimes mean the source hasn't changed since the last collectstatic.
+    """
+
+    def compress(self, path):
+        existing = self.up_to_date(path)
+        if existing is not None:
+            return existing
+        return super().compress(path)
+
+    def up_to_date(self, path):
+        suffixes = [suffix for suffix, enabled in (('.br', self.use_brotli), ('.gz', self.use_gzip)) if enabled]
+        mtime = os.stat(path).st_mtime
+        found = []
+        for suffix in suffixes:
+            try:
+                if os.stat(path + suffix).st_mtime != mtime:
+                    return None
+            except FileNotFoundError:
+                return None
+            found.append(path + suffix)
+        return found
+
+
+class StaticStorage(CompressedManifestStaticFilesStorage):
+    """
+    Hashed, Brotli + gzip precompressed static files, compressed incrementally.
+
+    Missing manifest entries fall back to the plain name instead of raising,
+    so a stale manifest can't take the admin down.
+    """
+    manifest_strict = False
+
+    def create_compressor(self, **kwargs):
+        return IncrementalCompressor(**kwargs)
@@ -0,0 +1,134 @@
+import base64
+import hashlib
+import hmac
+import time
+from datetime import timedelta
+from unittest import mock
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from articles.models import Article
+from articles.serializers import ArticleSerializer
+from consultations.models import Consultation
+from consultations.serializers import ConsultationSerializer
+from eyecare import signing
+from eyecare.compression import CompressionMiddleware
+from eyecare.fastlist import compile_serializer
+from scans.models import EyeScan, ScanReview
+from scans.serializers import EyeScanSerializer, ScanReviewSerializer
+from users.models import CustomUser
+
+
+class SigningTests(SimpleTestCase):
+    def test_round_trip(self):
+        expires = signing.expiry()
+        self.assertTrue(signing.verify('eye_scans/a.jpg', expires, signing._signature('eye_scans/a.jpg', expires)))
+        self.assertFalse(signing.verify('eye_scans/b.jpg', expires, signing._signature('eye_scans/a.jpg', expires)))
+
+    def test_expired(self):
+        expires = int(time.time()) - 1
+        self.assertFalse(signing.verify('eye_scans/a.jpg', expires, signing._signature('eye_scans/a.jpg', expires)))
+
+    def test_malformed_signatures_are_rejected(self):
+        for signature in ('é', '\x00' * 43, '', None, ['x']):
+            self.assertFalse(signing.verify('eye_scans/a.jpg', 9999999999, signature))
+
+    @override_settings(MEDIA_SIGNING_KEY='')
+    def test_default_key_is_not_the_secret_key(self):
+        digest = hmac.new(settings.SECRET_KEY.encode(), b'9999999999:eye_scans/a.jpg', hashlib.sha256).digest()
+        forged = base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+        self.assertFalse(signing.verify('eye_scans/a.jpg', 9999999999, forged))
+
+    @override_settings(MEDIA_SIGNING_KEY='proxy-shared-key')
+    def test_configured_key(self):
+        digest = hmac.new(b'proxy-shared-key', b'9999999999:eye_scans/a.jpg', hashlib.sha256).digest()
+        signature = base64.urlsafe_b64encode(digest).rstrip(b'=').decode()
+        self.assertTrue(signing.verify('eye_scans/a.jpg', 9999999999, signature))
+
+
+class SignedMediaViewTests(TestCase):
+    def test_non_ascii_signature(self):
+        path = '/media/eye_scans/a.jpg'
+        query = f"exp=9999999999&sig={quote('é')}"
+        self.assertEqual(self.client.get(f'{path}?{query}', secure=True).status_code, 404)
+        response = self.client.get('/media-auth/', HTTP_X_ORIGINAL_URI=f'{path}?{query}', secure=True)
+        self.assertEqual(response.status_code, 403)
+
+
+class CompressionTests(SimpleTestCase):
+    body = b'{"results": [' + b'{"id": 1, "name": "eye scan", "condition": "cataract"}, ' * 100 + b']}'
+
+    def respond(self, path='/api/articles/', **headers):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING='br, gzip', **headers)
+        middleware = CompressionMiddleware(lambda request: HttpResponse(self.body, content_type='application/json'))
+        return middleware(request)
+
+    def test_anonymous_requests_get_brotli(self):
+        self.assertEqual(self.respond()['Content-Encoding'], 'br')
+
+    def test_credentialed_requests_get_padded_gzip(self):
+        self.assertEqual(self.respond(HTTP_AUTHORIZATION='Bearer abc')['Content-Encoding'], 'gzip')
+        request_cookie = {'HTTP_COOKIE': f'{settings.SESSION_COOKIE_NAME}=abc'}
+        self.assertEqual(self.respond(**request_cookie)['Content-Encoding'], 'gzip')
+        # GZipMiddleware's random filename padding: the same body compresses to different lengths
+        sizes = {len(self.respond(HTTP_AUTHORIZATION='Bearer abc').content) for _ in range(20)}
+        self.assertGreater(len(sizes), 1)
+
+    def test_token_endpoints_are_not_compressed(self):
+        for path in ('/api/auth/login/', '/api/token/refresh/'):
+            self.assertFalse(self.respond(path).has_header('Content-Encoding'))
+
+
+class FastListTests(TestCase):
+    """compile_serializer must render exactly what the ModelSerializer renders"""
+
+    @classmethod
+    def setUpTestData(cls):
+        patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user',
+                                                 first_name='Ama', last_name='Mensah')
+        unnamed = CustomUser.objects.create_user('unnamed', 'u@example.com', 'pw', user_type='user')
+        doc = CustomUser.objects.create_user('doc', 'd@example.com', 'pw', user_type='specialist',
+                                             first_name='Kofi', last_name='')
+        reviewed = EyeScan.objects.create(user=patient, image='eye_scans/ab/cd/reviewed.jpg',
+                                          condition_detected='cataract', confidence_score=0.875,
+                                          recommendations='See a specialist', quality_sharpness=12.5,
+                                          quality_brightness=0.4, quality_eye_score=0.9, quality_issues='dark')
+        EyeScan.objects.create(user=unnamed, image='eye_scans/ef/01/unreviewed é.jpg',
+                               condition_detected='normal', confidence_score=1.0, recommendations='')
+        ScanReview.objects.create(scan=reviewed, specialist=doc, diagnosis='Early cataract',
+                                  recommendations='Review in six months')
+        Consultation.objects.create(user=patient, specialist=doc, scan=reviewed, description='Follow-up',
+                                    status='completed', scheduled_date=timezone.now() + timedelta(days=2))
+        Consultation.objects.create(user=unnamed, specialist=doc, description='Blurred vision')
+        Article.objects.create(title='Dry eyes', content='Blink more.', author=doc, category='prevention',
+                               image='articles/12/34/cover.jpg', is_published=True)
+        Article.objects.create(title='Draft', content='...', author=doc, category='prevention')
+
+    def assertSameOutput(self, serializer_class, queryset):
+        context = {'request': RequestFactory().get('/', secure=True)}
+        serialize = compile_serializer(serializer_class(context=context))
+        self.assertIsNotNone(serialize, f"{serializer_class.__name__} fell back to the serializer")
+        # Pin the signed-URL expiry so both paths sign with the same one
+        with mock.patch.object(signing, 'expiry', return_value=2000000000):
+            expected = serializer_class(queryset, many=True, context=context).data
+            actual = serialize(queryset)
+        # Compared as rendered JSON so key order and value types count too
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+        self.assertEqual(len(actual), queryset.count())
+
+    def test_eye_scans(self):
+        self.assertSameOutput(EyeScanSerializer, EyeScan.objects.order_by('-created_at'))
+
+    def test_scan_reviews(self):
+        self.assertSameOutput(ScanReviewSerializer, ScanReview.objects.all())
+
+    def test_consultations(self):
+        self.assertSameOutput(ConsultationSerializer, Consultation.objects.order_by('-created_at'))
+
+    def test_articles(self):
+        self.assertSameOutput(ArticleSerializer, Article.objects.order_by('-created_at'))
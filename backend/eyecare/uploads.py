@@ -0,0 +1,90 @@
+"""
+Sharded upload paths and helpers for the media housekeeping commands.
+
+Uploads are named by a hash of their content and spread over two levels
+of 256 directories each, so no directory grows past a few thousand entries
+even at hundreds of millions of files:
+
+    eye_scans/3f/a9/3fa9c2...e1.jpg
+
+Hashed names never change for a given file, so eyecare.media serves them
+as immutable, and they don't leak the patient's original file name.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import uuid
+
+from django.apps import apps
+from django.db import models, transaction
+from django.utils.deconstruct import deconstructible
+
+NAME_LENGTH = 32
+# Storages add a random '_abc1234' suffix when the same content is uploaded twice
+SHARDED_NAME = re.compile(r'^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{%d}(_[A-Za-z0-9]{7})?(\.[a-z0-9]+)?$' % NAME_LENGTH)
+
+
+def content_hash(file):
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def sharded_name(prefix, digest, filename):
+    ext = os.path.splitext(filename)[1].lower()
+    return posixpath.join(prefix, digest[:2], digest[2:4], digest[:NAME_LENGTH] + ext)
+
+
+def is_sharded(prefix, name):
+    return name.startswith(prefix) and bool(SHARDED_NAME.match(name[len(prefix):]))
+
+
+@deconstructible
+class ShardedUploadTo:
+    """upload_to for a FileField: `<prefix><aa>/<bb>/<content hash><ext>`"""
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+    def __call__(self, instance, filename):
+        field_file = next((getattr(instance, field.attname) for field in instance._meta.fields
+                           if isinstance(field, models.FileField) and field.upload_to == self), None)
+        try:
+            digest = content_hash(field_file.file)
+        except (AttributeError, ValueError, OSError):
+            digest = uuid.uuid4().hex
+        return sharded_name(self.prefix, digest, filename)
+
+    def __eq__(self, other):
+        return isinstance(other, ShardedUploadTo) and other.prefix == self.prefix
+
+    def __hash__(self):
+        return hash(self.prefix)
+
+
+def sharded_fields():
+    """(model, field) for every FileField uploading through ShardedUploadTo"""
+    for model in apps.get_models():
+        for field in model._meta.fields:
+            if isinstance(field, models.FileField) and isinstance(field.upload_to, ShardedUploadTo):
+                yield model, field
+
+
+def delete_file_on_commit(instance, field_name):
+    """
+    post_delete helper: remove the row's file once the deletion commits,
+    unless another row still points at it. Files are never removed for a
+    rolled-back delete.
+    """
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return
+    name, storage, model = field_file.name, field_file.storage, type(instance)
+
+    def delete():
+        if not model._default_manager.filter(**{field_name: name}).exists():
+            storage.delete(name)
+    transaction.on_commit(delete)
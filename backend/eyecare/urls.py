@@ -1,9 +1,8 @@
-from django.contrib import admin
-from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from django.urls import path, include, re_path
 from rest_framework_simplejwt.views import TokenRefreshView, TokenObtainPairView
 from django.http import JsonResponse
+from .media import serve_media, verify_media_request
 
 # Add this root view function
 def api_root(request):
@@ -18,39 +17,47 @@ def api_root(request):
             "api_articles": "/api/articles/", 
             "api_consultations": "/api/consultations/",
             "api_contact": "/api/contact/",
+            "api_analytics": "/api/analytics/summary/",
             "token_obtain": "/api/auth/login/",
             "token_refresh": "/api/token/refresh/"
         }
     })
 
-def health_check(request):
+def health_live(request):
+    """Liveness probe: the process is up and serving, no dependencies checked"""
+    return JsonResponse({"status": "alive"})
+
+def health_ready(request):
+    """Readiness probe: a pooled database connection answers SELECT 1"""
+    from django.db import DatabaseError, connection
     try:
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        user_count = User.objects.count()
-        return JsonResponse({
-            "status": "healthy", 
-            "database": "working",
-            "user_count": user_count
-        })
-    except Exception as e:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+    except DatabaseError as e:
         return JsonResponse({
             "status": "error",
-            "database": "broken", 
+            "database": "broken",
             "error": str(e)
-        }, status=500)
+        }, status=503)
+    return JsonResponse({"status": "healthy", "database": "working"})
 
 urlpatterns = [
     path('', api_root, name='api-root'),
-    path('health/', health_check, name='health-check'),
-    path('admin/', admin.site.urls),
+    path('health/', health_ready, name='health-check'),
+    path('health/live/', health_live, name='health-live'),
+    path('health/ready/', health_ready, name='health-ready'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/auth/', include('users.urls')),
     path('api/scans/', include('scans.urls')),
     path('api/articles/', include('articles.urls')),
     path('api/consultations/', include('consultations.urls')),
     path('api/contact/', include('contact.urls')),
+    path('api/analytics/', include('analytics.urls')),
+    path('media-auth/', verify_media_request, name='media-auth'),
+    re_path(r'^media/(?P<path>.+)$', serve_media, name='media'),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if not settings.API_ONLY:
+    from django.contrib import admin
+    urlpatterns += [path('admin/', admin.site.urls)]
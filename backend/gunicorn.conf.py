@@ -0,0 +1,112 @@
+"""
+Gunicorn configuration for the EyeCare backend.
+
+    gunicorn -c gunicorn.conf.py
+
+The app comes from `wsgi_app` below; don't pass one on the command line, as
+gunicorn then ignores `wsgi_app` and the uvicorn worker would get the WSGI
+callable.
+
+Sizing is derived from the CPU count and can be overridden per deployment:
+
+    WEB_CONCURRENCY        worker processes (default: 2 * CPUs + 1, capped by GUNICORN_MAX_WORKERS)
+    GUNICORN_WORKER_CLASS  sync, gthread (default) or uvicorn (needs `pip install uvicorn`)
+    GUNICORN_THREADS       threads per gthread worker (default 4)
+    GUNICORN_TIMEOUT       seconds before a silent worker is killed (default 120, for slow uploads)
+    GUNICORN_MAX_REQUESTS  requests before a worker is recycled (default 1000)
+    FORWARDED_ALLOW_IPS    proxy addresses or networks trusted for X-Forwarded-* (default: localhost)
+    SKIP_STARTUP_CHECK     set to 'true' to start without the self-check
+"""
+import multiprocessing
+import os
+import sys
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name) or default)
+
+
+cpus = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+wsgi_app = 'eyecare.wsgi:application'
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'uvicorn':
+    try:
+        import uvicorn.workers  # noqa: F401
+    except ImportError:
+        sys.exit("GUNICORN_WORKER_CLASS=uvicorn needs the uvicorn package (pip install uvicorn)")
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'eyecare.asgi:application'
+
+workers = _env_int('WEB_CONCURRENCY', min(cpus * 2 + 1, _env_int('GUNICORN_MAX_WORKERS', 8)))
+threads = _env_int('GUNICORN_THREADS', 4) if worker_class == 'gthread' else 1
+
+# Load Django once in the master so workers fork with it already imported
+preload_app = True
+
+# Recycle workers periodically to bound slow memory growth (image decoding)
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = max_requests // 10
+
+# Scan uploads from mobile connections can be slow
+timeout = _env_int('GUNICORN_TIMEOUT', 120)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = 5
+
+# Heartbeat files on tmpfs avoid worker stalls on slow disks
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = '-'
+errorlog = '-'
+# Only these peers may set the scheme via X-Forwarded-Proto
+forwarded_allow_ips = os.environ.get('FORWARDED_ALLOW_IPS', '127.0.0.1,::1')
+
+
+def _self_check(log):
+    """Refuse to start with broken settings, no database or unapplied migrations"""
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eyecare.settings')
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection, connections
+    from django.db.migrations.executor import MigrationExecutor
+
+    call_command('check')
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise RuntimeError(f"{len(plan)} unapplied migrations; run 'manage.py migrate'")
+
+    # Workers must not inherit the master's database connections or pool
+    connections.close_all()
+    for conn in connections.all():
+        if getattr(conn, 'pool', None):
+            conn.close_pool()
+    log.info("Startup self-check passed (%s workers x %s threads, %s)", workers, threads, worker_class)
+
+
+def on_starting(server):
+    if os.environ.get('SKIP_STARTUP_CHECK', '').lower() == 'true':
+        return
+    try:
+        _self_check(server.log)
+    except Exception as exc:
+        server.log.error("Startup self-check failed: %s", exc)
+        sys.exit(1)
+
+
+def when_ready(server):
+    # Runs in the master after the app is preloaded. With several workers,
+    # import the image stack (NumPy, Pillow's format plugins) once here so
+    # the forks share it; a single worker loads it on its first scan instead.
+    if workers < 2:
+        return
+    from PIL import Image
+    from scans import analysis, quality, similarity  # noqa: F401
+    Image.init()
@@ -1,5 +1,27 @@
 from django.contrib import admin
-from .models import EyeScan, ScanReview
+from eyecare.admin import PerformanceAdminMixin, StaffRelatedFieldListFilter
+from .models import EyeScan, PatientTimeline, ScanReview
 
-admin.site.register(EyeScan)
-admin.site.register(ScanReview)
+@admin.register(EyeScan)
+class EyeScanAdmin(PerformanceAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'user', 'condition_detected', 'confidence_score', 'is_reviewed', 'created_at')
+    list_filter = ('condition_detected', 'is_reviewed')
+    list_select_related = ('user',)
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+    readonly_fields = ('created_at',)
+
+@admin.register(ScanReview)
+class ScanReviewAdmin(PerformanceAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'scan', 'specialist', 'created_at')
+    list_filter = (('specialist', StaffRelatedFieldListFilter),)
+    list_select_related = ('scan', 'specialist')
+    raw_id_fields = ('scan',)
+    autocomplete_fields = ('specialist',)
+    readonly_fields = ('created_at',)
+
+@admin.register(PatientTimeline)
+class PatientTimelineAdmin(PerformanceAdminMixin, admin.ModelAdmin):
+    list_display = ('user', 'scan_count', 'reviewed_count', 'latest_condition', 'last_scan_at')
+    list_select_related = ('user',)
+    raw_id_fields = ('user',)
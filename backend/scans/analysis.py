@@ -0,0 +1,80 @@
+"""
+Scan analysis: the classifier from the model registry, or the random mock
+when no model has been installed yet.
+"""
+import logging
+import random
+import threading
+
+from django.conf import settings
+
+from .ml import registry
+from .ml.runtime import Network
+
+logger = logging.getLogger(__name__)
+
+MOCK_CONDITIONS = ['cataract', 'redness', 'dryness', 'glaucoma', 'conjunctivitis', 'normal']
+MOCK_WEIGHTS = [0.1, 0.2, 0.25, 0.1, 0.2, 0.15]
+MOCK_VERSION = 'mock'
+
+RECOMMENDATIONS = {
+    'cataract': "Clouding of the eye's lens detected. Consider consulting an ophthalmologist for further evaluation and potential surgical options.",
+    'redness': "Eye redness detected. This may indicate irritation, allergy, or infection. Monitor symptoms and consult if persistent for more than 48 hours.",
+    'dryness': "Signs of dry eyes detected. Use lubricating eye drops, avoid prolonged screen time, and consider using a humidifier.",
+    'glaucoma': "Potential signs of glaucoma detected. Urgent consultation recommended with an eye specialist for pressure testing and treatment.",
+    'conjunctivitis': "Possible conjunctivitis (pink eye) detected. Practice good hygiene, avoid touching eyes, and consult a doctor for antibiotic treatment if bacterial.",
+    'normal': "No significant issues detected. Maintain regular eye checkups and practice good eye care habits."
+}
+
+_network = None
+_network_lock = threading.Lock()
+_warned = False
+
+
+def get_network():
+    """The classifier for the active model version, or None when none is installed"""
+    global _network, _warned
+    try:
+        model = registry.get_model(settings.SCAN_MODEL_NAME)
+    except registry.ModelNotFound:
+        if not _warned:
+            logger.warning("No %s model installed; scans get mock results", settings.SCAN_MODEL_NAME)
+            _warned = True
+        return None
+    with _network_lock:
+        if _network is None or _network.model is not model:
+            _network = Network(model)
+        return _network
+
+
+def analyzer_version():
+    network = get_network()
+    if network is None:
+        return MOCK_VERSION
+    return f'{network.model.name}:{network.model.version}'
+
+
+def _result(condition, confidence, version):
+    return {
+        'condition_detected': condition,
+        'confidence_score': round(confidence, 2),
+        'recommendations': RECOMMENDATIONS[condition],
+        'analyzer_version': version,
+    }
+
+
+def analyze_batch(image_files):
+    """EyeScan analysis fields for each image, classified in one batch"""
+    network = get_network()
+    if network is None:
+        return [
+            _result(random.choices(MOCK_CONDITIONS, weights=MOCK_WEIGHTS, k=1)[0], random.uniform(0.7, 0.95),
+                    MOCK_VERSION)
+            for _ in image_files
+        ]
+    version = f'{network.model.name}:{network.model.version}'
+    return [_result(label, confidence, version) for label, confidence in network.predict(image_files)]
+
+
+def analyze(image_file):
+    return analyze_batch([image_file])[0]
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 class ScansConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scans'
+
+    def ready(self):
+        # Keep patient timelines and the similar-case index in step with scans and reviews
+        from . import signals  # noqa: F401
@@ -0,0 +1,139 @@
+"""
+Streaming export of scans and their reviews for research datasets.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` so memory stays
+flat no matter how many scans exist. Patients are identified by id only.
+"""
+import csv
+import io
+import json
+import zipfile
+from datetime import datetime
+
+from django.db.models import Q
+from PIL import Image
+
+from .models import EyeScan
+
+# (column name, lookup on EyeScan)
+COLUMNS = (
+    ('scan_id', 'id'),
+    ('patient_id', 'user_id'),
+    ('condition_detected', 'condition_detected'),
+    ('confidence_score', 'confidence_score'),
+    ('is_reviewed', 'is_reviewed'),
+    ('scan_created_at', 'created_at'),
+    ('image', 'image'),
+    ('review_id', 'scanreview__id'),
+    ('specialist_id', 'scanreview__specialist_id'),
+    ('diagnosis', 'scanreview__diagnosis'),
+    ('review_recommendations', 'scanreview__recommendations'),
+    ('review_created_at', 'scanreview__created_at'),
+)
+HEADER = [name for name, _ in COLUMNS]
+FORMATS = ('csv', 'jsonl', 'parquet')
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def export_queryset(since=None):
+    """Scans to export, oldest first; `since` limits to new scans or new reviews."""
+    queryset = EyeScan.objects.order_by('id')
+    if since is not None:
+        queryset = queryset.filter(Q(created_at__gt=since) | Q(scanreview__created_at__gt=since))
+    return queryset
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def iter_rows(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one tuple per scan in COLUMNS order."""
+    lookups = [lookup for _, lookup in COLUMNS]
+    for row in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        yield tuple(_plain(value) for value in row)
+
+
+class _Echo:
+    """File-like object whose write() hands the line straight back"""
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_jsonl(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(HEADER, row))) + '\n'
+
+
+def write_parquet(rows, path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write rows as a Parquet file, one row group per chunk.
+
+    pyarrow is an optional dependency; it is only imported when this format is
+    requested.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise RuntimeError("Parquet export requires the 'pyarrow' package") from exc
+
+    schema = pa.schema([
+        ('scan_id', pa.int64()),
+        ('patient_id', pa.int64()),
+        ('condition_detected', pa.string()),
+        ('confidence_score', pa.float64()),
+        ('is_reviewed', pa.bool_()),
+        ('scan_created_at', pa.string()),
+        ('image', pa.string()),
+        ('review_id', pa.int64()),
+        ('specialist_id', pa.int64()),
+        ('diagnosis', pa.string()),
+        ('review_recommendations', pa.string()),
+        ('review_created_at', pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                writer.write_table(pa.Table.from_pylist([dict(zip(HEADER, r)) for r in chunk], schema))
+                count += len(chunk)
+                chunk = []
+        if chunk:
+            writer.write_table(pa.Table.from_pylist([dict(zip(HEADER, r)) for r in chunk], schema))
+            count += len(chunk)
+    return count
+
+
+def write_images(queryset, path, size=512, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Bundle resized copies of the scan images into a zip archive.
+
+    Images are opened, shrunk and written one at a time. Missing or unreadable
+    files are skipped and returned so the caller can report them.
+    """
+    skipped = []
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for scan in queryset.only('id', 'image').iterator(chunk_size=chunk_size):
+            try:
+                with scan.image.open('rb') as fh, Image.open(fh) as image:
+                    image = image.convert('RGB')
+                    image.thumbnail((size, size))
+                    buffer = io.BytesIO()
+                    image.save(buffer, 'JPEG', quality=85)
+            except (OSError, ValueError):
+                skipped.append(scan.id)
+                continue
+            archive.writestr(f'{scan.id}.jpg', buffer.getvalue())
+    return skipped
@@ -0,0 +1,96 @@
+import heapq
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import F
+from django.db.models.functions import Collate
+
+from eyecare.uploads import sharded_fields
+
+# Collations that sort strings by code point, matching Python's str ordering
+BINARY_COLLATIONS = {'postgresql': 'C', 'mysql': 'utf8mb4_bin'}
+
+
+def walk(directory, relative=''):
+    """
+    (name, DirEntry) for every file under `directory`, in code-point order
+    of the full relative name. Only one directory listing is held at a time;
+    sharded directories keep each one small.
+    """
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return
+    # Sort "dir/" rather than "dir" so "dir.jpg" < "dir/x.jpg", as in the full names
+    entries.sort(key=lambda entry: entry.name + '/' if entry.is_dir(follow_symlinks=False) else entry.name)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            yield from walk(entry.path, f'{relative}{entry.name}/')
+        elif entry.is_file(follow_symlinks=False):
+            yield relative + entry.name, entry
+
+
+def referenced_names(model, field, prefix, chunk_size):
+    """Names stored under `prefix`, sorted by the database in code-point order"""
+    queryset = model._default_manager.filter(**{f'{field.attname}__startswith': prefix})
+    vendor = connections[queryset.db].vendor
+    if vendor in BINARY_COLLATIONS:
+        queryset = queryset.order_by(Collate(F(field.attname), BINARY_COLLATIONS[vendor]))
+    else:
+        # SQLite compares TEXT with memcmp on UTF-8 by default, which is code-point order
+        queryset = queryset.order_by(field.attname)
+    return queryset.values_list(field.attname, flat=True).iterator(chunk_size=chunk_size)
+
+
+class Command(BaseCommand):
+    help = ("Find uploaded files that no row references any more, by merging a sorted walk of "
+            "each upload directory with the sorted names in the database")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete', action='store_true', help="Delete the orphans (default: only report them)")
+        parser.add_argument('--min-age-hours', type=float, default=24,
+                            help="Leave newer files alone; an upload's row may not have committed yet")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--list', dest='list_files', action='store_true', help="Print each orphan")
+
+    def handle(self, *args, **options):
+        prefixes = {}
+        for model, field in sharded_fields():
+            prefixes.setdefault((field.storage, field.upload_to.prefix), []).append((model, field))
+        cutoff = time.time() - options['min_age_hours'] * 3600
+
+        for (storage, prefix), fields in prefixes.items():
+            try:
+                root = storage.path(prefix)
+            except NotImplementedError:
+                raise CommandError(f"{prefix} is not on a local filesystem; use the storage's lifecycle rules")
+            refs = heapq.merge(*(referenced_names(model, field, prefix, options['chunk_size'])
+                                 for model, field in fields))
+            ref = next(refs, None)
+            files = orphans = young = 0
+            reclaimed = 0
+            for relative, entry in walk(root):
+                files += 1
+                name = prefix + relative
+                while ref is not None and ref < name:
+                    ref = next(refs, None)
+                if ref == name:
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime > cutoff:
+                    young += 1
+                    continue
+                orphans += 1
+                reclaimed += stat.st_size
+                if options['list_files']:
+                    self.stdout.write(name)
+                if options['delete']:
+                    storage.delete(name)
+
+            verb = 'deleted' if options['delete'] else 'found'
+            self.stdout.write(self.style.SUCCESS(
+                f"{prefix}: {files} files, {verb} {orphans} orphans ({reclaimed / 2 ** 20:.1f} MB), "
+                f"{young} newer than {options['min_age_hours']:g}h skipped"
+            ))
@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scans.ml import registry
+from scans.ml.runtime import Network, quantize
+from scans.models import EyeScan
+
+
+class Command(BaseCommand):
+    help = "Install classifier weights (.npz) and their architecture (.json) as a new model version"
+
+    def add_arguments(self, parser):
+        parser.add_argument('weights', help=".npz of tensors named <layer>.weight / <layer>.bias")
+        parser.add_argument('spec', help="JSON with input_size, labels, layers and optional mean/std")
+        parser.add_argument('model_version', help="Version label, e.g. 2025-06-01 or v3")
+        parser.add_argument('--name', default=settings.SCAN_MODEL_NAME)
+        parser.add_argument('--quantize', action='store_true', help="Store conv/dense weights as int8")
+        parser.add_argument('--no-activate', action='store_true', help="Install without switching to it")
+
+    def handle(self, *args, **options):
+        with open(options['spec']) as fh:
+            meta = json.load(fh)
+        with np.load(options['weights']) as npz:
+            tensors = {key: npz[key] for key in npz.files}
+
+        conditions = {value for value, _ in EyeScan.CONDITION_CHOICES}
+        unknown = set(meta.get('labels', [])) - conditions
+        if unknown:
+            raise CommandError(f"Labels not in EyeScan.CONDITION_CHOICES: {', '.join(sorted(unknown))}")
+        if options['quantize']:
+            tensors = quantize(tensors, meta)
+
+        name, version = options['name'], options['model_version']
+        try:
+            registry.save_model(name, version, tensors, meta=meta, activate_now=False)
+        except (FileExistsError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        # Run a blank image through before any worker can switch to it
+        try:
+            network = Network(registry.LoadedModel(name, version))
+            probs = network.forward(np.zeros((1, network.input_size, network.input_size, 3), np.float32))
+        except (KeyError, ValueError) as exc:
+            raise CommandError(f"{name} {version} is installed but does not run: {exc!r}")
+        if probs.shape != (1, len(network.labels)):
+            raise CommandError(f"{name} {version} outputs {probs.shape[1]} classes for {len(network.labels)} labels")
+
+        if not options['no_activate']:
+            registry.activate(name, version)
+        size = sum(array.nbytes for array in tensors.values())
+        state = 'installed' if options['no_activate'] else 'installed and activated'
+        self.stdout.write(self.style.SUCCESS(f"{name} {version} {state} ({size / 1024:.1f} KB)"))
@@ -0,0 +1,40 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from scans.ml import registry
+
+
+class Command(BaseCommand):
+    help = "List model versions in ML_MODEL_DIR or switch the active one (workers pick it up without a restart)"
+
+    def add_arguments(self, parser):
+        subcommands = parser.add_subparsers(dest='subcommand', required=True)
+        subcommands.add_parser('list', help="Show every model, its versions and the active one")
+        activate = subcommands.add_parser('activate', help="Make a version the active one")
+        activate.add_argument('name')
+        activate.add_argument('version')
+
+    def handle(self, *args, **options):
+        if options['subcommand'] == 'activate':
+            try:
+                registry.activate(options['name'], options['version'])
+            except registry.ModelNotFound as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(self.style.SUCCESS(
+                f"{options['name']} -> {options['version']}; workers switch within "
+                f"{settings.ML_MODEL_CHECK_SECONDS}s"))
+            return
+
+        root = settings.ML_MODEL_DIR
+        names = sorted(os.listdir(root)) if os.path.isdir(root) else []
+        if not names:
+            self.stdout.write(f"No models in {root}")
+        for name in names:
+            active = registry.current_version(name)
+            self.stdout.write(name)
+            for version in registry.versions(name):
+                size = os.path.getsize(os.path.join(registry.model_dir(name), version, registry.WEIGHTS))
+                marker = '*' if version == active else ' '
+                self.stdout.write(f"  {marker} {version:<20} {size / 1e6:8.1f} MB")
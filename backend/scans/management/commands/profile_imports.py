@@ -0,0 +1,80 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter: this process has already imported everything
+STAGES = {
+    'setup': "import django; django.setup()",
+    'urls': "import django; django.setup(); "
+            "from django.urls import get_resolver; get_resolver().url_patterns",
+    'request': "from django.core.wsgi import get_wsgi_application; import io; "
+               "status = []; "
+               "get_wsgi_application()({{'REQUEST_METHOD': 'GET', 'PATH_INFO': {path!r}, 'QUERY_STRING': '', "
+               "'SERVER_NAME': 'localhost', 'SERVER_PORT': '443', 'HTTP_HOST': 'localhost', "
+               "'wsgi.url_scheme': 'https', 'wsgi.input': io.BytesIO()}}, lambda s, h, *a: status.append(s)); "
+               "print('status', status[0])",
+}
+TIMER = "import time; started = time.perf_counter(); {code}; print('elapsed', time.perf_counter() - started)"
+
+
+def parse_importtime(lines):
+    """[(module, self us, cumulative us, depth)] from `python -X importtime` output"""
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|', 2)
+        stripped = name.lstrip()
+        modules.append((stripped.strip(), int(own), int(cumulative), (len(name) - len(stripped) - 1) // 2))
+    return modules
+
+
+class Command(BaseCommand):
+    help = ("Time a cold start in a fresh interpreter with `python -X importtime` and show "
+            "which modules it spends the time importing")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stage', choices=STAGES, default='request',
+                            help="Stop after django.setup(), after loading the URLconf, or after one request")
+        parser.add_argument('--path', default='/health/live/', help="Path requested by the 'request' stage")
+        parser.add_argument('--top', type=int, default=25)
+        parser.add_argument('--by-package', action='store_true', help="Sum the time per top-level package")
+        parser.add_argument('--repeat', type=int, default=3, help="Runs to take the fastest of")
+
+    def handle(self, *args, **options):
+        code = TIMER.format(code=STAGES[options['stage']].format(path=options['path']))
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'eyecare.settings')}
+        best = None
+        for _ in range(max(options['repeat'], 1)):
+            result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=settings.BASE_DIR,
+                                    env=env, capture_output=True, text=True)
+            if result.returncode:
+                raise CommandError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else
+                                   f"exited with {result.returncode}")
+            output = dict(line.split(' ', 1) for line in result.stdout.splitlines() if ' ' in line)
+            elapsed = float(output['elapsed'])
+            if best is None or elapsed < best[0]:
+                best = (elapsed, output, parse_importtime(result.stderr.splitlines()))
+
+        elapsed, output, modules = best
+        imported = sum(own for _, own, _, _ in modules)
+        summary = f"{options['stage']}: {elapsed * 1000:.0f} ms, {len(modules)} modules, {imported / 1000:.0f} ms importing"
+        if 'status' in output:
+            summary += f", {options['path']} answered {output['status']}"
+        self.stdout.write(self.style.SUCCESS(summary))
+
+        if options['by_package']:
+            totals = defaultdict(int)
+            for name, own, _, _ in modules:
+                totals[name.split('.')[0]] += own
+            rows = sorted(totals.items(), key=lambda item: -item[1])[:options['top']]
+            for package, own in rows:
+                self.stdout.write(f"{own / 1000:8.1f} ms  {package}")
+        elif options['top']:
+            self.stdout.write(f"{'self':>8}  {'cumulative':>10}  module")
+            for name, own, cumulative, depth in sorted(modules, key=lambda m: -m[2])[:options['top']]:
+                self.stdout.write(f"{own / 1000:8.1f}  {cumulative / 1000:10.1f}  {'  ' * depth}{name}")
@@ -0,0 +1,147 @@
+import json
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from analytics.rollups import bump, local_day
+from scans import analysis, timeline
+from scans.models import EyeScan
+
+STATE_FILE = '.reanalyze_state.json'
+FIELDS = ('condition_detected', 'confidence_score', 'recommendations', 'analyzer_version')
+
+
+class Command(BaseCommand):
+    help = "Re-run the active classifier over scans analysed by an older model version"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=256, help="Scans per transaction and checkpoint")
+        parser.add_argument('--batch-size', type=int, default=32, help="Images per inference batch")
+        parser.add_argument('--cpu-budget', type=float, default=0.5,
+                            help="Share of one core to use; the job sleeps between chunks to stay under it")
+        parser.add_argument('--limit', type=int, help="Stop after this many scans")
+        parser.add_argument('--state-file', default=os.path.join(settings.ML_MODEL_DIR, STATE_FILE))
+        parser.add_argument('--restart', action='store_true', help="Ignore the checkpoint and start from the first scan")
+
+    def handle(self, *args, **options):
+        if not 0 < options['cpu_budget'] <= 1:
+            raise CommandError("--cpu-budget must be between 0 and 1")
+        version = analysis.analyzer_version()
+        if version == analysis.MOCK_VERSION:
+            raise CommandError(f"No {settings.SCAN_MODEL_NAME} model is installed; nothing to re-analyse with")
+
+        state = self.load_state(options['state_file'])
+        if options['restart'] or state.get('finished_at') or state.get('analyzer_version') != version:
+            state = {'analyzer_version': version, 'last_id': 0, 'processed': 0, 'changed': 0,
+                     'started_at': timezone.now().isoformat()}
+        elif state.get('last_id'):
+            self.stdout.write(f"Resuming {version} after scan {state['last_id']}")
+
+        # Scans already carrying this version are skipped, so the checkpoint is only
+        # a shortcut: losing it costs a rescan of ids, never a second inference
+        pending = EyeScan.objects.exclude(analyzer_version=version).order_by('id')
+        remaining, finished = options['limit'], False
+        while remaining is None or remaining > 0:
+            size = options['chunk_size'] if remaining is None else min(options['chunk_size'], remaining)
+            chunk = list(pending.filter(id__gt=state['last_id'])
+                         .only('id', 'user_id', 'image', 'created_at', *FIELDS)[:size])
+            if not chunk:
+                finished = True
+                break
+            wall, cpu = time.monotonic(), time.process_time()
+
+            changed = self.reanalyze(chunk, options['batch_size'])
+            state['last_id'] = chunk[-1].pk
+            state['processed'] += len(chunk)
+            state['changed'] += changed
+            self.save_state(options['state_file'], state)
+            if remaining is not None:
+                remaining -= len(chunk)
+            self.stdout.write(f"Scan {state['last_id']}: {state['processed']} processed, {state['changed']} changed")
+
+            # Sleep long enough that this chunk averaged cpu_budget of a core
+            cpu = time.process_time() - cpu
+            pause = cpu / options['cpu_budget'] - (time.monotonic() - wall)
+            if pause > 0:
+                time.sleep(pause)
+
+        state['finished_at'] = timezone.now().isoformat() if finished else None
+        self.save_state(options['state_file'], state)
+        self.stdout.write(self.style.SUCCESS(
+            f"{state['processed']} scans re-analysed with {version}, {state['changed']} changed condition"
+        ))
+
+    def reanalyze(self, scans, batch_size):
+        """Classify `scans` in batches and save them in one transaction; returns how many changed condition"""
+        results = {}
+        for start in range(0, len(scans), batch_size):
+            batch, files = [], []
+            try:
+                for scan in scans[start:start + batch_size]:
+                    try:
+                        files.append(scan.image.open('rb'))
+                        batch.append(scan)
+                    except OSError:
+                        self.stderr.write(f"Skipping scan {scan.pk}: image missing")
+                if batch:
+                    results.update(zip((scan.pk for scan in batch), self.analyze(batch, files)))
+            finally:
+                for image_file in files:
+                    image_file.close()
+
+        updated, moves, changed = [], Counter(), 0
+        for scan in scans:
+            result = results.get(scan.pk)
+            if result is None:
+                continue
+            if result['condition_detected'] != scan.condition_detected:
+                changed += 1
+                day = local_day(scan.created_at)
+                moves[(day, scan.condition_detected)] -= 1
+                moves[(day, result['condition_detected'])] += 1
+            for field, value in result.items():
+                setattr(scan, field, value)
+            updated.append(scan)
+
+        # bulk_update skips the post_save signals that keep the analytics rollups
+        # and patient timelines current
+        with transaction.atomic():
+            EyeScan.objects.bulk_update(updated, FIELDS)
+            for (day, condition), count in moves.items():
+                if count:
+                    bump(day, 'scans', condition, count=count)
+        timeline.refresh(scan.user_id for scan in updated)
+        return changed
+
+    def analyze(self, batch, files):
+        try:
+            return analysis.analyze_batch(files)
+        except OSError:
+            # An unreadable image fails the whole batch; retry one by one to skip it
+            results = []
+            for scan, image_file in zip(batch, files):
+                try:
+                    results.append(analysis.analyze(image_file))
+                except OSError:
+                    self.stderr.write(f"Skipping scan {scan.pk}: image unreadable")
+                    results.append(None)
+            return results
+
+    def load_state(self, path):
+        try:
+            with open(path) as fh:
+                return json.load(fh)
+        except FileNotFoundError:
+            return {}
+
+    def save_state(self, path, state):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as fh:
+            json.dump(state, fh, indent=2)
+        os.replace(tmp, path)
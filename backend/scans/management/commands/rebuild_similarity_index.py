@@ -0,0 +1,81 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max
+
+from scans import similarity
+from scans.models import EyeScan, ScanReview
+
+
+class Command(BaseCommand):
+    help = "Embed every reviewed scan and swap in a fresh similar-case index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=64)
+        parser.add_argument('--lists', type=int,
+                            help="IVF clusters (default sqrt(N) past SIMILARITY_IVF_MIN scans, 0 for brute force)")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        # Reviews committed after this point are appended once the new build is live
+        snapshot = ScanReview.objects.aggregate(last=Max('id'))['last'] or 0
+        scans = EyeScan.objects.filter(scanreview__id__lte=snapshot).only('id', 'image').order_by('id')
+
+        embedder_name, _ = similarity.embedder()
+        ids, blocks = [], []
+        batch = []
+        for scan in scans.iterator(chunk_size=2000):
+            batch.append(scan)
+            if len(batch) == options['batch_size']:
+                self._embed(batch, embedder_name, ids, blocks)
+                batch = []
+        if batch:
+            self._embed(batch, embedder_name, ids, blocks)
+        if not ids:
+            raise CommandError("No reviewed scans with readable images to index")
+
+        vectors = np.concatenate(blocks)
+        build = similarity.write_build(settings.SIMILARITY_INDEX_DIR, embedder_name, vectors, ids,
+                                       lists=options['lists'])
+
+        late = ScanReview.objects.filter(id__gt=snapshot).select_related('scan')
+        for review in late:
+            similarity.add_scan(review.scan)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {len(ids) + len(late)} scans with {embedder_name} into {build} "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def _embed(self, batch, embedder_name, ids, blocks):
+        files, kept = [], []
+        try:
+            for scan in batch:
+                try:
+                    files.append(scan.image.open('rb'))
+                    kept.append(scan.pk)
+                except OSError:
+                    self.stderr.write(f"Skipping scan {scan.pk}: image missing")
+            if not files:
+                return
+            try:
+                name, vectors = similarity.embed(files)
+            except OSError:
+                # One unreadable image: fall back to one at a time to find it
+                name, rows = embedder_name, []
+                for scan_id, image_file in zip(list(kept), files):
+                    try:
+                        rows.append(similarity.embed([image_file])[1])
+                    except OSError:
+                        self.stderr.write(f"Skipping scan {scan_id}: image unreadable")
+                        kept.remove(scan_id)
+                vectors = np.concatenate(rows) if rows else None
+        finally:
+            for image_file in files:
+                image_file.close()
+        if name != embedder_name:
+            raise CommandError("The active model changed during the rebuild; run it again")
+        if vectors is not None and len(kept):
+            ids.extend(kept)
+            blocks.append(vectors.astype(np.float16))
@@ -0,0 +1,64 @@
+import os
+import shutil
+
+from django.core.management.base import BaseCommand
+
+from eyecare.uploads import content_hash, is_sharded, sharded_fields, sharded_name
+
+
+class Command(BaseCommand):
+    help = "Move uploads saved before ShardedUploadTo into the sharded, content-hashed layout"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Only count the files that would move")
+
+    def handle(self, *args, **options):
+        for model, field in sharded_fields():
+            moved = missing = 0
+            label = f"{model._meta.label}.{field.name}"
+            rows = (model._default_manager.exclude(**{field.attname: ''}).exclude(**{f'{field.attname}__isnull': True})
+                    .order_by('pk').values_list('pk', field.attname))
+            last = None
+            while True:
+                batch = list((rows.filter(pk__gt=last) if last is not None else rows)[:options['batch_size']])
+                if not batch:
+                    break
+                last = batch[-1][0]
+                for pk, name in batch:
+                    if is_sharded(field.upload_to.prefix, name):
+                        continue
+                    if not field.storage.exists(name):
+                        missing += 1
+                        self.stderr.write(f"{label} {pk}: {name} is missing")
+                        continue
+                    if not options['dry_run']:
+                        self.move(model, field, pk, name)
+                    moved += 1
+            verb = 'would move' if options['dry_run'] else 'moved'
+            self.stdout.write(self.style.SUCCESS(f"{label}: {verb} {moved} files, {missing} missing"))
+
+    def move(self, model, field, pk, name):
+        """
+        Put the file at its sharded name, repoint the row, then drop the old
+        name; a crash part-way leaves at worst an extra copy for
+        collect_orphan_media, never a row without its file.
+        """
+        storage = field.storage
+        with storage.open(name, 'rb') as source:
+            new = storage.get_available_name(sharded_name(field.upload_to.prefix, content_hash(source), name))
+            try:
+                target = storage.path(new)
+            except NotImplementedError:
+                new = storage.save(new, source)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                try:
+                    # Same filesystem: a hard link moves nothing and is atomic
+                    os.link(storage.path(name), target)
+                except OSError:
+                    shutil.copy2(storage.path(name), target)
+
+        updated = model._default_manager.filter(pk=pk, **{field.attname: name}).update(**{field.attname: new})
+        # The row changed or went away meanwhile: keep its current file, drop the copy
+        storage.delete(name if updated else new)
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scans', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eyescan',
+            name='quality_brightness',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='eyescan',
+            name='quality_eye_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='eyescan',
+            name='quality_issues',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='eyescan',
+            name='quality_sharpness',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
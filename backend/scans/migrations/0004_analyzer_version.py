@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scans', '0003_quality_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='eyescan',
+            name='analyzer_version',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=100),
+        ),
+    ]
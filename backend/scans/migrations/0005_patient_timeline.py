@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scans', '0004_analyzer_version'),
+        ('users', '0003_directory_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PatientTimeline',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='scan_timeline', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('scan_count', models.PositiveIntegerField(default=0)),
+                ('reviewed_count', models.PositiveIntegerField(default=0)),
+                ('first_scan_at', models.DateTimeField(blank=True, null=True)),
+                ('last_scan_at', models.DateTimeField(blank=True, null=True)),
+                ('latest_condition', models.CharField(blank=True, default='', max_length=50)),
+                ('condition_counts', models.JSONField(default=dict)),
+                ('transition_count', models.PositiveIntegerField(default=0)),
+                ('confidence_mean', models.FloatField(blank=True, null=True)),
+                ('confidence_trend', models.FloatField(blank=True, null=True)),
+                ('points', models.JSONField(default=list)),
+                ('transitions', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
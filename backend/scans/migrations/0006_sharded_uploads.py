@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:47
+
+import eyecare.uploads
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scans', '0005_patient_timeline'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eyescan',
+            name='image',
+            field=models.ImageField(db_index=True, upload_to=eyecare.uploads.ShardedUploadTo('eye_scans/')),
+        ),
+    ]
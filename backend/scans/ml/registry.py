@@ -0,0 +1,251 @@
+"""
+On-disk model registry shared by all gunicorn workers.
+
+Each model version is a directory holding one flat `weights.bin` (every
+tensor at a 64-byte aligned offset) and a `manifest.json` describing the
+tensors. Workers map the file with numpy.memmap instead of reading it, so
+the weights live once in the page cache however many workers there are,
+and a worker only pays for the pages it touches.
+
+    ML_MODEL_DIR/
+        <name>/
+            CURRENT            -> "<version>"
+            <version>/
+                manifest.json
+                weights.bin
+
+Models load lazily on first use. `CURRENT` is re-read at most every
+ML_MODEL_CHECK_SECONDS, so activating another version (save_model, or
+`manage.py model_registry activate`) swaps it into every worker without a
+restart; requests already holding the old version finish with it.
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+FORMAT = 1
+ALIGN = 64
+WEIGHTS = 'weights.bin'
+MANIFEST = 'manifest.json'
+CURRENT = 'CURRENT'
+VERSION_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]*$')
+MAPPING_RE = re.compile(r'^[0-9a-f]+-[0-9a-f]+ ')
+
+
+class ModelNotFound(Exception):
+    """Raised when a model, or the requested version of it, is not on disk"""
+
+
+def model_dir(name):
+    return os.path.join(settings.ML_MODEL_DIR, name)
+
+
+def versions(name):
+    root = model_dir(name)
+    if not os.path.isdir(root):
+        return []
+    return sorted(entry for entry in os.listdir(root)
+                  if os.path.isfile(os.path.join(root, entry, MANIFEST)))
+
+
+def current_version(name):
+    try:
+        with open(os.path.join(model_dir(name), CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def activate(name, version):
+    """Point CURRENT at `version`; workers pick it up on their next check"""
+    if version not in versions(name):
+        raise ModelNotFound(f"{name} has no version {version!r}")
+    fd, tmp = tempfile.mkstemp(dir=model_dir(name), prefix='.CURRENT-')
+    with os.fdopen(fd, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp, os.path.join(model_dir(name), CURRENT))
+
+
+def save_model(name, version, tensors, meta=None, activate_now=True):
+    """
+    Write `tensors` (name -> ndarray) as a new version of model `name`.
+
+    The version is written to a temporary directory and renamed into place,
+    so workers never see a half-written model.
+    """
+    import numpy as np
+
+    if not VERSION_RE.match(version) or not VERSION_RE.match(name):
+        raise ValueError("Model names and versions may only use letters, digits, '.', '_' and '-'")
+    root = model_dir(name)
+    os.makedirs(root, exist_ok=True)
+    target = os.path.join(root, version)
+    if os.path.exists(target):
+        raise FileExistsError(f"{name} {version} already exists")
+
+    staging = tempfile.mkdtemp(dir=root, prefix=f'.{version}-')
+    try:
+        entries, offset = {}, 0
+        with open(os.path.join(staging, WEIGHTS), 'wb') as f:
+            for key, array in tensors.items():
+                array = np.ascontiguousarray(array)
+                padding = -offset % ALIGN
+                f.write(b'\0' * padding)
+                offset += padding
+                entries[key] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+                f.write(array.tobytes())
+                offset += array.nbytes
+        manifest = {
+            'format': FORMAT,
+            'name': name,
+            'version': version,
+            'created_at': timezone.now().isoformat(),
+            'tensors': entries,
+            'meta': meta or {},
+        }
+        with open(os.path.join(staging, MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if activate_now:
+        activate(name, version)
+    return target
+
+
+class LoadedModel:
+    """One mapped model version: read-only tensors plus its manifest metadata"""
+
+    def __init__(self, name, version):
+        # NumPy is imported here rather than at the top so workers that have
+        # served no scans never load it
+        import numpy as np
+
+        path = os.path.join(model_dir(name), version)
+        started = time.perf_counter()
+        try:
+            with open(os.path.join(path, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            raise ModelNotFound(f"{name} {version} is missing its manifest")
+        if manifest.get('format') != FORMAT:
+            raise ModelNotFound(f"{name} {version} has unsupported format {manifest.get('format')}")
+
+        self.name = name
+        self.version = version
+        self.meta = manifest.get('meta', {})
+        self.weights_path = os.path.join(path, WEIGHTS)
+        size = os.path.getsize(self.weights_path)
+        self._map = np.memmap(self.weights_path, dtype=np.uint8, mode='r') if size else np.zeros(0, np.uint8)
+        self.tensors = {
+            key: np.ndarray(tuple(entry['shape']), dtype=np.dtype(entry['dtype']), buffer=self._map,
+                            offset=entry['offset'])
+            for key, entry in manifest['tensors'].items()
+        }
+        self.nbytes = size
+        self.load_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.loaded_at = timezone.now()
+
+    def __getitem__(self, key):
+        return self.tensors[key]
+
+
+def _mapped_memory(path):
+    """Resident and shared kB of a mapped file in this process, from /proc/self/smaps"""
+    totals = {'rss_kb': 0, 'shared_kb': 0}
+    try:
+        with open('/proc/self/smaps') as f:
+            in_mapping = False
+            for line in f:
+                parts = line.split(maxsplit=5)
+                if MAPPING_RE.match(line):
+                    in_mapping = len(parts) == 6 and parts[5].rstrip('\n') == path
+                elif in_mapping and parts[0] == 'Rss:':
+                    totals['rss_kb'] += int(parts[1])
+                elif in_mapping and parts[0] in ('Shared_Clean:', 'Shared_Dirty:'):
+                    totals['shared_kb'] += int(parts[1])
+    except OSError:
+        return None
+    return totals
+
+
+def _process_rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class ModelRegistry:
+    """Per-process cache of the active version of each model"""
+
+    def __init__(self, check_seconds):
+        self.check_seconds = check_seconds
+        self._models = {}
+        self._checked = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """The active version of `name`, loading or swapping it if needed"""
+        now = time.monotonic()
+        model = self._models.get(name)
+        if model is not None and now - self._checked.get(name, 0) < self.check_seconds:
+            return model
+
+        with self._lock:
+            model = self._models.get(name)
+            version = current_version(name)
+            self._checked[name] = now
+            if version is None:
+                if model is not None:
+                    return model
+                raise ModelNotFound(f"No active version of {name} in {settings.ML_MODEL_DIR}")
+            if model is None or model.version != version:
+                model = LoadedModel(name, version)
+                self._models[name] = model
+            return model
+
+    def stats(self):
+        models = {}
+        for name, model in list(self._models.items()):
+            models[name] = {
+                'version': model.version,
+                'bytes': model.nbytes,
+                'load_ms': model.load_ms,
+                'loaded_at': model.loaded_at.isoformat(),
+                'mapped': _mapped_memory(model.weights_path),
+            }
+        return {'pid': os.getpid(), 'rss_kb': _process_rss_kb(), 'models': models}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(settings.ML_MODEL_CHECK_SECONDS)
+        return _registry
+
+
+def get_model(name):
+    return get_registry().get(name)
+
+
+def stats():
+    return get_registry().stats()
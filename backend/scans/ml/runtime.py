@@ -0,0 +1,174 @@
+"""
+Small CPU inference runtime for the scan classifier, in plain NumPy.
+
+Convolutions are lowered to one matrix multiply each (im2col), so nearly
+all the time is spent in NumPy's BLAS. Activations are NHWC float32.
+
+The architecture lives in the registry manifest's meta, next to the weights:
+
+    {
+        "input_size": 96,
+        "mean": [0.5, 0.5, 0.5], "std": [0.25, 0.25, 0.25],
+        "labels": ["cataract", "redness", ...],
+        "layers": [
+            {"op": "conv", "name": "conv1", "stride": 1, "pad": 1},
+            {"op": "relu"},
+            {"op": "maxpool", "size": 2},
+            ...
+            {"op": "gap"},
+            {"op": "dense", "name": "fc"}
+        ]
+    }
+
+`conv` layers read `<name>.weight` shaped (kh, kw, in, out) and `<name>.bias`;
+`dense` layers read `<name>.weight` shaped (in, out) and `<name>.bias`. A
+softmax over the labels always ends the network.
+
+Weights can be stored int8 with a float32 scale per output channel
+(`<name>.weight.scale`, see `quantize`). That quarters their size on disk and
+in the page cache; matmuls still run in float32 BLAS, with the scale applied
+to the layer output.
+"""
+import numpy as np
+from PIL import Image
+
+OPS = ('conv', 'relu', 'maxpool', 'gap', 'dense')
+
+
+def im2col(x, kh, kw, stride=1, pad=0):
+    """(N, H, W, C) -> ((N*OH*OW, kh*kw*C), OH, OW) patches in kernel (kh, kw, C) order"""
+    if pad:
+        x = np.pad(x, ((0, 0), (pad, pad), (pad, pad), (0, 0)))
+    n, h, w, c = x.shape
+    windows = np.lib.stride_tricks.sliding_window_view(x, (kh, kw), axis=(1, 2))[:, ::stride, ::stride]
+    oh, ow = windows.shape[1], windows.shape[2]
+    cols = windows.transpose(0, 1, 2, 4, 5, 3).reshape(n * oh * ow, kh * kw * c)
+    return cols, oh, ow
+
+
+def conv2d(x, weight, bias, stride=1, pad=0, scale=None):
+    kh, kw, cin, cout = weight.shape
+    cols, oh, ow = im2col(x, kh, kw, stride, pad)
+    out = cols @ weight.reshape(kh * kw * cin, cout).astype(np.float32, copy=False)
+    if scale is not None:
+        out *= scale
+    out += bias
+    return out.reshape(x.shape[0], oh, ow, cout)
+
+
+def maxpool2d(x, size=2):
+    n, h, w, c = x.shape
+    oh, ow = h // size, w // size
+    x = x[:, :oh * size, :ow * size]
+    return x.reshape(n, oh, size, ow, size, c).max(axis=(2, 4))
+
+
+def dense(x, weight, bias, scale=None):
+    out = x @ weight.astype(np.float32, copy=False)
+    if scale is not None:
+        out *= scale
+    return out + bias
+
+
+def softmax(x):
+    x = x - x.max(axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= x.sum(axis=-1, keepdims=True)
+    return x
+
+
+def quantize(tensors, meta, keep_head=True):
+    """
+    Int8 copies of the conv/dense weights in `tensors`, symmetric per output
+    channel; biases and everything else are kept as they are.
+
+    With `keep_head`, the final dense layer stays float32: it is a tiny share
+    of the weights and the most sensitive to rounding.
+    """
+    layers = [layer for layer in meta['layers'] if layer['op'] in ('conv', 'dense')]
+    if keep_head and layers and layers[-1]['op'] == 'dense':
+        layers = layers[:-1]
+    weights = {f"{layer['name']}.weight" for layer in layers}
+    out = {}
+    for key, array in tensors.items():
+        if key not in weights:
+            out[key] = array
+            continue
+        array = np.asarray(array, dtype=np.float32)
+        reduce_axes = tuple(range(array.ndim - 1))
+        scale = np.abs(array).max(axis=reduce_axes) / 127
+        scale[scale == 0] = 1
+        out[key] = np.clip(np.rint(array / scale), -127, 127).astype(np.int8)
+        out[key + '.scale'] = scale.astype(np.float32)
+    return out
+
+
+class Network:
+    """A classifier built from a registry model (scans.ml.registry.LoadedModel)"""
+
+    def __init__(self, model):
+        meta = model.meta
+        for layer in meta['layers']:
+            if layer['op'] not in OPS:
+                raise ValueError(f"Unknown layer op {layer['op']!r} in {model.name} {model.version}")
+        self.model = model
+        self.layers = meta['layers']
+        self.labels = meta['labels']
+        self.input_size = meta['input_size']
+        self.mean = np.asarray(meta.get('mean', [0.0, 0.0, 0.0]), dtype=np.float32)
+        self.std = np.asarray(meta.get('std', [1.0, 1.0, 1.0]), dtype=np.float32)
+
+    def _params(self, name):
+        tensors = self.model.tensors
+        return tensors[f'{name}.weight'], tensors[f'{name}.bias'], tensors.get(f'{name}.weight.scale')
+
+    def forward(self, batch):
+        """(N, size, size, 3) normalised float32 -> (N, labels) probabilities"""
+        return softmax(self._run(batch, self.layers))
+
+    def embed(self, batch):
+        """Unit-length features from the layer before the final dense layer"""
+        head = len(self.layers)
+        while head and self.layers[head - 1]['op'] != 'dense':
+            head -= 1
+        x = self._run(batch, self.layers[:head - 1] if head else self.layers)
+        x = x.reshape(x.shape[0], -1)
+        return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+    def _run(self, batch, layers):
+        x = batch
+        for layer in layers:
+            op = layer['op']
+            if op == 'conv':
+                weight, bias, scale = self._params(layer['name'])
+                x = conv2d(x, weight, bias, layer.get('stride', 1), layer.get('pad', 0), scale)
+            elif op == 'relu':
+                x = np.maximum(x, 0, out=x)
+            elif op == 'maxpool':
+                x = maxpool2d(x, layer.get('size', 2))
+            elif op == 'gap':
+                x = x.mean(axis=(1, 2))
+            elif op == 'dense':
+                weight, bias, scale = self._params(layer['name'])
+                x = dense(x.reshape(x.shape[0], -1), weight, bias, scale)
+        return x
+
+    def preprocess(self, image_file):
+        """Decode, square-resize and normalise one image to (size, size, 3)"""
+        size = self.input_size
+        try:
+            image = Image.open(image_file)
+            image.draft('RGB', (size, size))
+            image = image.convert('RGB').resize((size, size), Image.BILINEAR)
+        finally:
+            if hasattr(image_file, 'seek'):
+                image_file.seek(0)
+        pixels = np.asarray(image, dtype=np.float32) / 255
+        return (pixels - self.mean) / self.std
+
+    def predict(self, image_files):
+        """[(label, probability)] for each image, in order"""
+        batch = np.stack([self.preprocess(f) for f in image_files])
+        probs = self.forward(batch)
+        best = probs.argmax(axis=1)
+        return [(self.labels[i], float(probs[row, i])) for row, i in enumerate(best)]
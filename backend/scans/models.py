@@ -1,4 +1,5 @@
 from django.db import models
+from eyecare.uploads import ShardedUploadTo
 from users.models import CustomUser
 
 class EyeScan(models.Model):
@@ -12,12 +13,21 @@ class EyeScan(models.Model):
     )
     
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
-    image = models.ImageField(upload_to='eye_scans/')
+    # Indexed for image authorization lookups and the orphan collector's sorted scan
+    image = models.ImageField(upload_to=ShardedUploadTo('eye_scans/'), db_index=True)
     condition_detected = models.CharField(max_length=50, choices=CONDITION_CHOICES)
     confidence_score = models.FloatField()
     recommendations = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     is_reviewed = models.BooleanField(default=False)
+    # Image-quality gate scores (scans/quality.py); empty for scans uploaded before the gate
+    quality_sharpness = models.FloatField(null=True, blank=True)
+    quality_brightness = models.FloatField(null=True, blank=True)
+    quality_eye_score = models.FloatField(null=True, blank=True)
+    quality_issues = models.CharField(max_length=100, blank=True, default='')
+    # Model that produced condition_detected (scans/analysis.py); empty for scans analysed
+    # before versions were recorded. `manage.py reanalyze_scans` brings old scans up to date
+    analyzer_version = models.CharField(max_length=100, blank=True, default='', db_index=True)
     
     def __str__(self):
         return f"Scan {self.id} - {self.condition_detected}"
@@ -28,3 +38,30 @@ class ScanReview(models.Model):
     diagnosis = models.TextField()
     recommendations = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+
+class PatientTimeline(models.Model):
+    """
+    Materialized summary of one patient's scan history (scans/timeline.py).
+
+    Updated in place as scans are uploaded and reviewed, so the timeline
+    endpoint reads a single row however many scans the patient has. Counts
+    cover the whole history; `points` and `transitions` keep the most recent
+    TIMELINE_MAX_POINTS entries, oldest first.
+    """
+    user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='scan_timeline')
+    scan_count = models.PositiveIntegerField(default=0)
+    reviewed_count = models.PositiveIntegerField(default=0)
+    first_scan_at = models.DateTimeField(null=True, blank=True)
+    last_scan_at = models.DateTimeField(null=True, blank=True)
+    latest_condition = models.CharField(max_length=50, blank=True, default='')
+    condition_counts = models.JSONField(default=dict)
+    transition_count = models.PositiveIntegerField(default=0)
+    # Mean confidence over all scans, and its change per scan over the last TIMELINE_TREND_SCANS
+    confidence_mean = models.FloatField(null=True, blank=True)
+    confidence_trend = models.FloatField(null=True, blank=True)
+    points = models.JSONField(default=list)
+    transitions = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Timeline of {self.user} ({self.scan_count} scans)"
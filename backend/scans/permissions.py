@@ -0,0 +1,7 @@
+from .models import EyeScan
+
+def can_view_scan_image(user, name):
+    """Specialists and admins see every scan image, patients only their own"""
+    if user.user_type in ('specialist', 'admin') or user.is_staff:
+        return True
+    return EyeScan.objects.filter(image=name, user=user).exists()
@@ -0,0 +1,102 @@
+"""
+Image-quality gate for uploaded eye scans.
+
+Runs on a greyscale copy downsampled to QUALITY_WORK_SIZE pixels (JPEGs are
+decoded straight at reduced scale), so a check takes a few milliseconds:
+
+* sharpness - variance of the 4-neighbour Laplacian; blur drives it to ~0
+* exposure - mean brightness and the share of crushed or blown-out pixels
+* resolution - the shorter side of the original image
+* eye score - contrast between the darkest compact block (pupil and iris)
+  and the ring around it, via integral images; flat or eye-less photos
+  score near 0
+"""
+import numpy as np
+from django.conf import settings
+from PIL import Image, UnidentifiedImageError
+
+ISSUE_MESSAGES = {
+    'unreadable': 'the file is not a readable image',
+    'low_resolution': 'the image resolution is too low',
+    'blurry': 'the image is blurry',
+    'underexposed': 'the image is too dark',
+    'overexposed': 'the image is too bright',
+    'no_eye': 'no eye could be found in the image',
+}
+
+
+def _box_sums(integral, size):
+    return integral[size:, size:] - integral[:-size, size:] - integral[size:, :-size] + integral[:-size, :-size]
+
+
+def eye_score(pixels):
+    """Best dark-centre/bright-ring contrast over the image, 0..1"""
+    block = max(min(pixels.shape) // 10, 2)
+    integral = np.zeros((pixels.shape[0] + 1, pixels.shape[1] + 1))
+    integral[1:, 1:] = pixels.cumsum(0).cumsum(1)
+    outer = _box_sums(integral, 3 * block)
+    if not outer.size:
+        return 0.0
+    inner = _box_sums(integral, block)[block:block + outer.shape[0], block:block + outer.shape[1]]
+    ring_mean = (outer - inner) / (8 * block * block)
+    return max(float(((ring_mean - inner / (block * block)).max()) / 255), 0.0)
+
+
+def measure(image_file):
+    """Quality scores for an uploaded image, or None if it can't be decoded"""
+    work = settings.QUALITY_WORK_SIZE
+    try:
+        image = Image.open(image_file)
+        width, height = image.size
+        image.draft('L', (work, work))
+        grey = image.convert('L')
+    except (UnidentifiedImageError, OSError, ValueError):
+        return None
+    finally:
+        if hasattr(image_file, 'seek'):
+            image_file.seek(0)
+    grey.thumbnail((work, work))
+    pixels = np.asarray(grey, dtype=np.float32)
+
+    laplacian = (pixels[1:-1, :-2] + pixels[1:-1, 2:] + pixels[:-2, 1:-1] + pixels[2:, 1:-1]
+                 - 4 * pixels[1:-1, 1:-1])
+    return {
+        'width': width,
+        'height': height,
+        # Images of 2px or less have no interior pixels; var() of nothing is NaN,
+        # which would pass every threshold, so they count as fully blurred
+        'sharpness': round(float(laplacian.var()), 2) if laplacian.size else 0.0,
+        'brightness': round(float(pixels.mean()), 2),
+        'clipped': round(float(((pixels < 8) | (pixels > 247)).mean()), 4),
+        'eye_score': round(eye_score(pixels), 4),
+    }
+
+
+def issues_for(scores):
+    """Names of the checks the scores fail, in ISSUE_MESSAGES order"""
+    if scores is None:
+        return ['unreadable']
+    issues = []
+    if min(scores['width'], scores['height']) < settings.QUALITY_MIN_SIDE:
+        issues.append('low_resolution')
+    if scores['sharpness'] < settings.QUALITY_MIN_SHARPNESS:
+        issues.append('blurry')
+    if scores['brightness'] < settings.QUALITY_BRIGHTNESS_RANGE[0]:
+        issues.append('underexposed')
+    elif scores['brightness'] > settings.QUALITY_BRIGHTNESS_RANGE[1] or scores['clipped'] > settings.QUALITY_MAX_CLIPPED:
+        issues.append('overexposed')
+    if scores['eye_score'] < settings.QUALITY_MIN_EYE_SCORE:
+        issues.append('no_eye')
+    return issues
+
+
+def describe(issues):
+    """One sentence for the patient explaining why the photo was refused"""
+    reasons = ', '.join(ISSUE_MESSAGES[issue] for issue in issues)
+    return f"Please retake the photo: {reasons}."
+
+
+def assess(image_file):
+    """Run the gate; returns (scores or None, list of issues)"""
+    scores = measure(image_file)
+    return scores, issues_for(scores)
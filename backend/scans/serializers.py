@@ -1,6 +1,14 @@
 
 from rest_framework import serializers
-from .models import EyeScan, ScanReview
+from eyecare.signing import signed_media_url
+from .models import EyeScan, PatientTimeline, ScanReview
+
+class SignedImageField(serializers.ImageField):
+    """Image field whose URL carries an expiring signature instead of needing a login"""
+    def to_representation(self, value):
+        if not value:
+            return None
+        return signed_media_url(value.name, self.context.get('request'))
 
 class ScanReviewSerializer(serializers.ModelSerializer):
     specialist_name = serializers.CharField(source='specialist.get_full_name', read_only=True)
@@ -28,8 +36,17 @@ class ScanReviewCreateSerializer(serializers.ModelSerializer):
 class EyeScanSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.get_full_name', read_only=True)
     scanreview = ScanReviewSerializer(read_only=True)
+    image = SignedImageField()
     
     class Meta:
         model = EyeScan
         fields = '__all__'
-        read_only_fields = ('user', 'condition_detected', 'confidence_score', 'recommendations', 'created_at')
+        read_only_fields = ('user', 'condition_detected', 'confidence_score', 'recommendations', 'created_at',
+                            'quality_sharpness', 'quality_brightness', 'quality_eye_score', 'quality_issues',
+                            'analyzer_version')
+
+class PatientTimelineSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PatientTimeline
+        fields = '__all__'
+        read_only_fields = [field.name for field in PatientTimeline._meta.fields]
@@ -0,0 +1,46 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from eyecare.uploads import delete_file_on_commit
+
+from . import timeline
+from .models import EyeScan, ScanReview
+
+
+@receiver(post_save, sender=EyeScan)
+def update_timeline_for_scan(sender, instance, created, update_fields=None, **kwargs):
+    if kwargs.get('raw'):
+        return
+    if created:
+        timeline.scan_added(instance)
+    elif update_fields is None or {'condition_detected', 'confidence_score', 'created_at'} & set(update_fields):
+        timeline.refresh_on_commit(instance.user_id)
+
+
+@receiver(post_delete, sender=EyeScan)
+def remove_scan_from_timeline(sender, instance, **kwargs):
+    timeline.refresh_on_commit(instance.user_id)
+
+
+@receiver(post_delete, sender=EyeScan)
+def delete_scan_image(sender, instance, **kwargs):
+    # Also runs for scans deleted by a cascade from their user
+    delete_file_on_commit(instance, 'image')
+
+
+@receiver(post_save, sender=ScanReview)
+def add_review(sender, instance, created, **kwargs):
+    if not created or kwargs.get('raw'):
+        return
+    timeline.scan_reviewed(instance, instance.scan)
+    # Reviewed scans become searchable by `similar` shortly after the review
+    # commits; the embedding runs off the request on a background thread
+    from . import similarity  # NumPy and Pillow, only needed once a review arrives
+    transaction.on_commit(lambda: similarity.enqueue_scan(instance.scan))
+
+
+@receiver(post_delete, sender=ScanReview)
+def remove_review_from_timeline(sender, instance, **kwargs):
+    if instance.scan_id is not None:
+        timeline.refresh_on_commit(EyeScan.objects.filter(pk=instance.scan_id).values_list('user_id', flat=True).first())
@@ -0,0 +1,350 @@
+"""
+Similar-case retrieval over reviewed scans.
+
+Every reviewed scan gets a unit-length embedding: the classifier's pooled
+features when a model is installed (scans/ml), otherwise a 64-value colour
+and brightness descriptor. Embeddings live in SIMILARITY_INDEX_DIR:
+
+    CURRENT              -> "<build>"
+    <build>/
+        meta.json        embedder, dim, list count, rows in the clustered part
+        vectors.f16      float16 rows
+        ids.i64          scan id of each row
+        centroids.f32    IVF list centres (only when clustered)
+        offsets.i64      row range of each list (only when clustered)
+
+`rebuild` embeds every reviewed scan and, past SIMILARITY_IVF_MIN rows,
+clusters them with spherical k-means and stores the rows grouped by list
+(an IVF index). New reviews are embedded on a background thread after
+they commit and appended to the end of the current build. A search scores
+the SIMILARITY_NPROBE lists closest to the query plus every appended row,
+in blocked float32 matmuls.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from PIL import Image
+
+from . import analysis
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTOR = 'descriptor-v1'
+BLOCK_ROWS = 65536
+
+
+class IndexUnavailable(Exception):
+    """No index has been built, or it was built by a different embedder"""
+
+
+# Embeddings
+
+def _descriptor(image_file):
+    """4x4 grid of mean colours plus a 16-bin brightness histogram (64 values)"""
+    try:
+        image = Image.open(image_file)
+        image.draft('RGB', (64, 64))
+        pixels = np.asarray(image.convert('RGB').resize((64, 64)), dtype=np.float32) / 255
+    finally:
+        if hasattr(image_file, 'seek'):
+            image_file.seek(0)
+    grid = pixels.reshape(4, 16, 4, 16, 3).mean(axis=(1, 3)).ravel()
+    histogram = np.histogram(pixels.mean(axis=2), bins=16, range=(0, 1))[0] / (64 * 64)
+    return np.concatenate([grid - grid.mean(), histogram - 1 / 16])
+
+
+def embedder():
+    network = analysis.get_network()
+    if network is None:
+        return DESCRIPTOR, None
+    return f'{network.model.name}:{network.model.version}', network
+
+
+def embed(image_files):
+    """(name of the embedder, (N, dim) float32 unit vectors)"""
+    name, network = embedder()
+    if network is None:
+        vectors = np.stack([_descriptor(f) for f in image_files]).astype(np.float32)
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    else:
+        vectors = network.embed(np.stack([network.preprocess(f) for f in image_files]))
+    return name, vectors.astype(np.float32)
+
+
+# Building
+
+def _assign(vectors, centroids):
+    """Index of the closest centroid for each row, in blocks"""
+    out = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + BLOCK_ROWS], dtype=np.float32)
+        out[start:start + len(block)] = (block @ centroids.T).argmax(axis=1)
+    return out
+
+
+def kmeans(vectors, lists, iterations=10, seed=0):
+    """Spherical k-means centroids, fitted on a sample of ~40 rows per list"""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), lists * 40)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = _assign(sample, centroids)
+        order = np.argsort(assign, kind='stable')
+        present, starts = np.unique(assign[order], return_index=True)
+        centroids[present] = np.add.reduceat(sample[order], starts, axis=0)
+        empty = np.setdiff1d(np.arange(lists), present)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+    return centroids
+
+
+def write_build(root, embedder_name, vectors, ids, lists=None):
+    """
+    Write a build of `vectors` (float16-able, unit length) and their scan ids
+    into a new directory under `root` and make it current. Clusters into IVF
+    lists when there are at least SIMILARITY_IVF_MIN rows.
+    """
+    os.makedirs(root, exist_ok=True)
+    count, dim = vectors.shape
+    if lists is None:
+        lists = int(np.sqrt(count)) if count >= settings.SIMILARITY_IVF_MIN else 0
+
+    build = tempfile.mkdtemp(dir=root, prefix=timezone.now().strftime('build-%Y%m%d%H%M%S-'))
+    if lists:
+        centroids = kmeans(vectors, lists)
+        assign = _assign(vectors, centroids)
+        order = np.argsort(assign, kind='stable')
+        offsets = np.searchsorted(assign[order], np.arange(lists + 1)).astype(np.int64)
+        centroids.astype(np.float32).tofile(os.path.join(build, 'centroids.f32'))
+        offsets.tofile(os.path.join(build, 'offsets.i64'))
+    else:
+        order = np.arange(count)
+    with open(os.path.join(build, 'vectors.f16'), 'wb') as f:
+        for start in range(0, count, BLOCK_ROWS):
+            np.asarray(vectors[order[start:start + BLOCK_ROWS]], dtype=np.float16).tofile(f)
+    np.asarray(ids, dtype=np.int64)[order].tofile(os.path.join(build, 'ids.i64'))
+    with open(os.path.join(build, 'meta.json'), 'w') as f:
+        json.dump({'embedder': embedder_name, 'dim': int(dim), 'lists': int(lists), 'base_count': int(count),
+                   'built_at': timezone.now().isoformat()}, f)
+
+    fd, tmp = tempfile.mkstemp(dir=root, prefix='.CURRENT-')
+    with os.fdopen(fd, 'w') as f:
+        f.write(os.path.basename(build) + '\n')
+    previous = _current_build(root)
+    os.replace(tmp, os.path.join(root, 'CURRENT'))
+    if previous and previous != build:
+        shutil.rmtree(previous, ignore_errors=True)
+    return build
+
+
+def _current_build(root):
+    try:
+        with open(os.path.join(root, 'CURRENT')) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(root, name) if name else None
+
+
+# Searching
+
+class SimilarityIndex:
+    """One build, re-mapped when rows are appended to it"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.dim = self.meta['dim']
+        self.lists = self.meta['lists']
+        self.base_count = self.meta['base_count']
+        if self.lists:
+            self.centroids = np.fromfile(os.path.join(path, 'centroids.f32'), dtype=np.float32).reshape(self.lists, self.dim)
+            self.offsets = np.fromfile(os.path.join(path, 'offsets.i64'), dtype=np.int64)
+        self._count = -1
+        self._lock = threading.Lock()
+
+    def _arrays(self):
+        count = _row_count(self.path, self.dim)
+        with self._lock:
+            if count != self._count:
+                self.vectors = np.memmap(os.path.join(self.path, 'vectors.f16'), dtype=np.float16, mode='r',
+                                         shape=(count, self.dim)) if count else np.zeros((0, self.dim), np.float16)
+                self.ids = np.memmap(os.path.join(self.path, 'ids.i64'), dtype=np.int64, mode='r',
+                                     shape=(count,)) if count else np.zeros(0, np.int64)
+                self._count = count
+            return self.vectors, self.ids, count
+
+    def __len__(self):
+        return self._arrays()[2]
+
+    def vector_for(self, scan_id):
+        vectors, ids, _ = self._arrays()
+        rows = np.flatnonzero(ids == scan_id)
+        return np.asarray(vectors[rows[-1]], dtype=np.float32) if len(rows) else None
+
+    def search(self, query, k=10, exclude=(), nprobe=None):
+        """[(scan_id, cosine similarity)] for the k closest rows, best first"""
+        vectors, ids, count = self._arrays()
+        query = np.asarray(query, dtype=np.float32)
+        ranges = []
+        if self.lists:
+            nprobe = min(nprobe or settings.SIMILARITY_NPROBE, self.lists)
+            probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            ranges = [(self.offsets[i], self.offsets[i + 1]) for i in probe if self.offsets[i] < self.offsets[i + 1]]
+            appended_from = self.base_count
+        else:
+            appended_from = 0
+        ranges.extend((start, min(start + BLOCK_ROWS, count)) for start in range(appended_from, count, BLOCK_ROWS))
+
+        wanted = k + len(exclude)
+        best_scores, best_rows = np.empty(0, np.float32), np.empty(0, np.int64)
+        for start, stop in ranges:
+            scores = np.asarray(vectors[start:stop], dtype=np.float32) @ query
+            if len(scores) > wanted:
+                top = np.argpartition(-scores, wanted - 1)[:wanted]
+            else:
+                top = np.arange(len(scores))
+            best_scores = np.concatenate([best_scores, scores[top]])
+            best_rows = np.concatenate([best_rows, top + start])
+            if len(best_scores) > 4 * wanted:
+                keep = np.argpartition(-best_scores, wanted - 1)[:wanted]
+                best_scores, best_rows = best_scores[keep], best_rows[keep]
+
+        results, seen = [], set(exclude)
+        for i in np.argsort(-best_scores, kind='stable'):
+            scan_id = int(ids[best_rows[i]])
+            if scan_id in seen:
+                continue
+            seen.add(scan_id)
+            results.append((scan_id, float(best_scores[i])))
+            if len(results) == k:
+                break
+        return results
+
+
+def _row_count(path, dim):
+    """Complete rows present in both files; a torn append leaves one file longer"""
+    return min(os.path.getsize(os.path.join(path, 'ids.i64')) // 8,
+               os.path.getsize(os.path.join(path, 'vectors.f16')) // (2 * dim))
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """The current build, reopened when `rebuild` has replaced it"""
+    global _index
+    path = _current_build(settings.SIMILARITY_INDEX_DIR)
+    if path is None or not os.path.exists(os.path.join(path, 'meta.json')):
+        raise IndexUnavailable("The similarity index has not been built yet")
+    with _index_lock:
+        if _index is None or _index.path != path:
+            _index = SimilarityIndex(path)
+        return _index
+
+
+def append(scan_ids, embedder_name, vectors):
+    """Add rows to the current build; skipped when it was built by another embedder"""
+    index = get_index()
+    if index.meta['embedder'] != embedder_name:
+        logger.warning("Similarity index uses %s, not %s; run rebuild_similarity_index",
+                       index.meta['embedder'], embedder_name)
+        return False
+    with open(os.path.join(settings.SIMILARITY_INDEX_DIR, '.append.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # Cut both files back to their common rows first, so an append that
+        # died half-way can't shift every later id against its vector
+        count = _row_count(index.path, index.dim)
+        with open(os.path.join(index.path, 'vectors.f16'), 'r+b') as f:
+            f.truncate(count * 2 * index.dim)
+            f.seek(0, os.SEEK_END)
+            np.asarray(vectors, dtype=np.float16).tofile(f)
+        with open(os.path.join(index.path, 'ids.i64'), 'r+b') as f:
+            f.truncate(count * 8)
+            f.seek(0, os.SEEK_END)
+            np.asarray(scan_ids, dtype=np.int64).tofile(f)
+    return True
+
+
+def add_scan(scan):
+    """Embed a freshly reviewed scan and append it to the index"""
+    try:
+        with scan.image.open('rb') as image_file:
+            name, vectors = embed([image_file])
+        append([scan.pk], name, vectors)
+    except IndexUnavailable:
+        pass
+    except Exception:
+        logger.exception("Could not add scan %s to the similarity index", scan.pk)
+
+
+_queue = None
+_queue_pid = None
+_queue_lock = threading.Lock()
+
+
+def _index_worker(pending):
+    while True:
+        scan = pending.get()
+        try:
+            add_scan(scan)
+        finally:
+            pending.task_done()
+
+
+def enqueue_scan(scan):
+    """
+    Embed and append a reviewed scan on this process's background thread, so
+    the reviewer's request doesn't wait for it. Scans still queued when the
+    process is killed are picked up by the next rebuild_similarity_index.
+    """
+    global _queue, _queue_pid
+    if not settings.SIMILARITY_INDEX_ASYNC:
+        add_scan(scan)
+        return
+    with _queue_lock:
+        # Threads don't survive a fork, so each gunicorn worker starts its own
+        if _queue is None or _queue_pid != os.getpid():
+            _queue, _queue_pid = queue.Queue(), os.getpid()
+            threading.Thread(target=_index_worker, args=(_queue,), name='similarity-index', daemon=True).start()
+        _queue.put(scan)
+
+
+@atexit.register
+def drain(timeout=10):
+    """Wait up to `timeout` seconds for queued scans; also runs when a worker exits"""
+    deadline = time.monotonic() + timeout
+    while _queue is not None and _queue_pid == os.getpid() and _queue.unfinished_tasks:
+        if time.monotonic() > deadline:
+            logger.warning("%s scans left out of the similarity index", _queue.unfinished_tasks)
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def similar_to(scan, k=10):
+    """[(scan_id, similarity)] of the k reviewed scans closest to `scan`"""
+    index = get_index()
+    query = index.vector_for(scan.pk)
+    if query is None:
+        name, network = embedder()
+        if index.meta['embedder'] != name:
+            raise IndexUnavailable(f"The similarity index was built with {index.meta['embedder']}; rebuild it")
+        with scan.image.open('rb') as image_file:
+            query = embed([image_file])[1][0]
+    return index.search(query, k, exclude=(scan.pk,))
@@ -1,3 +1,435 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models.query import QuerySet
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from analytics import rollups
+from analytics.models import DailyRollup
+from articles.models import Article
+from eyecare.uploads import is_sharded
+from scans import export, quality, similarity, timeline
+from scans.management.commands import reanalyze_scans
+from scans.models import EyeScan, PatientTimeline, ScanReview
+from users.models import CustomUser
+
+
+def unit_vectors(count, dim=64, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class SimilarityAppendTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(SIMILARITY_INDEX_DIR=self.root)
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.vectors = unit_vectors(20)
+        similarity.write_build(self.root, similarity.DESCRIPTOR, self.vectors[:10], np.arange(1, 11))
+
+    def test_torn_append_is_cut_back_before_the_next_one(self):
+        index = similarity.get_index()
+        # An append that died after writing its vector but before its id
+        with open(os.path.join(index.path, 'vectors.f16'), 'ab') as f:
+            self.vectors[10].astype(np.float16).tofile(f)
+        self.assertEqual(len(index), 10)
+
+        similarity.append([12], similarity.DESCRIPTOR, self.vectors[11:12])
+        self.assertEqual(len(index), 11)
+        self.assertEqual(index.search(self.vectors[11], k=1)[0][0], 12)
+        self.assertEqual(index.search(self.vectors[3], k=1)[0][0], 4)
+
+    def test_torn_id_write_is_ignored(self):
+        index = similarity.get_index()
+        with open(os.path.join(index.path, 'ids.i64'), 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        self.assertEqual(len(index), 10)
+        similarity.append([11], similarity.DESCRIPTOR, self.vectors[10:11])
+        self.assertEqual(index.search(self.vectors[10], k=1)[0][0], 11)
+
+
+@override_settings(SIMILARITY_INDEX_ASYNC=True)
+class SimilarityQueueTests(SimpleTestCase):
+    def test_enqueue_returns_before_embedding(self):
+        release = threading.Event()
+        done = []
+
+        def slow_add(scan):
+            release.wait(5)
+            done.append(scan)
+
+        with mock.patch.object(similarity, 'add_scan', slow_add):
+            similarity.enqueue_scan('scan')
+            self.assertEqual(done, [])
+            release.set()
+            self.assertTrue(similarity.drain(5))
+        self.assertEqual(done, ['scan'])
+
+
+def jpeg(size, color=(128, 128, 128)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'JPEG')
+    return SimpleUploadedFile('eye.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+class QualityTests(SimpleTestCase):
+    def test_tiny_images_count_as_blurry(self):
+        for size in ((1, 1), (2, 2), (2, 40)):
+            scores, issues = quality.assess(jpeg(size))
+            self.assertEqual(scores['sharpness'], 0.0)
+            self.assertIn('blurry', issues)
+            self.assertIn('low_resolution', issues)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class QualityGateTests(TestCase):
+    def test_default_gate_flags_instead_of_rejecting(self):
+        patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user')
+        client = APIClient()
+        client.force_authenticate(patient)
+        response = client.post('/api/scans/scans/', {'image': jpeg((64, 64))}, format='multipart', secure=True)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertIn('low_resolution', EyeScan.objects.get().quality_issues)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class UploadTests(TestCase):
+    def setUp(self):
+        patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user')
+        self.client = APIClient()
+        self.client.force_authenticate(patient)
+
+    def upload(self):
+        return self.client.post('/api/scans/scans/', {'image': jpeg((64, 64))}, format='multipart', secure=True)
+
+    def test_image_is_written_before_the_transaction(self):
+        save = default_storage.save
+        atomic_depths = []
+
+        def record(*args, **kwargs):
+            atomic_depths.append(len(connection.atomic_blocks))
+            return save(*args, **kwargs)
+
+        # TestCase's own atomic blocks are the baseline
+        outer = len(connection.atomic_blocks)
+        with mock.patch.object(default_storage, 'save', side_effect=record):
+            self.assertEqual(self.upload().status_code, 201)
+        self.assertEqual(atomic_depths, [outer])
+        self.assertTrue(default_storage.exists(EyeScan.objects.get().image.name))
+
+    def test_failed_insert_removes_the_image(self):
+        saved = []
+        save = default_storage.save
+
+        def record(*args, **kwargs):
+            saved.append(save(*args, **kwargs))
+            return saved[-1]
+
+        with mock.patch.object(default_storage, 'save', side_effect=record), \
+                mock.patch('scans.serializers.EyeScanSerializer.save', side_effect=DatabaseError('locked')), \
+                self.assertRaises(DatabaseError):
+            self.upload()
+        self.assertEqual(len(saved), 1)
+        self.assertFalse(default_storage.exists(saved[0]))
+
+
+@override_settings(TIMELINE_MAX_POINTS=3)
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user')
+        self.doc = CustomUser.objects.create_user('doc', 'd@example.com', 'pw', user_type='specialist')
+
+    def scan(self, condition, confidence):
+        return EyeScan.objects.create(user=self.patient, image='eye_scans/x.jpg', condition_detected=condition,
+                                      confidence_score=confidence, recommendations='')
+
+    def row(self):
+        row = PatientTimeline.objects.filter(pk=self.patient.pk).values().get()
+        row.pop('updated_at')
+        return row
+
+    def test_first_read_builds_the_row(self):
+        for condition in ('dryness', 'redness'):
+            self.scan(condition, 0.8)
+        PatientTimeline.objects.all().delete()
+        client = APIClient()
+        client.force_authenticate(self.patient)
+        response = client.get('/api/scans/scans/timeline/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['scan_count'], response.json()['transition_count']), (2, 1))
+        self.assertEqual(PatientTimeline.objects.get().scan_count, 2)
+
+    def test_incremental_updates_match_rebuild(self):
+        scans = [self.scan(condition, confidence) for condition, confidence in
+                 [('dryness', 0.7), ('dryness', 0.75), ('redness', 0.8), ('normal', 0.85), ('normal', 0.9)]]
+        for scan in scans[1::2]:
+            ScanReview.objects.create(scan=scan, specialist=self.doc, diagnosis='Looks stable', recommendations='')
+        incremental = self.row()
+        self.assertEqual((incremental['scan_count'], incremental['reviewed_count']), (5, 2))
+        timeline.rebuild(self.patient.pk)
+        self.assertEqual(incremental, self.row())
+
+    def race_first_insert(self):
+        """Make the next timeline INSERT lose to one that another request just committed"""
+        create = QuerySet.create
+        raced = []
+
+        def create_after_competitor(queryset, **kwargs):
+            if queryset.model is PatientTimeline and not raced:
+                raced.append(kwargs['user_id'])
+                PatientTimeline.objects.bulk_create([PatientTimeline(user_id=kwargs['user_id'])])
+            return create(queryset, **kwargs)
+        return mock.patch.object(QuerySet, 'create', create_after_competitor), raced
+
+    def test_concurrent_first_build(self):
+        self.scan('dryness', 0.8)
+        PatientTimeline.objects.all().delete()
+        race, raced = self.race_first_insert()
+        with race:
+            built = timeline.get_timeline(self.patient.pk)
+        self.assertEqual(raced, [self.patient.pk])
+        self.assertEqual(built.scan_count, 1)
+        self.assertEqual(PatientTimeline.objects.get().scan_count, 1)
+
+    def test_concurrent_first_scan(self):
+        race, raced = self.race_first_insert()
+        with race:
+            self.scan('dryness', 0.8)
+        self.assertEqual(raced, [self.patient.pk])
+        incremental = self.row()
+        self.assertEqual(incremental['scan_count'], 1)
+        timeline.rebuild(self.patient.pk)
+        self.assertEqual(incremental, self.row())
+
+    def test_locked_retries_after_integrity_error(self):
+        existing = PatientTimeline.objects.create(user=self.patient)
+        with mock.patch.object(QuerySet, 'get_or_create', side_effect=[IntegrityError, (existing, False)]), \
+                transaction.atomic():
+            self.assertEqual(timeline._locked(self.patient.pk), (existing, False))
+
+
+class MediaHousekeepingTests(TestCase):
+    def setUp(self):
+        self.settings = override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+        self.settings.enable()
+        self.addCleanup(self.settings.disable)
+        self.patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user')
+
+    def write(self, name, content=b'x', age_hours=48):
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+        stamp = time.time() - age_hours * 3600
+        os.utime(path, (stamp, stamp))
+        return name
+
+    def scan(self, name):
+        return EyeScan.objects.create(user=self.patient, image=name, condition_detected='normal',
+                                      confidence_score=0.9, recommendations='')
+
+    def collect(self, *args):
+        out = io.StringIO()
+        call_command('collect_orphan_media', '--list', *args, stdout=out)
+        return out.getvalue()
+
+    def test_only_old_orphans_are_reported_and_deleted(self):
+        sharded = 'eye_scans/ab/cd/' + 'abcd' * 8 + '.jpg'
+        # Legacy flat names beside sharded directories, and names that sort around them
+        referenced = [self.write(name) for name in (
+            'eye_scans/ab.jpg', sharded, 'eye_scans/Zz.jpg', 'eye_scans/\u00e9t\u00e9.jpg', 'eye_scans/ab/x y.jpg',
+        )]
+        for name in referenced:
+            self.scan(name)
+        cover = self.write('articles/12/34/' + '1234' * 8 + '.png')
+        Article.objects.create(title='Dry eyes', content='...', author=self.patient, category='general', image=cover)
+        orphans = {self.write(name) for name in (
+            'eye_scans/ab-old.jpg', 'eye_scans/ab/cd/' + 'abce' * 8 + '.jpg', 'eye_scans/zz.jpg', 'articles/old.png',
+        )}
+        young = self.write('eye_scans/fresh.jpg', age_hours=0)
+
+        output = self.collect()
+        self.assertEqual({line for line in output.splitlines() if '/' in line and ':' not in line}, orphans)
+        self.assertIn('1 newer than 24h skipped', output)
+        for name in [*referenced, cover, *orphans, young]:
+            self.assertTrue(default_storage.exists(name), name)
+
+        self.collect('--delete')
+        for name in [*referenced, cover, young]:
+            self.assertTrue(default_storage.exists(name), name)
+        for name in orphans:
+            self.assertFalse(default_storage.exists(name), name)
+
+    def test_min_age_hours(self):
+        self.write('eye_scans/recent.jpg', age_hours=2)
+        self.collect('--delete', '--min-age-hours', '3')
+        self.assertTrue(default_storage.exists('eye_scans/recent.jpg'))
+        self.collect('--delete', '--min-age-hours', '1')
+        self.assertFalse(default_storage.exists('eye_scans/recent.jpg'))
+
+    def test_shard_media_can_be_rerun(self):
+        scans = [self.scan(self.write(name, content)) for name, content in (
+            ('eye_scans/one.jpg', b'same'), ('eye_scans/two.JPG', b'same'), ('eye_scans/three.jpg', b'other'),
+        )]
+        missing = self.scan('eye_scans/gone.jpg')
+        for _ in range(2):
+            call_command('shard_media', stdout=io.StringIO(), stderr=io.StringIO())
+        out = io.StringIO()
+        call_command('shard_media', stdout=out, stderr=io.StringIO())
+        self.assertIn('EyeScan.image: moved 0 files, 1 missing', out.getvalue())
+
+        names = []
+        for scan, content in zip(scans, (b'same', b'same', b'other')):
+            scan.refresh_from_db()
+            self.assertTrue(is_sharded('eye_scans/', scan.image.name), scan.image.name)
+            with default_storage.open(scan.image.name) as f:
+                self.assertEqual(f.read(), content)
+            names.append(scan.image.name)
+        self.assertEqual(len(set(names)), 3)
+        for name in ('eye_scans/one.jpg', 'eye_scans/two.JPG', 'eye_scans/three.jpg'):
+            self.assertFalse(default_storage.exists(name))
+        missing.refresh_from_db()
+        self.assertEqual(missing.image.name, 'eye_scans/gone.jpg')
+
+    def test_delete_file_on_commit(self):
+        kept = self.scan(self.write('eye_scans/a.jpg'))
+        pk = kept.pk
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                kept.delete()
+                raise DatabaseError('rolled back')
+        self.assertEqual(callbacks, [])
+        self.assertTrue(default_storage.exists('eye_scans/a.jpg'))
+
+        shared = self.scan('eye_scans/a.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            EyeScan.objects.get(pk=pk).delete()
+        self.assertTrue(default_storage.exists('eye_scans/a.jpg'))
+        with self.captureOnCommitCallbacks(execute=True):
+            shared.delete()
+        self.assertFalse(default_storage.exists('eye_scans/a.jpg'))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class ReanalyzeTests(TestCase):
+    def test_swapped_conditions_count_as_changed(self):
+        patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user')
+        default_storage.save('eye_scans/a.jpg', jpeg((8, 8)))
+        scans = [EyeScan.objects.create(user=patient, image='eye_scans/a.jpg', condition_detected=condition,
+                                        confidence_score=0.5, recommendations='')
+                 for condition in ('dryness', 'redness')]
+        swapped = [{'condition_detected': condition, 'confidence_score': 0.9, 'recommendations': '',
+                    'analyzer_version': 'v2'} for condition in ('redness', 'dryness')]
+        command = reanalyze_scans.Command(stdout=io.StringIO(), stderr=io.StringIO())
+        with mock.patch.object(command, 'analyze', return_value=swapped):
+            self.assertEqual(command.reanalyze(list(EyeScan.objects.order_by('pk')), batch_size=8), 2)
+        self.assertEqual([scan.condition_detected for scan in EyeScan.objects.order_by('pk')], ['redness', 'dryness'])
+        counts = lambda: sorted(DailyRollup.objects.values_list('day', 'metric', 'key', 'count'))
+        incremental = counts()
+        rollups.rebuild()
+        self.assertEqual(incremental, counts())
+
+
+EXPORT_HEADER = [
+    'scan_id', 'patient_id', 'condition_detected', 'confidence_score', 'is_reviewed', 'scan_created_at', 'image',
+    'review_id', 'specialist_id', 'diagnosis', 'review_recommendations', 'review_created_at',
+]
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user')
+        self.doc = CustomUser.objects.create_user('doc', 'd@example.com', 'pw', user_type='specialist')
+        self.admin = CustomUser.objects.create_user('admin', 'a@example.com', 'pw', user_type='admin')
+        self.reviewed = self.scan('cataract')
+        self.review = ScanReview.objects.create(scan=self.reviewed, specialist=self.doc, diagnosis='Early, "mild"',
+                                                recommendations='Recheck\nin a year')
+        self.unreviewed = self.scan('normal')
+        self.output_dir = tempfile.mkdtemp()
+
+    def scan(self, condition):
+        return EyeScan.objects.create(user=self.patient, image='eye_scans/x.jpg', condition_detected=condition,
+                                      confidence_score=0.75, recommendations='')
+
+    def download(self, user, **params):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.get('/api/scans/scans/export/', params, secure=True)
+
+    def expected_rows(self):
+        scan, review = self.reviewed, self.review
+        return [
+            {'scan_id': scan.pk, 'patient_id': self.patient.pk, 'condition_detected': 'cataract',
+             'confidence_score': 0.75, 'is_reviewed': False, 'scan_created_at': scan.created_at.isoformat(),
+             'image': 'eye_scans/x.jpg', 'review_id': review.pk, 'specialist_id': self.doc.pk,
+             'diagnosis': 'Early, "mild"', 'review_recommendations': 'Recheck\nin a year',
+             'review_created_at': review.created_at.isoformat()},
+            {'scan_id': self.unreviewed.pk, 'patient_id': self.patient.pk, 'condition_detected': 'normal',
+             'confidence_score': 0.75, 'is_reviewed': False, 'scan_created_at': self.unreviewed.created_at.isoformat(),
+             'image': 'eye_scans/x.jpg', 'review_id': None, 'specialist_id': None, 'diagnosis': None,
+             'review_recommendations': None, 'review_created_at': None},
+        ]
+
+    def test_csv(self):
+        response = self.download(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(lines[0], EXPORT_HEADER)
+        expected = [['' if value is None else str(value) for value in row.values()] for row in self.expected_rows()]
+        self.assertEqual(lines[1:], expected)
+
+    def test_jsonl(self):
+        response = self.download(self.admin, output='jsonl')
+        self.assertEqual(response.status_code, 200)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([list(row) for row in rows], [EXPORT_HEADER] * 2)
+        self.assertEqual(rows, self.expected_rows())
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.download(self.admin, since='last week').status_code, 400)
+        self.assertEqual(self.download(self.admin, output='xlsx').status_code, 400)
+
+    def test_admin_only(self):
+        for user in (self.patient, self.doc):
+            self.assertEqual(self.download(user).status_code, 403)
+
+    def run_export(self, *args):
+        call_command('export_scans', '--output-dir', self.output_dir, '--format', 'jsonl', *args,
+                     stdout=io.StringIO())
+        with open(os.path.join(self.output_dir, '.export_state.json')) as fh:
+            state = json.load(fh)
+        with open(os.path.join(self.output_dir, state['last_file'])) as fh:
+            return [json.loads(line)['scan_id'] for line in fh], state
+
+    def test_incremental_exports_only_new_rows(self):
+        first, state = self.run_export('--incremental')
+        self.assertEqual(first, [self.reviewed.pk, self.unreviewed.pk])
+        newer = self.scan('redness')
+        ScanReview.objects.create(scan=self.unreviewed, specialist=self.doc, diagnosis='-', recommendations='-')
+        second, next_state = self.run_export('--incremental')
+        self.assertEqual(second, [self.unreviewed.pk, newer.pk])
+        self.assertGreater(next_state['last_run'], state['last_run'])
+
+    def test_parquet_without_pyarrow(self):
+        # None in sys.modules makes the import raise ImportError
+        with mock.patch.dict(sys.modules, {'pyarrow': None, 'pyarrow.parquet': None}), \
+                self.assertRaisesMessage(CommandError, "requires the 'pyarrow' package"):
+            call_command('export_scans', '--output-dir', self.output_dir, '--format', 'parquet', stdout=io.StringIO())
+        # No partial file, and the next incremental run still starts from scratch
+        self.assertEqual(os.listdir(self.output_dir), [])
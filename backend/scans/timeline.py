@@ -0,0 +1,175 @@
+"""
+Per-patient scan timelines, kept as one PatientTimeline row per patient.
+
+Each new scan or review updates the row in place (signals.py), so reading a
+timeline never touches the patient's scans. Anything that rewrites history -
+a scan's condition changing, a scan or review being deleted, reanalyze_scans -
+rebuilds the row from the patient's scans instead. Rows are also built on
+first read for patients who had scans before timelines existed.
+
+Each point is one scan:
+
+    {"scan_id": 12, "created_at": "...", "condition": "redness", "confidence": 0.87,
+     "review": {"review_id": 4, "reviewed_at": "...", "specialist_id": 3, "diagnosis": "..."} or null}
+
+and each transition a change of detected condition between consecutive scans:
+
+    {"scan_id": 12, "at": "...", "from": "dryness", "to": "redness"}
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+
+from users.models import CustomUser
+from .models import EyeScan, PatientTimeline
+
+# Timelines are written from views that may be reading a replica (ReplicaReadMixin)
+PRIMARY = DEFAULT_DB_ALIAS
+
+
+def _point(scan_id, created_at, condition, confidence):
+    return {
+        'scan_id': scan_id,
+        'created_at': created_at.isoformat(),
+        'condition': condition,
+        'confidence': confidence,
+        'review': None,
+    }
+
+
+def _review(review_id, reviewed_at, specialist_id, diagnosis):
+    return {
+        'review_id': review_id,
+        'reviewed_at': reviewed_at.isoformat(),
+        'specialist_id': specialist_id,
+        'diagnosis': diagnosis,
+    }
+
+
+def _trend(points):
+    """Least-squares change in confidence per scan over the most recent points"""
+    values = [point['confidence'] for point in points[-settings.TIMELINE_TREND_SCANS:]]
+    n = len(values)
+    if n < 2:
+        return None
+    x_mean, y_mean = (n - 1) / 2, sum(values) / n
+    numerator = sum((x - x_mean) * (y - y_mean) for x, y in enumerate(values))
+    denominator = sum((x - x_mean) ** 2 for x in range(n))
+    return round(numerator / denominator, 4)
+
+
+def _add_point(timeline, point, created_at):
+    limit = settings.TIMELINE_MAX_POINTS
+    condition = point['condition']
+    if timeline.latest_condition and timeline.latest_condition != condition:
+        timeline.transitions.append({
+            'scan_id': point['scan_id'],
+            'at': point['created_at'],
+            'from': timeline.latest_condition,
+            'to': condition,
+        })
+        del timeline.transitions[:-limit]
+        timeline.transition_count += 1
+
+    timeline.scan_count += 1
+    timeline.condition_counts[condition] = timeline.condition_counts.get(condition, 0) + 1
+    previous = timeline.confidence_mean or 0.0
+    timeline.confidence_mean = round(previous + (point['confidence'] - previous) / timeline.scan_count, 4)
+    timeline.first_scan_at = timeline.first_scan_at or created_at
+    timeline.last_scan_at = created_at
+    timeline.latest_condition = condition
+    timeline.points.append(point)
+    del timeline.points[:-limit]
+    timeline.confidence_trend = _trend(timeline.points)
+
+
+def _build(user_id):
+    """An unsaved timeline computed from the patient's scans and reviews on the primary"""
+    timeline = PatientTimeline(user_id=user_id)
+    scans = (
+        EyeScan.objects.using(PRIMARY).filter(user_id=user_id).order_by('created_at', 'id')
+        .values_list('id', 'created_at', 'condition_detected', 'confidence_score',
+                     'scanreview__id', 'scanreview__created_at', 'scanreview__specialist_id',
+                     'scanreview__diagnosis')
+    )
+    for scan_id, created_at, condition, confidence, review_id, reviewed_at, specialist_id, diagnosis in scans.iterator():
+        point = _point(scan_id, created_at, condition, confidence)
+        if review_id is not None:
+            point['review'] = _review(review_id, reviewed_at, specialist_id, diagnosis)
+            timeline.reviewed_count += 1
+        _add_point(timeline, point, created_at)
+    return timeline
+
+
+def _locked(user_id, attempts=3):
+    """
+    The patient's row on the primary, locked until the transaction ends, and
+    whether it was just created (empty). A missing row can't be locked, so it
+    is inserted first; when another request inserts it at the same moment the
+    IntegrityError is caught and the row read back.
+    """
+    rows = PatientTimeline.objects.using(PRIMARY).select_for_update()
+    for attempt in range(attempts):
+        try:
+            return rows.get_or_create(user_id=user_id)
+        except IntegrityError:
+            if attempt == attempts - 1:
+                raise
+
+
+def rebuild(user_id):
+    """Recompute a patient's timeline from their scans and reviews"""
+    with transaction.atomic(using=PRIMARY):
+        _locked(user_id)
+        timeline = _build(user_id)
+        timeline.save(using=PRIMARY)
+    return timeline
+
+
+def get_timeline(user_id):
+    """The patient's timeline, built on first use"""
+    # May read a replica; building always reads and writes the primary
+    timeline = PatientTimeline.objects.filter(user_id=user_id).first()
+    if timeline is None:
+        timeline = rebuild(user_id)
+    return timeline
+
+
+def scan_added(scan):
+    with transaction.atomic(using=PRIMARY):
+        timeline, created = _locked(scan.user_id)
+        if created:
+            # First scan since timelines existed: the rebuild already includes this one
+            rebuild(scan.user_id)
+            return
+        _add_point(timeline, _point(scan.pk, scan.created_at, scan.condition_detected, scan.confidence_score),
+                   scan.created_at)
+        timeline.save(using=PRIMARY)
+
+
+def scan_reviewed(review, scan):
+    with transaction.atomic(using=PRIMARY):
+        timeline, created = _locked(scan.user_id)
+        if created:
+            rebuild(scan.user_id)
+            return
+        timeline.reviewed_count += 1
+        for point in reversed(timeline.points):
+            if point['scan_id'] == scan.pk:
+                point['review'] = _review(review.pk, review.created_at, review.specialist_id, review.diagnosis)
+                break
+        timeline.save(using=PRIMARY, update_fields=['reviewed_count', 'points', 'updated_at'])
+
+
+def refresh(user_ids):
+    """Rebuild the existing timelines of these patients, e.g. after bulk writes"""
+    existing = PatientTimeline.objects.using(PRIMARY).filter(user_id__in=set(user_ids))
+    for user_id in existing.values_list('user_id', flat=True):
+        rebuild(user_id)
+
+
+def refresh_on_commit(user_id):
+    """Rebuild once the current transaction commits, unless the patient is gone by then"""
+    def run():
+        if CustomUser.objects.filter(pk=user_id).exists():
+            refresh([user_id])
+    transaction.on_commit(run)
@@ -1,11 +1,23 @@
 
-import random
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from analytics.permissions import IsAdminUserType
+from users.models import CustomUser
+from eyecare.db_router import ReplicaReadMixin
+from eyecare.fastlist import FastListMixin
+from eyecare.signing import signed_media_url
+# analysis, export, quality and similarity load NumPy and Pillow, so they are
+# imported where used and workers answer their first request without them
+from . import timeline
 from .models import EyeScan, ScanReview
-from .serializers import EyeScanSerializer, ScanReviewSerializer, ScanReviewCreateSerializer
+from .serializers import EyeScanSerializer, PatientTimelineSerializer, ScanReviewSerializer, ScanReviewCreateSerializer
 
 class IsOwnerOrSpecialist(permissions.BasePermission):
     """
@@ -18,7 +30,7 @@ class IsOwnerOrSpecialist(permissions.BasePermission):
         # Users can only access their own scans
         return obj.user == request.user
 
-class EyeScanViewSet(viewsets.ModelViewSet):
+class EyeScanViewSet(FastListMixin, ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = EyeScanSerializer
     parser_classes = (MultiPartParser, FormParser, JSONParser)
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrSpecialist]
@@ -26,12 +38,22 @@ class EyeScanViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         if user.user_type == 'specialist':
-            return EyeScan.objects.all().order_by('-created_at')
-        return EyeScan.objects.filter(user=user).order_by('-created_at')
+            queryset = EyeScan.objects.all().order_by('-created_at')
+        else:
+            queryset = EyeScan.objects.filter(user=user).order_by('-created_at')
+        # ?quality=flagged / ?quality=ok splits out photos the quality gate flagged
+        if self.request.query_params.get('quality') == 'flagged':
+            queryset = queryset.exclude(quality_issues='')
+        elif self.request.query_params.get('quality') == 'ok':
+            queryset = queryset.filter(quality_issues='')
+        return queryset
     
     def list(self, request, *args, **kwargs):
         # Override list to ensure consistent response format
         queryset = self.filter_queryset(self.get_queryset())
+        data = self.fast_list_data(queryset)
+        if data is not None:
+            return Response(data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -39,29 +61,134 @@ class EyeScanViewSet(viewsets.ModelViewSet):
         # Only patients can create scans
         if self.request.user.user_type != 'user':
             raise permissions.PermissionDenied("Only patients can upload eye scans.")
+
+        # Poor photos are refused (or flagged) before analysis and the specialist queue
+        quality_fields = self.check_quality(serializer.validated_data['image'])
         
-        # Mock AI analysis
-        conditions = ['cataract', 'redness', 'dryness', 'glaucoma', 'conjunctivitis', 'normal']
-        weights = [0.1, 0.2, 0.25, 0.1, 0.2, 0.15]
-        condition = random.choices(conditions, weights=weights, k=1)[0]
-        confidence = round(random.uniform(0.7, 0.95), 2)
+        # Classifier from the model registry (scans/ml), or the mock until one is installed
+        from . import analysis
+        result = analysis.analyze(serializer.validated_data['image'])
         
-        recommendations = {
-            'cataract': "Clouding of the eye's lens detected. Consider consulting an ophthalmologist for further evaluation and potential surgical options.",
-            'redness': "Eye redness detected. This may indicate irritation, allergy, or infection. Monitor symptoms and consult if persistent for more than 48 hours.",
-            'dryness': "Signs of dry eyes detected. Use lubricating eye drops, avoid prolonged screen time, and consider using a humidifier.",
-            'glaucoma': "Potential signs of glaucoma detected. Urgent consultation recommended with an eye specialist for pressure testing and treatment.",
-            'conjunctivitis': "Possible conjunctivitis (pink eye) detected. Practice good hygiene, avoid touching eyes, and consult a doctor for antibiotic treatment if bacterial.",
-            'normal': "No significant issues detected. Maintain regular eye checkups and practice good eye care habits."
+        # Write the file first: the transaction holds SQLite's write lock, so
+        # it should only cover the scan row and its rollup counters
+        name = self.store_image(serializer.validated_data['image'])
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    user=self.request.user,
+                    image=name,
+                    **result,
+                    **quality_fields
+                )
+        except Exception:
+            if not EyeScan.objects.filter(image=name).exists():
+                EyeScan._meta.get_field('image').storage.delete(name)
+            raise
+
+    def store_image(self, image):
+        """Save an upload to media storage under the field's upload_to and return its name"""
+        scan = EyeScan(image=image)
+        return EyeScan._meta.get_field('image').pre_save(scan, add=True).name
+
+    def check_quality(self, image):
+        """Run the image-quality gate and return the EyeScan fields to store"""
+        if settings.QUALITY_GATE == 'off':
+            return {}
+        from . import quality
+        scores, issues = quality.assess(image)
+        if issues and settings.QUALITY_GATE == 'reject':
+            raise ValidationError({'detail': quality.describe(issues), 'quality_issues': issues})
+        scores = scores or {}
+        return {
+            'quality_sharpness': scores.get('sharpness'),
+            'quality_brightness': scores.get('brightness'),
+            'quality_eye_score': scores.get('eye_score'),
+            'quality_issues': ','.join(issues),
         }
-        
-        serializer.save(
-            user=self.request.user,
-            condition_detected=condition,
-            confidence_score=confidence,
-            recommendations=recommendations[condition]
-        )
     
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated, IsAdminUserType])
+    def export(self, request):
+        """Stream all scans with their reviews as CSV (default) or JSON lines"""
+        fmt = request.query_params.get('output', 'csv')
+        if fmt not in ('csv', 'jsonl'):
+            return Response({'error': 'output must be csv or jsonl'}, status=status.HTTP_400_BAD_REQUEST)
+
+        since = None
+        if 'since' in request.query_params:
+            since = parse_datetime(request.query_params['since'])
+            if since is None:
+                return Response({'error': 'since must be an ISO timestamp'}, status=status.HTTP_400_BAD_REQUEST)
+
+        from . import export
+        rows = export.iter_rows(export.export_queryset(since))
+        if fmt == 'csv':
+            response = StreamingHttpResponse(export.iter_csv(rows), content_type='text/csv')
+        else:
+            response = StreamingHttpResponse(export.iter_jsonl(rows), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="scans.{fmt}"'
+        return response
+
+    @action(detail=False, methods=['get'])
+    def timeline(self, request):
+        """A patient's scan history summary; specialists pass ?patient=<user id>"""
+        patient_id = request.user.pk
+        if request.user.user_type == 'specialist':
+            try:
+                patient_id = int(request.query_params['patient'])
+            except (KeyError, ValueError):
+                return Response({'error': 'patient must be a user id'}, status=status.HTTP_400_BAD_REQUEST)
+            if not CustomUser.objects.filter(pk=patient_id, user_type='user').exists():
+                return Response({'error': 'Patient not found'}, status=status.HTTP_404_NOT_FOUND)
+        elif request.query_params.get('patient') not in (None, str(patient_id)):
+            return Response(
+                {'error': 'Patients can only view their own timeline'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return Response(PatientTimelineSerializer(timeline.get_timeline(patient_id)).data)
+
+    @action(detail=True, methods=['get'])
+    def similar(self, request, pk=None):
+        """The reviewed scans that look most like this one, with their diagnoses"""
+        # Other patients' cases are only shown to specialists
+        if request.user.user_type != 'specialist':
+            return Response(
+                {'error': 'Only specialists can look up similar cases'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            k = min(max(int(request.query_params.get('k', 10)), 1), settings.SIMILARITY_MAX_K)
+        except ValueError:
+            return Response({'error': 'k must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+        from . import similarity
+        scan = self.get_object()
+        try:
+            matches = similarity.similar_to(scan, k)
+        except similarity.IndexUnavailable as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        scans = EyeScan.objects.filter(pk__in=[scan_id for scan_id, _ in matches], is_reviewed=True) \
+            .select_related('scanreview').only(
+                'id', 'image', 'condition_detected',
+                'scanreview__diagnosis', 'scanreview__recommendations', 'scanreview__created_at',
+            ).in_bulk()
+        results = []
+        for scan_id, score in matches:
+            match = scans.get(scan_id)
+            # Skip rows whose scan has since been deleted
+            if match is None or not hasattr(match, 'scanreview'):
+                continue
+            results.append({
+                'scan_id': scan_id,
+                'similarity': round(score, 4),
+                'condition_detected': match.condition_detected,
+                'diagnosis': match.scanreview.diagnosis,
+                'recommendations': match.scanreview.recommendations,
+                'reviewed_at': match.scanreview.created_at,
+                'image': signed_media_url(match.image.name, request),
+            })
+        return Response({'scan_id': scan.pk, 'results': results})
+
     @action(detail=True, methods=['post'], parser_classes=[JSONParser])
     def review(self, request, pk=None):
         print(f"Review request received for scan {pk}")
@@ -105,17 +232,18 @@ class EyeScanViewSet(viewsets.ModelViewSet):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Create the review with scan and specialist automatically set
-            scan_review = ScanReview.objects.create(
-                scan=scan,
-                specialist=request.user,
-                diagnosis=serializer.validated_data['diagnosis'],
-                recommendations=serializer.validated_data['recommendations']
-            )
-            
-            # Mark scan as reviewed
-            scan.is_reviewed = True
-            scan.save()
+            with transaction.atomic():
+                # Create the review with scan and specialist automatically set
+                scan_review = ScanReview.objects.create(
+                    scan=scan,
+                    specialist=request.user,
+                    diagnosis=serializer.validated_data['diagnosis'],
+                    recommendations=serializer.validated_data['recommendations']
+                )
+                
+                # Mark scan as reviewed
+                scan.is_reviewed = True
+                scan.save(update_fields=['is_reviewed'])
             
             print(f"Review created successfully: {scan_review.id}")
             
@@ -130,7 +258,7 @@ class EyeScanViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class ScanReviewViewSet(viewsets.ModelViewSet):
+class ScanReviewViewSet(FastListMixin, viewsets.ModelViewSet):
     serializer_class = ScanReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [JSONParser]
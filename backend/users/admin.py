@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import CustomUser, SpecialistProfile
+from eyecare.admin import PerformanceAdminMixin
+from .models import CustomUser, SpecialistProfile, SpecialistWorkload
 
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(PerformanceAdminMixin, UserAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'user_type', 'is_staff')
     list_filter = ('user_type', 'is_staff', 'is_superuser')
     fieldsets = UserAdmin.fieldsets + (
@@ -10,4 +11,19 @@ class CustomUserAdmin(UserAdmin):
     )
 
 admin.site.register(CustomUser, CustomUserAdmin)
-admin.site.register(SpecialistProfile)
+
+@admin.register(SpecialistProfile)
+class SpecialistProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'specialization', 'is_verified')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+
+@admin.register(SpecialistWorkload)
+class SpecialistWorkloadAdmin(admin.ModelAdmin):
+    list_display = ('specialist', 'accepting', 'open_consultations', 'open_messages', 'total', 'assigned_count')
+    list_filter = ('accepting',)
+    ordering = ('-total',)
+    list_select_related = ('specialist',)
+    raw_id_fields = ('specialist',)
+    # Counters are maintained by users/workload.py; `manage.py rebuild_workload` resets them
+    readonly_fields = ('open_consultations', 'open_messages', 'total', 'assigned_count')
@@ -0,0 +1,251 @@
+"""
+Batched, idempotent loading of users, specialist profiles, articles and scans.
+
+Rows that already exist (matched on username, article title or
+patient + image) are skipped, so a partially failed import can simply be
+re-run. Password hashing is CPU-bound and runs in a process pool.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import CustomUser, SpecialistProfile
+
+DEFAULT_BATCH_SIZE = 1000
+USER_FIELDS = ('email', 'first_name', 'last_name', 'user_type', 'phone_number',
+               'location', 'date_of_birth', 'specialization')
+PROFILE_FIELDS = ('license_number', 'years_of_experience', 'hospital_affiliation', 'bio', 'is_verified')
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _init_hash_worker():
+    # Needed when the pool uses the spawn start method instead of fork
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eyecare.settings')
+    django.setup()
+
+
+def _hash(password):
+    return make_password(password)
+
+
+class PasswordHashPool:
+    """Hashes passwords across CPU cores; falls back to in-process for one worker."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self._executor = ProcessPoolExecutor(self.workers, initializer=_init_hash_worker)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._executor:
+            self._executor.shutdown()
+
+    def hash_many(self, passwords):
+        if not self._executor:
+            return [make_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self._executor.map(_hash, passwords, chunksize=chunksize))
+
+
+def _password_for(record, hashed):
+    if record.get('password_hash'):
+        return record['password_hash']
+    if record.get('password'):
+        return next(hashed)
+    return make_password(None)
+
+
+def load_users(records, batch_size=DEFAULT_BATCH_SIZE, workers=None):
+    """
+    Create users (and specialist profiles) from dicts keyed by model field name.
+
+    A record may carry a plain `password`, a pre-hashed Django `password_hash`
+    or neither (unusable password). Returns (created, skipped).
+    """
+    created = skipped = 0
+    with PasswordHashPool(workers) as pool:
+        for batch in batched(records, batch_size):
+            usernames = [record['username'] for record in batch]
+            existing = set(
+                CustomUser.objects.filter(username__in=usernames).values_list('username', flat=True)
+            )
+            new = []
+            seen = set()
+            for record in batch:
+                if record['username'] in existing or record['username'] in seen:
+                    continue
+                seen.add(record['username'])
+                new.append(record)
+            skipped += len(batch) - len(new)
+            if not new:
+                continue
+
+            hashed = iter(pool.hash_many([r['password'] for r in new
+                                          if r.get('password') and not r.get('password_hash')]))
+            users = []
+            for record in new:
+                fields = {name: record[name] for name in USER_FIELDS if record.get(name) not in (None, '')}
+                users.append(CustomUser(username=record['username'],
+                                        password=_password_for(record, hashed), **fields))
+
+            names = [user.username for user in users]
+            with transaction.atomic():
+                before = CustomUser.objects.filter(username__in=names).count()
+                CustomUser.objects.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+                _create_profiles(new)
+                # ignore_conflicts hides which rows were skipped, so count what is there now
+                inserted = CustomUser.objects.filter(username__in=names).count() - before
+            created += inserted
+            skipped += len(users) - inserted
+    return created, skipped
+
+
+def _create_profiles(records):
+    specialists = [r for r in records if r.get('user_type') == 'specialist']
+    if not specialists:
+        return
+    ids = dict(
+        CustomUser.objects.filter(username__in=[r['username'] for r in specialists])
+        .values_list('username', 'id')
+    )
+    profiles = []
+    for record in specialists:
+        fields = {name: record[name] for name in PROFILE_FIELDS if record.get(name) not in (None, '')}
+        profiles.append(SpecialistProfile(
+            user_id=ids[record['username']],
+            specialization=record.get('specialization') or '',
+            **fields
+        ))
+    SpecialistProfile.objects.bulk_create(profiles, ignore_conflicts=True)
+
+
+def _user_ids(usernames):
+    return dict(CustomUser.objects.filter(username__in=set(usernames)).values_list('username', 'id'))
+
+
+def load_articles(records, batch_size=DEFAULT_BATCH_SIZE):
+    """Create articles keyed on title; `author` is a username. Returns (created, skipped)."""
+    from articles.models import Article
+
+    created = skipped = 0
+    for batch in batched(records, batch_size):
+        existing = set(
+            Article.objects.filter(title__in=[r['title'] for r in batch]).values_list('title', flat=True)
+        )
+        authors = _user_ids(r['author'] for r in batch)
+        articles = []
+        for record in batch:
+            if record['title'] in existing or record['author'] not in authors:
+                skipped += 1
+                continue
+            existing.add(record['title'])
+            articles.append(Article(
+                title=record['title'],
+                content=record['content'],
+                author_id=authors[record['author']],
+                category=record.get('category') or 'general',
+                image=record.get('image') or None,
+                is_published=_as_bool(record.get('is_published', True)),
+            ))
+        Article.objects.bulk_create(articles, batch_size=batch_size)
+        created += len(articles)
+    return created, skipped
+
+
+def load_scans(records, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Create historical scans keyed on (username, image path).
+
+    `image` must already exist in media storage. `created_at` is preserved by
+    a follow-up bulk_update, since auto_now_add overrides it on insert; naive
+    times are taken in the project time zone. Returns (created, skipped,
+    errors, patients): one message per rejected row, and the ids of the
+    patients who got new scans, for rebuilding their derived rows.
+    """
+    from scans.models import EyeScan
+
+    conditions = {value for value, label in EyeScan.CONDITION_CHOICES}
+    created = skipped = 0
+    errors = []
+    patients = set()
+    for batch in batched(records, batch_size):
+        owners = _user_ids(r['username'] for r in batch)
+        existing = set(
+            EyeScan.objects.filter(image__in=[r['image'] for r in batch])
+            .values_list('user_id', 'image')
+        )
+        scans = []
+        timestamps = []
+        for record in batch:
+            user_id = owners.get(record['username'])
+            if user_id is None or (user_id, record['image']) in existing:
+                skipped += 1
+                continue
+            row = f"{record['username']} {record['image']}"
+            if record['condition_detected'] not in conditions:
+                errors.append(f"{row}: invalid condition_detected {record['condition_detected']!r}")
+                continue
+            try:
+                created_at = _timestamp(record.get('created_at'))
+            except ValueError:
+                errors.append(f"{row}: invalid created_at {record['created_at']!r}")
+                continue
+            existing.add((user_id, record['image']))
+            scans.append(EyeScan(
+                user_id=user_id,
+                image=record['image'],
+                condition_detected=record['condition_detected'],
+                confidence_score=float(record['confidence_score']),
+                recommendations=record.get('recommendations', ''),
+                is_reviewed=_as_bool(record.get('is_reviewed', False)),
+            ))
+            timestamps.append(created_at)
+
+        with transaction.atomic():
+            EyeScan.objects.bulk_create(scans, batch_size=batch_size)
+            dated = []
+            for scan, value in zip(scans, timestamps):
+                if value is not None:
+                    scan.created_at = value
+                    dated.append(scan)
+            if dated:
+                EyeScan.objects.bulk_update(dated, ['created_at'], batch_size=batch_size)
+        created += len(scans)
+        patients.update(scan.user_id for scan in scans)
+    return created, skipped, errors, patients
+
+
+def _timestamp(value):
+    """An aware datetime from a datetime or ISO string, None when blank; ValueError if unparseable"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, str):
+        parsed = parse_datetime(value.strip())
+        if parsed is None:
+            raise ValueError(value)
+        value = parsed
+    if not isinstance(value, datetime):
+        raise ValueError(value)
+    return timezone.make_aware(value) if timezone.is_naive(value) else value
+
+
+def _as_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes')
+    return bool(value)
@@ -0,0 +1,57 @@
+"""
+Queries and caching for the user/specialist directory.
+
+The specialist list feeds every consultation booking form, so its
+serialized form is cached and dropped whenever a user or specialist profile
+changes (see users.signals).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import CustomUser
+from .serializers import DirectorySerializer
+
+SPECIALISTS_CACHE_KEY = 'users:specialists'
+
+
+def directory_queryset():
+    return (
+        CustomUser.objects.filter(is_active=True)
+        .select_related('specialistprofile')
+        .order_by('last_name', 'first_name', 'id')
+    )
+
+
+def filter_directory(queryset, params):
+    user_type = params.get('user_type')
+    if user_type:
+        queryset = queryset.filter(user_type=user_type)
+
+    specialization = params.get('specialization')
+    if specialization:
+        queryset = queryset.filter(
+            Q(specialization=specialization) | Q(specialistprofile__specialization=specialization)
+        )
+
+    location = params.get('location')
+    if location:
+        queryset = queryset.filter(location__icontains=location)
+
+    verified = params.get('verified')
+    if verified is not None and verified != '':
+        queryset = queryset.filter(specialistprofile__is_verified=verified.lower() in ('1', 'true', 'yes'))
+    return queryset
+
+
+def cached_specialists():
+    data = cache.get(SPECIALISTS_CACHE_KEY)
+    if data is None:
+        specialists = directory_queryset().filter(user_type='specialist')
+        data = DirectorySerializer(specialists, many=True).data
+        cache.set(SPECIALISTS_CACHE_KEY, data, settings.SPECIALISTS_CACHE_SECONDS)
+    return data
+
+
+def invalidate_specialists():
+    cache.delete(SPECIALISTS_CACHE_KEY)
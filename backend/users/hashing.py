@@ -0,0 +1,163 @@
+"""
+Password hashing that can run outside the request thread.
+
+With AUTH_HASHING_MODE = 'pool', PBKDF2 work for login and registration is
+sent to a small process pool. Only AUTH_HASHING_MAX_QUEUE jobs may be
+waiting or running at once; above that, requests fail fast with
+HashingUnavailable instead of tying up workers. In the default 'inline'
+mode this module just calls Django's authenticate / make_password.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.signals import user_login_failed
+from django.contrib.auth.hashers import make_password, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class HashingUnavailable(Exception):
+    """Raised when the hashing pool is saturated or did not answer in time"""
+
+
+def _init_worker():
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eyecare.settings')
+    django.setup()
+
+
+class HashingPool:
+    def __init__(self, workers, max_queue, timeout):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.pending = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._pid = None
+
+    def _get_executor(self):
+        # Executors don't survive a fork, so each gunicorn worker builds its own;
+        # the lock stops concurrent first requests from each starting a pool
+        with self._executor_lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(self.workers, initializer=_init_worker)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _release(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_queue:
+                self.rejected += 1
+                raise HashingUnavailable("Password hashing queue is full")
+            self.pending += 1
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HashingUnavailable("Password hashing timed out")
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queue_depth': self.pending,
+            'max_queue': self.max_queue,
+            'rejected': self.rejected,
+        }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                workers=settings.AUTH_HASHING_WORKERS,
+                max_queue=settings.AUTH_HASHING_MAX_QUEUE,
+                timeout=settings.AUTH_HASHING_TIMEOUT,
+            )
+        return _pool
+
+
+def pool_enabled():
+    return settings.AUTH_HASHING_MODE == 'pool'
+
+
+def stats():
+    data = {'mode': settings.AUTH_HASHING_MODE}
+    if pool_enabled():
+        data.update(get_pool().stats())
+    return data
+
+
+def hash_password(raw_password):
+    """Hash a password for storage, in the pool when enabled"""
+    if pool_enabled():
+        return get_pool().run(make_password, raw_password)
+    return make_password(raw_password)
+
+
+def authenticate_user(request, username, password):
+    """
+    Drop-in for django.contrib.auth.authenticate(username=..., password=...).
+
+    In pool mode the user row is loaded on the request thread and only the
+    hash comparison runs in the pool. A correct password stored under an
+    outdated hasher or iteration count is re-hashed and saved, which is what
+    Django's ModelBackend does inline. Failures send user_login_failed, as
+    authenticate() does, so lockout and audit receivers keep working.
+    """
+    if not pool_enabled():
+        return authenticate(request, username=username, password=password)
+
+    if username is None or password is None:
+        return _login_failed(request, username)
+    User = get_user_model()
+    try:
+        user = User._default_manager.get_by_natural_key(username)
+        encoded = user.password
+    except User.DoesNotExist:
+        user = None
+        encoded = make_password(None)
+
+    # verify_password runs a dummy hash for unknown users to keep timing even
+    pool = get_pool()
+    is_correct, must_update = pool.run(verify_password, password, encoded)
+    if not is_correct or user is None or not user.is_active:
+        return _login_failed(request, username)
+
+    if must_update:
+        try:
+            user.password = pool.run(make_password, password)
+            user.save(update_fields=['password'])
+        except HashingUnavailable:
+            logger.info("Skipped password hash upgrade for user %s: pool busy", user.pk)
+    return user
+
+
+def _login_failed(request, username):
+    # Same sender and masked credentials as django.contrib.auth.authenticate
+    user_login_failed.send(
+        sender=authenticate.__module__,
+        credentials={'username': username, 'password': '********************'},
+        request=request,
+    )
+    return None
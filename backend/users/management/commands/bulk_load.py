@@ -0,0 +1,64 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users import bulk
+
+KINDS = ('users', 'articles', 'scans')
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load users, specialist profiles, articles and historical scans. "
+        "JSON files hold a top-level object with any of the keys 'users', 'articles' "
+        "and 'scans'; CSV files hold one kind, given with --kind. Safe to re-run. "
+        "Afterwards the specialist workload, analytics rollups and patient timelines are "
+        "rebuilt; loaded scans carry no reviews, so the similar-case index is unaffected."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--kind', choices=KINDS, help="Record type of a CSV file")
+        parser.add_argument('--batch-size', type=int, default=bulk.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Password hashing processes (default: CPU count)")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if path.endswith('.csv'):
+            if not options['kind']:
+                raise CommandError("--kind is required for CSV files")
+            with open(path, newline='', encoding='utf-8') as fh:
+                self._load(options['kind'], csv.DictReader(fh), options)
+        else:
+            with open(path, encoding='utf-8') as fh:
+                data = json.load(fh)
+            # Users first so articles and scans can resolve their owners
+            for kind in KINDS:
+                if kind in data:
+                    self._load(kind, data[kind], options)
+
+    def _load(self, kind, records, options):
+        errors = []
+        # bulk_create bypasses the signals that keep the derived tables current
+        if kind == 'users':
+            created, skipped = bulk.load_users(records, options['batch_size'], options['workers'])
+            if created:
+                from users import workload
+                workload.rebuild()
+        elif kind == 'articles':
+            created, skipped = bulk.load_articles(records, options['batch_size'])
+        else:
+            created, skipped, errors, patients = bulk.load_scans(records, options['batch_size'])
+            if created:
+                from analytics.rollups import rebuild
+                from scans import timeline
+                rebuild()
+                for batch in bulk.batched(patients, options['batch_size']):
+                    timeline.refresh(batch)
+        for error in errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"{kind}: created {created}, skipped {skipped}" + (f", rejected {len(errors)}" if errors else '')
+        ))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.workload import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the specialist workload counters from open consultations and contact messages"
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} workload rows"))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_customuser_specialization'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customuser',
+            name='specialization',
+            field=models.CharField(blank=True, db_index=True, help_text='Medical specialization (for specialists only)', max_length=100, null=True),
+        ),
+        migrations.AlterField(
+            model_name='customuser',
+            name='user_type',
+            field=models.CharField(choices=[('user', 'User'), ('specialist', 'Specialist'), ('admin', 'Admin')], db_index=True, default='user', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='specialistprofile',
+            name='specialization',
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.7 on 2026-10-19 15:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def seed_workload(apps, schema_editor):
+    # The counts users.workload.rebuild() would give, from the historical models
+    CustomUser = apps.get_model('users', 'CustomUser')
+    SpecialistWorkload = apps.get_model('users', 'SpecialistWorkload')
+    Consultation = apps.get_model('consultations', 'Consultation')
+    ContactMessage = apps.get_model('contact', 'ContactMessage')
+
+    counts = {}
+    consultations = (
+        Consultation.objects.filter(status__in=('pending', 'approved'))
+        .values('specialist_id').annotate(count=Count('id'))
+    )
+    for row in consultations:
+        counts.setdefault(row['specialist_id'], {})['open_consultations'] = row['count']
+    messages = (
+        ContactMessage.objects.filter(status__in=('new', 'in_progress'), assigned_to__isnull=False)
+        .values('assigned_to_id').annotate(count=Count('id'))
+    )
+    for row in messages:
+        counts.setdefault(row['assigned_to_id'], {})['open_messages'] = row['count']
+
+    rows = []
+    users = CustomUser.objects.filter(Q(user_type='specialist', is_active=True) | Q(pk__in=counts.keys()))
+    for user in users.only('id', 'user_type', 'is_active'):
+        row = counts.get(user.pk, {})
+        consultations, messages = row.get('open_consultations', 0), row.get('open_messages', 0)
+        rows.append(SpecialistWorkload(
+            specialist_id=user.pk, accepting=user.user_type == 'specialist' and user.is_active,
+            open_consultations=consultations, open_messages=messages, total=consultations + messages,
+        ))
+    SpecialistWorkload.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_directory_indexes'),
+        ('consultations', '0003_initial'),
+        ('contact', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpecialistWorkload',
+            fields=[
+                ('specialist', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workload', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('accepting', models.BooleanField(default=True)),
+                ('open_consultations', models.IntegerField(default=0)),
+                ('open_messages', models.IntegerField(default=0)),
+                ('total', models.IntegerField(default=0)),
+                ('assigned_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['accepting', 'total', 'assigned_count'], name='workload_pick_idx')],
+            },
+        ),
+        # Every specialist gets a row up front, so pick() never has to guess
+        # whether the table was seeded
+        migrations.RunPython(seed_workload, migrations.RunPython.noop),
+    ]
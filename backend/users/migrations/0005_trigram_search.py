@@ -0,0 +1,43 @@
+from django.db import migrations
+
+# pg_trgm GIN indexes on UPPER(column), matching the SQL Django emits for
+# icontains on PostgreSQL, so admin searches can use an index. A no-op on
+# other databases. Spelled out here so the migration never changes.
+TABLE = 'users_customuser'
+COLUMNS = ['username', 'first_name', 'last_name', 'email']
+
+
+def index_name(column):
+    return f'{TABLE}_{column}_trgm'
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    quote = schema_editor.quote_name
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for column in COLUMNS:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(index_name(column))} '
+            f'ON {quote(TABLE)} USING gin ((UPPER({quote(column)}::text)) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for column in COLUMNS:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {schema_editor.quote_name(index_name(column))}')
+
+
+class Migration(migrations.Migration):
+    # Indexes are built CONCURRENTLY, which can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('users', '0004_specialist_workload'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -8,7 +8,7 @@ class CustomUser(AbstractUser):
         ('admin', 'Admin'),
     )
     
-    user_type = models.CharField(max_length=20, choices=USER_TYPE_CHOICES, default='user')
+    user_type = models.CharField(max_length=20, choices=USER_TYPE_CHOICES, default='user', db_index=True)
     phone_number = models.CharField(max_length=15, blank=True)
     location = models.CharField(max_length=100, blank=True)
     date_of_birth = models.DateField(null=True, blank=True)
@@ -17,6 +17,7 @@ class CustomUser(AbstractUser):
         max_length=100, 
         blank=True, 
         null=True,
+        db_index=True,
         help_text="Medical specialization (for specialists only)"
     )
 
@@ -26,7 +27,7 @@ class CustomUser(AbstractUser):
 
 class SpecialistProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE)
-    specialization = models.CharField(max_length=100)
+    specialization = models.CharField(max_length=100, db_index=True)
     license_number = models.CharField(max_length=50)
     years_of_experience = models.IntegerField(default=0)
     hospital_affiliation = models.CharField(max_length=200, blank=True)
@@ -35,3 +36,29 @@ class SpecialistProfile(models.Model):
 
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.specialization}"
+
+class SpecialistWorkload(models.Model):
+    """
+    Open work currently assigned to each specialist (users/workload.py).
+
+    Counters move with atomic UPDATEs as consultations and contact messages
+    are assigned, closed or reassigned. New work goes to the accepting
+    specialist with the lowest `total`, found through the pick index
+    rather than by counting each specialist's open items.
+    """
+    specialist = models.OneToOneField(CustomUser, on_delete=models.CASCADE, primary_key=True, related_name='workload')
+    # Active specialists only; admins who pick up messages get a row but no new work
+    accepting = models.BooleanField(default=True)
+    open_consultations = models.IntegerField(default=0)
+    open_messages = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    # Lifetime count, used to rotate between equally loaded specialists
+    assigned_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['accepting', 'total', 'assigned_count'], name='workload_pick_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.specialist.username}: {self.total} open"
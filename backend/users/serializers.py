@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from .hashing import hash_password
 from .models import CustomUser, SpecialistProfile
 
 class UserSerializer(serializers.ModelSerializer):
@@ -24,8 +25,8 @@ class UserSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         validated_data.pop('password2')
         password = validated_data.pop('password')
-        user = CustomUser.objects.create(**validated_data)
-        user.set_password(password)
+        user = CustomUser(**validated_data)
+        user.password = hash_password(password)
         user.save()
         return user
 
@@ -33,3 +34,27 @@ class SpecialistProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = SpecialistProfile
         fields = '__all__'
+
+class DirectoryProfileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SpecialistProfile
+        fields = ('specialization', 'years_of_experience', 'hospital_affiliation', 'is_verified')
+
+class DirectorySerializer(serializers.ModelSerializer):
+    """Read-only public listing; expects specialistprofile to be select_related"""
+    specialization = serializers.SerializerMethodField()
+    profile = DirectoryProfileSerializer(source='specialistprofile', read_only=True)
+
+    class Meta:
+        model = CustomUser
+        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'user_type',
+                  'location', 'specialization', 'profile')
+        read_only_fields = fields
+
+    def get_specialization(self, obj):
+        if obj.specialization:
+            return obj.specialization
+        try:
+            return obj.specialistprofile.specialization or None
+        except SpecialistProfile.DoesNotExist:
+            return None
@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import workload
+from .directory import invalidate_specialists
+from .models import CustomUser, SpecialistProfile
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # Login hash upgrades and last_login updates don't affect the listing
+    if update_fields and set(update_fields) <= {'password', 'last_login'}:
+        return
+    # Any edit may move a user in or out of the specialist list; new patients can't
+    if instance.user_type == 'specialist' or not kwargs.get('created', False):
+        invalidate_specialists()
+
+
+@receiver(post_save, sender=SpecialistProfile)
+@receiver(post_delete, sender=SpecialistProfile)
+def profile_changed(sender, instance, **kwargs):
+    invalidate_specialists()
+
+
+@receiver(post_save, sender=CustomUser)
+def sync_workload(sender, instance, created, update_fields=None, **kwargs):
+    if kwargs.get('raw') or (update_fields and set(update_fields) <= {'password', 'last_login'}):
+        return
+    # Only specialists get a row up front; deactivated ones stop receiving work
+    if instance.user_type == 'specialist' or not created:
+        workload.sync_user(instance)
@@ -1,3 +1,169 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from consultations.models import Consultation
+from contact.models import ContactMessage
+from scans import timeline
+from scans.models import EyeScan, PatientTimeline
+from users import bulk, hashing, workload
+from users.models import CustomUser, SpecialistWorkload
+
+# What Render's proxy appends: the address the request really came from
+CLIENT_IP = '203.0.113.7'
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.client = APIClient()
+
+    def login(self, username, forwarded_for):
+        return self.client.post('/api/auth/login/', {'username': username, 'password': 'wrong'}, format='json',
+                                HTTP_X_FORWARDED_FOR=forwarded_for, secure=True)
+
+    def test_forged_forwarded_for_shares_the_clients_bucket(self):
+        codes = [self.login(f'user{i}', f'198.51.100.{i}, {CLIENT_IP}').status_code for i in range(30)]
+        self.assertIn(429, codes)
+        self.assertEqual(self.login('someone', f'198.51.100.99, {CLIENT_IP}').status_code, 429)
+
+    def test_other_clients_have_their_own_bucket(self):
+        for i in range(30):
+            self.login(f'user{i}', CLIENT_IP)
+        self.assertEqual(self.login('someone', '203.0.113.8').status_code, 401)
+
+    def test_contact_bucket_ignores_forged_forwarded_for(self):
+        message = {'name': 'Spam', 'email': 'spam@example.com', 'subject': 'Hello there', 'message': 'x' * 40}
+        codes = [
+            self.client.post('/api/contact/contact-messages/', message, format='json', secure=True,
+                             HTTP_X_FORWARDED_FOR=f'198.51.100.{i}, {CLIENT_IP}').status_code
+            for i in range(10)
+        ]
+        self.assertIn(429, codes)
+
+
+class WorkloadTests(TestCase):
+    def setUp(self):
+        self.patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw', user_type='user')
+        self.specialists = [
+            CustomUser.objects.create_user(f'doc{i}', f'doc{i}@example.com', 'pw', user_type='specialist')
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.patient)
+
+    def book(self):
+        response = self.client.post('/api/consultations/consultations/', {'description': 'Blurred vision'},
+                                    format='json', secure=True)
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def counters(self):
+        return sorted(SpecialistWorkload.objects.values_list('specialist_id', 'open_consultations',
+                                                             'open_messages', 'total'))
+
+    def test_bookings_spread_and_match_rebuild(self):
+        for _ in range(6):
+            self.book()
+        self.assertEqual(
+            sorted(Consultation.objects.values_list('specialist_id', flat=True)),
+            sorted([s.pk for s in self.specialists] * 2),
+        )
+        counters = self.counters()
+        workload.rebuild()
+        self.assertEqual(counters, self.counters())
+
+    def test_new_specialist_is_picked_without_a_rebuild(self):
+        for _ in range(3):
+            self.book()
+        newcomer = CustomUser.objects.create_user('newcomer', 'new@example.com', 'pw', user_type='specialist')
+        self.book()
+        self.assertEqual(Consultation.objects.latest('id').specialist_id, newcomer.pk)
+
+    def test_contact_form_does_not_assign_by_default(self):
+        message = {'name': 'Visitor', 'email': 'v@example.com', 'subject': 'Hello there', 'message': 'x' * 40}
+        response = APIClient().post('/api/contact/contact-messages/', message, format='json', secure=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(ContactMessage.objects.get().assigned_to_id)
+        self.assertFalse(SpecialistWorkload.objects.filter(open_messages__gt=0).exists())
+
+
+class BulkLoadTests(TestCase):
+    def test_created_counts_only_inserted_rows(self):
+        CustomUser.objects.create_user('taken', 'taken@example.com', 'pw')
+        records = [{'username': name, 'email': f'{name}@example.com', 'password': 'pw'} for name in ('taken', 'fresh')]
+        self.assertEqual(bulk.load_users(records, workers=1), (1, 1))
+
+    def setUp(self):
+        self.patient = CustomUser.objects.create_user('patient', 'p@example.com', 'pw')
+        self.scan = {'username': 'patient', 'condition_detected': 'normal', 'confidence_score': '0.9'}
+
+    def test_invalid_rows_are_rejected(self):
+        records = [
+            {**self.scan, 'image': 'eye_scans/a.jpg', 'created_at': '2024-02-30T10:00:00'},
+            {**self.scan, 'image': 'eye_scans/b.jpg', 'created_at': 'yesterday'},
+            {**self.scan, 'image': 'eye_scans/c.jpg', 'created_at': '2024-02-01 10:00'},
+            {**self.scan, 'image': 'eye_scans/d.jpg', 'condition_detected': 'Normal'},
+        ]
+        # A generator, as the command streams CSV rows
+        created, skipped, errors, patients = bulk.load_scans(record for record in records)
+        self.assertEqual((created, skipped, len(errors), patients), (1, 0, 3, {self.patient.pk}))
+        self.assertIn("invalid condition_detected 'Normal'", errors[-1])
+        self.assertEqual(EyeScan.objects.get().created_at.date().isoformat(), '2024-02-01')
+
+    def test_command_refreshes_timelines(self):
+        timeline.get_timeline(self.patient.pk)
+        path = os.path.join(tempfile.mkdtemp(), 'scans.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.DictWriter(fh, ['username', 'image', 'condition_detected', 'confidence_score'])
+            writer.writeheader()
+            writer.writerows({**self.scan, 'image': f'eye_scans/{i}.jpg'} for i in range(3))
+        call_command('bulk_load', path, kind='scans', batch_size=2, stdout=io.StringIO())
+        self.assertEqual(PatientTimeline.objects.get(pk=self.patient.pk).scan_count, 3)
+
+
+class HashingTests(TestCase):
+    def setUp(self):
+        CustomUser.objects.create_user('patient', 'p@example.com', 'right')
+        self.failures = []
+        receiver = lambda sender, credentials, **kwargs: self.failures.append(credentials)
+        user_login_failed.connect(receiver)
+        self.addCleanup(user_login_failed.disconnect, receiver)
+
+    @override_settings(AUTH_HASHING_MODE='pool')
+    def test_pool_mode_sends_login_failed(self):
+        pool = hashing.HashingPool(workers=1, max_queue=4, timeout=30)
+        self.addCleanup(lambda: pool._executor and pool._executor.shutdown())
+        with mock.patch.object(hashing, 'get_pool', return_value=pool):
+            self.assertIsNone(hashing.authenticate_user(None, 'patient', 'wrong'))
+            self.assertIsNone(hashing.authenticate_user(None, 'nobody', 'wrong'))
+            self.assertEqual(hashing.authenticate_user(None, 'patient', 'right').username, 'patient')
+        self.assertEqual([c['username'] for c in self.failures], ['patient', 'nobody'])
+        self.assertNotIn('wrong', [c['password'] for c in self.failures])
+
+    def test_concurrent_first_calls_share_one_executor(self):
+        pool = hashing.HashingPool(workers=1, max_queue=4, timeout=30)
+        start = threading.Barrier(8)
+
+        def first_call():
+            start.wait()
+            pool._get_executor()
+
+        # A slow constructor widens the window in which an unguarded check races
+        slow = lambda *args, **kwargs: time.sleep(0.05) or mock.Mock()
+        with mock.patch.object(hashing, 'ProcessPoolExecutor', side_effect=slow) as executor:
+            threads = [threading.Thread(target=first_call) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(executor.call_count, 1)
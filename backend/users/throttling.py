@@ -0,0 +1,101 @@
+"""
+Token-bucket throttles for anonymous, CPU-expensive endpoints.
+
+Buckets live in the 'throttle' cache, which should be shared between
+workers (e.g. Redis). If that backend can't be reached, each process falls
+back to a private local-memory cache, so throttling weakens but never takes
+the endpoint down.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_local_cache = LocMemCache('throttle-fallback', {})
+
+
+def parse_rate(rate):
+    """'10/min' -> (capacity 10, refill 10/60 tokens per second)"""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Allows bursts up to the rate's request count, refilled continuously.
+
+    The bucket is read and written without a lock. Under heavy concurrency a
+    few extra requests can get through, but the limit stays in force.
+    """
+    scope = None
+    cache_alias = 'throttle'
+
+    def __init__(self):
+        rates = settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {})
+        self.capacity, self.refill_rate = parse_rate(rates[self.scope])
+        self._wait = None
+
+    def get_bucket_ident(self, request, view):
+        """Return the identity to rate-limit, or None to skip this throttle"""
+        raise NotImplementedError
+
+    def _cache_call(self, method, *args):
+        try:
+            return getattr(caches[self.cache_alias], method)(*args)
+        except Exception as exc:
+            logger.warning("Throttle cache unavailable, using local memory: %s", exc)
+            return getattr(_local_cache, method)(*args)
+
+    def allow_request(self, request, view):
+        ident = self.get_bucket_ident(request, view)
+        if ident is None:
+            return True
+
+        key = f'throttle:{self.scope}:{ident}'
+        now = time.time()
+        tokens, stamp = self._cache_call('get', key) or (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - stamp) * self.refill_rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        else:
+            self._wait = (1 - tokens) / self.refill_rate
+        timeout = int(self.capacity / self.refill_rate) + 1
+        self._cache_call('set', key, (tokens, now), timeout)
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    scope = 'login_ip'
+
+    def get_bucket_ident(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    """Limits guesses against one account, however many IPs they come from"""
+    scope = 'login_username'
+
+    def get_bucket_ident(self, request, view):
+        username = request.data.get('username')
+        if not isinstance(username, str) or not username:
+            return None
+        return username.strip().lower()
+
+
+class ContactIPThrottle(TokenBucketThrottle):
+    scope = 'contact'
+
+    def get_bucket_ident(self, request, view):
+        return self.get_ident(request)
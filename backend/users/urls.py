@@ -17,7 +17,8 @@ def auth_overview(request):
             "register": "POST /api/auth/register/",
             "token_refresh": "POST /api/token/refresh/",
             "specialists": "GET /api/auth/specialists/",
-            "users": "GET /api/auth/users/"
+            "users": "GET /api/auth/users/",
+            "directory": "GET /api/auth/directory/?user_type=&specialization=&location=&verified="
         },
         "note": "Login and register endpoints require POST requests"
     })
@@ -54,4 +55,5 @@ urlpatterns = [
     # NEW ENDPOINTS - Add these lines
     path('specialists/', views.get_specialists, name='get_specialists'),
     path('users/', views.get_users, name='get_users'),
+    path('directory/', views.directory, name='user_directory'),
 ]
\ No newline at end of file
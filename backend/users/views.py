@@ -1,19 +1,48 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate
+from .hashing import HashingUnavailable, authenticate_user
+from eyecare.db_router import replica_reads
+from .directory import cached_specialists, directory_queryset, filter_directory
 from .models import CustomUser, SpecialistProfile
-from .serializers import UserSerializer, SpecialistProfileSerializer
+from .pagination import DirectoryPagination
+from .serializers import DirectorySerializer, UserSerializer, SpecialistProfileSerializer
+from .throttling import LoginIPThrottle, LoginUsernameThrottle
+
+
+def hashing_busy_response():
+    return Response(
+        {'error': 'Authentication service is busy, please retry shortly'},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '1'}
+    )
+
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_specialists(request):
     """Get all specialists for consultation requests"""
-    specialists = CustomUser.objects.filter(user_type='specialist')
-    serializer = UserSerializer(specialists, many=True)
-    return Response(serializer.data)
+    with replica_reads(request):
+        return Response(cached_specialists())
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def directory(request):
+    """
+    Paginated user directory with filters: user_type, specialization, location, verified.
+    Only admins can list non-specialists.
+    """
+    queryset = filter_directory(directory_queryset(), request.query_params)
+    if not (request.user.user_type == 'admin' or request.user.is_staff):
+        queryset = queryset.filter(user_type='specialist')
+
+    with replica_reads(request):
+        paginator = DirectoryPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        serializer = DirectorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -27,7 +56,10 @@ def get_users(request):
 def register(request):
     serializer = UserSerializer(data=request.data)
     if serializer.is_valid():
-        user = serializer.save()
+        try:
+            user = serializer.save()
+        except HashingUnavailable:
+            return hashing_busy_response()
         
         if user.user_type == 'specialist':
             SpecialistProfile.objects.create(
@@ -47,11 +79,15 @@ def register(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([LoginIPThrottle, LoginUsernameThrottle])
 def login(request):
     username = request.data.get('username')
     password = request.data.get('password')
     
-    user = authenticate(username=username, password=password)
+    try:
+        user = authenticate_user(request, username, password)
+    except HashingUnavailable:
+        return hashing_busy_response()
     
     if user:
         refresh = RefreshToken.for_user(user)
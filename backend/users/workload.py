@@ -0,0 +1,119 @@
+"""
+Load-aware assignment of consultations and contact messages to specialists.
+
+SpecialistWorkload keeps one row of open-work counters per specialist:
+
+* consultations that are pending or approved
+* contact messages assigned to them and not yet resolved
+
+Signals in the consultations and contact apps call `adjust` whenever an
+item opens, closes or changes hands. `pick` returns the least-loaded
+accepting specialist from the (accepting, total, assigned_count) index.
+It locks that row with SKIP LOCKED, so concurrent bookings spread across
+specialists instead of queueing on one. `rebuild` recomputes every row
+from the source tables; migration users/0004 runs it to seed the table.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import CustomUser, SpecialistWorkload
+
+OPEN_CONSULTATION_STATUSES = ('pending', 'approved')
+OPEN_MESSAGE_STATUSES = ('new', 'in_progress')
+COUNTERS = {'consultations': 'open_consultations', 'messages': 'open_messages'}
+
+
+def is_accepting(user):
+    return user.user_type == 'specialist' and user.is_active
+
+
+def adjust(specialist_id, kind, delta):
+    """Atomically add `delta` to one of a specialist's counters"""
+    if specialist_id is None or not delta:
+        return
+    field = COUNTERS[kind]
+    changes = {field: F(field) + delta, 'total': F('total') + delta}
+    if SpecialistWorkload.objects.filter(specialist_id=specialist_id).update(**changes):
+        return
+    user = CustomUser.objects.filter(pk=specialist_id).first()
+    if user is None:
+        return
+    try:
+        with transaction.atomic():
+            SpecialistWorkload.objects.create(specialist=user, accepting=is_accepting(user),
+                                              total=delta, **{field: delta})
+    except IntegrityError:
+        # Another worker created the row between our UPDATE and INSERT
+        SpecialistWorkload.objects.filter(specialist_id=specialist_id).update(**changes)
+
+
+def move(kind, old_owner, new_owner):
+    """Shift one open item from `old_owner` to `new_owner`; either may be None"""
+    if old_owner != new_owner:
+        adjust(old_owner, kind, -1)
+        adjust(new_owner, kind, 1)
+
+
+def pick():
+    """
+    Id of the least-loaded accepting specialist, or None if there is none.
+
+    Call inside the transaction that saves the assigned item, so the row lock
+    is held until the new work is counted.
+    """
+    rows = SpecialistWorkload.objects.filter(accepting=True).order_by('total', 'assigned_count', 'specialist_id')
+    row = rows.select_for_update(skip_locked=True).values_list('specialist_id', flat=True).first()
+    if row is None:
+        # Every candidate is locked by a concurrent assignment (or there are
+        # none): wait for the best one
+        row = rows.select_for_update().values_list('specialist_id', flat=True).first()
+    if row is not None:
+        SpecialistWorkload.objects.filter(specialist_id=row).update(assigned_count=F('assigned_count') + 1)
+    return row
+
+
+def sync_user(user):
+    """Create or refresh a specialist's row after their account changes"""
+    accepting = is_accepting(user)
+    if accepting:
+        _, created = SpecialistWorkload.objects.get_or_create(specialist=user)
+        if created:
+            return
+    SpecialistWorkload.objects.filter(specialist=user).exclude(accepting=accepting).update(accepting=accepting)
+
+
+@transaction.atomic
+def rebuild():
+    """Recompute every workload row from open consultations and messages"""
+    from consultations.models import Consultation
+    from contact.models import ContactMessage
+
+    counts = {}
+    consultations = (
+        Consultation.objects.filter(status__in=OPEN_CONSULTATION_STATUSES)
+        .values('specialist_id').annotate(count=Count('id'))
+    )
+    for row in consultations:
+        counts.setdefault(row['specialist_id'], {})['open_consultations'] = row['count']
+    messages = (
+        ContactMessage.objects.filter(status__in=OPEN_MESSAGE_STATUSES, assigned_to__isnull=False)
+        .values('assigned_to_id').annotate(count=Count('id'))
+    )
+    for row in messages:
+        counts.setdefault(row['assigned_to_id'], {})['open_messages'] = row['count']
+
+    previous = dict(SpecialistWorkload.objects.values_list('specialist_id', 'assigned_count'))
+    users = CustomUser.objects.filter(
+        Q(user_type='specialist', is_active=True) | Q(pk__in=counts.keys()) | Q(pk__in=previous.keys())
+    )
+    rows = []
+    for user in users.only('id', 'user_type', 'is_active'):
+        row = counts.get(user.pk, {})
+        consultations, messages = row.get('open_consultations', 0), row.get('open_messages', 0)
+        rows.append(SpecialistWorkload(
+            specialist_id=user.pk, accepting=is_accepting(user), open_consultations=consultations,
+            open_messages=messages, total=consultations + messages, assigned_count=previous.get(user.pk, 0),
+        ))
+    SpecialistWorkload.objects.all().delete()
+    SpecialistWorkload.objects.bulk_create(rows, batch_size=500)
+    return len(rows)